@@ -1,13 +1,19 @@
+from .base import APIClient
+from .aio import AsyncAPIClient
 from .pubchem import PubChemClient
 from .kegg import KEGGClient
 from .uniprot import UniProtClient
 from .reactome import ReactomeClient
 from .go import GOClient
+from .mygene import MyGeneClient
 
 __all__ = [
+    'APIClient',
+    'AsyncAPIClient',
     'PubChemClient',
     'KEGGClient',
     'UniProtClient',
     'ReactomeClient',
-    'GOClient'
+    'GOClient',
+    'MyGeneClient'
 ]
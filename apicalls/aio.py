@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+
+# concurrent requests per host; hosts without an entry use DEFAULT_CONCURRENCY.
+# Keep these at or below the session pool size (APIClient.configure_session).
+DEFAULT_CONCURRENCY = 4
+HOST_CONCURRENCY = {
+    'rest.kegg.jp': 3,
+    'reactome.org': 8,
+    'mygene.info': 8,
+    'rest.uniprot.org': 8,
+    'pubchem.ncbi.nlm.nih.gov': 5,
+    'www.ebi.ac.uk': 8,
+}
+
+MAX_WORKERS = 32
+
+_executor = None
+_executor_lock = threading.Lock()
+# event loop -> {host: asyncio.Semaphore}; semaphores are bound to the loop they are used in
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='apicalls')
+    return _executor
+
+
+def host_semaphore(host: str) -> asyncio.Semaphore:
+    """The semaphore bounding concurrent requests to a host in the running event loop."""
+    per_loop = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if host not in per_loop:
+        per_loop[host] = asyncio.Semaphore(HOST_CONCURRENCY.get(host, DEFAULT_CONCURRENCY))
+    return per_loop[host]
+
+
+def run_sync(coroutine):
+    """Run a coroutine to completion from synchronous code, also when an event loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # e.g. inside a notebook: run the coroutine on a loop of its own
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coroutine).result()
+
+
+class AsyncAPIClient:
+    """Async variant of an API client, obtained with client.aio().
+
+    Every public method of the wrapped client is available as a coroutine
+    with the same signature. Calls go through the client's pooled session on
+    a shared worker pool, and at most HOST_CONCURRENCY[host] of them are in
+    flight per host, across all clients of that host in the event loop.
+    Each request still takes a token from the host's rate limiter
+    (apicalls.ratelimit), so raising the concurrency cannot exceed the
+    host's request rate.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.host = urlsplit(client.base_url).hostname
+
+    async def call(self, method: str, *args, **kwargs):
+        function = partial(getattr(self.client, method), *args, **kwargs)
+        async with host_semaphore(self.host):
+            return await asyncio.get_running_loop().run_in_executor(_get_executor(), function)
+
+    async def gather(self, method: str, items, *args, return_exceptions: bool = False, **kwargs) -> list:
+        """Call method once per item (as its first argument) concurrently; results keep the order of items."""
+        return await asyncio.gather(
+            *(self.call(method, item, *args, **kwargs) for item in items),
+            return_exceptions=return_exceptions,
+        )
+
+    def __getattr__(self, name):
+        attribute = getattr(self.client, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        async def method(*args, **kwargs):
+            return await self.call(name, *args, **kwargs)
+
+        method.__name__ = name
+        method.__doc__ = attribute.__doc__
+        return method
@@ -1,14 +1,199 @@
+import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from urllib3.exceptions import ProtocolError
+from urllib3.util.retry import Retry
+from apicalls.aio import AsyncAPIClient, run_sync
+from apicalls.cache import ResponseCache, request_key
+from apicalls.ratelimit import rate_limits
+from config import PROJECT_ROOT
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# methods retried without opting in; a retried POST could e.g. submit a job twice
+IDEMPOTENT_METHODS = Retry.DEFAULT_ALLOWED_METHODS
+
+# (connect, read) timeouts in seconds; hosts without an entry use DEFAULT_TIMEOUT
+DEFAULT_TIMEOUT = (5, 30)
+HOST_TIMEOUTS = {
+    'rest.uniprot.org': (5, 60),
+    'pubchem.ncbi.nlm.nih.gov': (5, 60),
+    'www.bgee.org': (10, 120),
+    'www.proteinatlas.org': (10, 120),
+}
+
+CACHE_PATH = PROJECT_ROOT / '.cache' / 'api_responses.sqlite'
+CACHE_MAX_BYTES = 512 * 1024 ** 2
+CACHED_STATUSES = (200, 404)
+DAY = 24 * 60 * 60
+
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """Raised in offline mode for a request whose response is not cached."""
+
+
+def _read_error(error):
+    # failed connections were already retried by the session, errors after sending were not
+    return isinstance(error, requests.ReadTimeout) or bool(error.args) and isinstance(error.args[0], ProtocolError)
 
 
 class APIClient:
+    """Base class of the REST clients.
+
+    Every client shares one requests.Session, so connections to a host are
+    pooled and kept alive across calls and clients. Failed connection
+    attempts are retried by the session. 429/5xx answers, read timeouts and
+    connections dropped mid-request are retried by _make_request with
+    exponential backoff, honouring Retry-After, for idempotent methods and
+    for requests passing retry=True (e.g. POST queries without side
+    effects). Use configure_session() to change the pool size or retry
+    policy.
+
+    Responses (200 and 404) of the methods in cache_methods are stored in an
+    on-disk ResponseCache keyed on method, URL, params and body, for
+    cache_ttl seconds (404s for negative_cache_ttl). Endpoints starting with
+    a prefix in cache_exclude always go to the network. In offline mode
+    (configure_cache(offline=True) or APICALLS_OFFLINE=1) requests are
+    served from the cache only; APICALLS_CACHE=0 disables the cache.
+
+    Every attempt of a request that reaches the network, retries included,
+    takes a token from the host's bucket in apicalls.ratelimit.rate_limits,
+    shared by all threads and by the async clients;
+    APIClient.rate_limits.metrics() reports the waits.
+
+    aio() gives the async variant of a client and gather() calls a method
+    for many inputs concurrently, bounded per host (see apicalls.aio).
+    """
+
+    cache_ttl = 30 * DAY
+    negative_cache_ttl = 7 * DAY
+    cache_methods = ('GET', 'POST')
+    cache_exclude = ()
+    rate_limits = rate_limits
+
+    _session = None
+    _retry_policy = (5, 0.5, 60)
+    _session_lock = threading.RLock()
+    _cache = None
+    _cache_enabled = os.environ.get('APICALLS_CACHE', '1') != '0'
+    _offline = os.environ.get('APICALLS_OFFLINE', '0') == '1'
+
     def __init__(self, base_url: str, polling_interval: int = 1):
         self.base_url = base_url
         self.polling_interval = polling_interval
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
-        """Make HTTP request and handle basic error checking."""
+    @classmethod
+    def configure_session(cls, pool_size: int = 10, retries: int = 5, backoff_factor: float = 0.5,
+                          backoff_max: float = 60) -> requests.Session:
+        """Replace the shared session with one using the given pool and retry settings."""
+        # no request has been sent when a connection fails, so these are safe for every method
+        retry = Retry(
+            total=None,
+            connect=retries,
+            read=False,
+            status=0,
+            other=0,
+            backoff_factor=backoff_factor,
+            backoff_max=backoff_max,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+
+        with cls._session_lock:
+            previous, APIClient._session = APIClient._session, session
+            APIClient._retry_policy = (retries, backoff_factor, backoff_max)
+        if previous is not None:
+            previous.close()
+        return session
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        if APIClient._session is None:
+            with cls._session_lock:
+                if APIClient._session is None:
+                    cls.configure_session()
+        return APIClient._session
+
+    @classmethod
+    def configure_cache(cls, path=CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, enabled: bool = True,
+                        offline: bool = False):
+        """Replace the shared response cache; offline=True serves requests from the cache only."""
+        with cls._session_lock:
+            previous = APIClient._cache
+            APIClient._cache = ResponseCache(path, max_bytes) if enabled else None
+            APIClient._cache_enabled = enabled
+            APIClient._offline = offline
+        if previous is not None:
+            previous.close()
+        return APIClient._cache
+
+    @classmethod
+    def cache(cls):
+        if APIClient._cache is None and APIClient._cache_enabled:
+            with cls._session_lock:
+                if APIClient._cache is None and APIClient._cache_enabled:
+                    APIClient._cache = ResponseCache(CACHE_PATH, CACHE_MAX_BYTES)
+        return APIClient._cache
+
+    def aio(self) -> AsyncAPIClient:
+        return AsyncAPIClient(self)
+
+    def gather(self, method: str, items, *args, return_exceptions: bool = False, **kwargs) -> list:
+        """Call method once per item concurrently; results keep the order of items."""
+        return run_sync(self.aio().gather(method, items, *args, return_exceptions=return_exceptions, **kwargs))
+
+    def _cacheable(self, method: str, endpoint: str) -> bool:
+        return method.upper() in self.cache_methods and \
+            not endpoint.lstrip('/').startswith(tuple(self.cache_exclude))
+
+    def _make_request(self, method: str, endpoint: str, retry: bool = None, **kwargs) -> requests.Response:
+        """Make HTTP request and handle basic error checking.
+
+        retry=True retries a non-idempotent request on 429/5xx answers and
+        read timeouts, retry=False disables retries; by default only
+        IDEMPOTENT_METHODS are retried.
+        """
         url = f"{self.base_url}/{endpoint}"
-        response = requests.request(method, url, **kwargs)
+        cache = self.cache() if self._cacheable(method, endpoint) else None
+        key = request_key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'),
+                          kwargs.get('headers')) if cache is not None else None
+
+        response = cache.get(key, self.cache_ttl, self.negative_cache_ttl) if cache is not None else None
+        if response is None:
+            if APIClient._offline:
+                raise OfflineCacheMiss(f"Offline and not cached: {method} {url}")
+            host = urlsplit(url).hostname
+            kwargs.setdefault('timeout', HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT))
+            retry = method.upper() in IDEMPOTENT_METHODS if retry is None else retry
+            response = self._send(method, url, host, retry, **kwargs)
+            if cache is not None and response.status_code in CACHED_STATUSES:
+                cache.put(key, method, response)
+
         response.raise_for_status()
         return response
+
+    def _send(self, method: str, url: str, host: str, retry: bool, **kwargs) -> requests.Response:
+        retries, backoff_factor, backoff_max = APIClient._retry_policy if retry else (0, 0, 0)
+        for attempt in range(retries + 1):
+            # every attempt takes a token, so retries during a 429/5xx storm stay within the limit
+            self.rate_limits.acquire(host)
+            try:
+                response = self.session().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.ReadTimeout) as error:
+                if attempt == retries or not _read_error(error):
+                    raise
+                delay = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                delay = Retry(0).parse_retry_after(retry_after) if retry_after else None
+            if delay is None:
+                delay = min(backoff_max, backoff_factor * 2 ** attempt)
+            time.sleep(delay)
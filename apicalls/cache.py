@@ -0,0 +1,131 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import requests
+from http import HTTPStatus
+from pathlib import Path
+from requests.structures import CaseInsensitiveDict
+
+
+# headers describing the wire format; the cached body is already decoded
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection')
+
+
+def _normalize(value):
+    """JSON-able form of request params/data with mapping keys sorted."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    if isinstance(value, dict):
+        return sorted([str(key), _normalize(item)] for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        items = [_normalize(item) for item in value]
+        # a list of (key, value) pairs is a mapping too
+        if all(isinstance(item, list) and len(item) == 2 for item in items):
+            return sorted(items, key=json.dumps)
+        return items
+    return str(value)
+
+
+def request_key(method, url, params=None, data=None, json_body=None, headers=None):
+    """Cache key of a request: method, URL, normalized params and body, and the Accept header."""
+    accept = next((value for name, value in (headers or {}).items() if name.lower() == 'accept'), None)
+    material = [method.upper(), url, _normalize(params), _normalize(data), _normalize(json_body), accept]
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """SQLite store of HTTP responses, shared by all API clients and processes.
+
+    Responses are kept with their creation time and expire by the TTL the
+    caller passes to get(). When the stored bodies exceed max_bytes the
+    least recently used responses are evicted.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 ** 2):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS response (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                encoding TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_response_accessed ON response(accessed)")
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM response").fetchone()[0]
+
+    def get(self, key, ttl, negative_ttl=None):
+        """The cached response of a key, or None when missing or older than its TTL.
+
+        404 responses expire after negative_ttl (ttl when omitted).
+        """
+        with self._lock:
+            row = self._db.execute("""
+                SELECT url, status, headers, encoding, body, created FROM response WHERE key = ?
+            """, (key,)).fetchone()
+            if row is None:
+                return None
+            url, status, headers, encoding, body, created = row
+            max_age = negative_ttl if status == 404 and negative_ttl is not None else ttl
+            if time.time() - created > max_age:
+                return None
+            self._db.execute("UPDATE response SET accessed = ? WHERE key = ?", (time.time(), key))
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = encoding
+        response.url = url
+        response._content = body
+        response.from_cache = True
+        return response
+
+    def put(self, key, method, response):
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS}
+        body = response.content
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM response WHERE key = ?", (key,)).fetchone()
+            self._db.execute("""
+                INSERT OR REPLACE INTO response (key, method, url, status, headers, encoding, body, size, created, accessed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, method.upper(), response.url, response.status_code, json.dumps(headers), response.encoding,
+                  body, len(body), now, now))
+            self._size += len(body) - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # drop the least recently used responses beyond the size cap
+        self._db.execute("""
+            DELETE FROM response WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS running FROM response
+                ) WHERE running > ?
+            )
+        """, (self.max_bytes,))
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM response").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM response")
+            self._size = 0
+
+    def close(self):
+        self._db.close()
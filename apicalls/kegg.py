@@ -15,6 +15,9 @@ class KEGGClient(APIClient):
         response = self._make_request("GET", f"get/{param}")
         return self._parse_mol_resposne(response.text)
 
+    def get_molecules_info(self, hsa_id_lists: List[List[str]]) -> List[List[Dict]]:
+        return self.gather("get_molecule_info", hsa_id_lists)
+
     def get_pubchem_id(self, mol_name: str) -> int:
         response = self._make_request("GET", f"/conv/pubchem/{mol_name}")
         res = response.text.split('pubchem:')[1].strip()
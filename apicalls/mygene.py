@@ -19,6 +19,10 @@ class MyGeneClient(APIClient):
         response = self._make_request("GET", "query", params=params)
         return response.json()
 
+    def query_genes(self, gene_symbols: List[str], return_exceptions: bool = False, **kwargs) -> Dict[str, Dict]:
+        symbols = list(dict.fromkeys(gene_symbols))
+        return dict(zip(symbols, self.gather("query_gene", symbols, return_exceptions=return_exceptions, **kwargs)))
+
     def batch_query_genes(self, gene_symbols: List[str],
                           species: str = "human",
                           fields: str = "symbol,name,ensembl.gene,uniprot,alias") -> List[Dict]:
@@ -28,7 +32,8 @@ class MyGeneClient(APIClient):
             'species': species,
             'fields': fields
         }
-        response = self._make_request("POST", "query", json=data)
+        # a query has no side effects, so it is safe to retry
+        response = self._make_request("POST", "query", json=data, retry=True)
         return response.json()
 
     def get_gene_info(self, gene_id: str,
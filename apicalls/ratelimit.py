@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+
+# (requests per second, burst) per host, after the providers' published usage policies;
+# hosts without an entry are not throttled
+DEFAULT_LIMITS = {
+    'rest.kegg.jp': (3, 3),
+    'pubchem.ncbi.nlm.nih.gov': (5, 5),
+    'eutils.ncbi.nlm.nih.gov': (3, 3),
+    'rest.uniprot.org': (10, 10),
+    'www.ebi.ac.uk': (10, 10),
+}
+
+
+def _limits_from_env(value):
+    """Parse APICALLS_RATE_LIMITS, e.g. 'rest.kegg.jp=3,rest.uniprot.org=20:40' (host=rate[:burst])."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        host, _, limit = item.partition('=')
+        rate, _, burst = limit.partition(':')
+        limits[host.strip()] = (float(rate), float(burst) if burst else None)
+    return limits
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second, holding at most burst tokens.
+
+    acquire() takes a token, sleeping until one is available. Tokens are
+    reserved under the lock and the sleep happens outside it, so waiting
+    threads are served in arrival order at exactly the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: float = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, not {rate!r}")
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens and return how long the caller has to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            delay = max(0.0, -self._tokens / self.rate)
+            self.requests += 1
+            if delay:
+                self.waits += 1
+                self.wait_seconds += delay
+                self.max_wait = max(self.max_wait, delay)
+        return delay
+
+    def acquire(self, tokens: float = 1) -> float:
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'requests': self.requests,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'max_wait': self.max_wait,
+            }
+
+
+class RateLimiterRegistry:
+    """Process-wide token buckets keyed by host, shared by every client and thread.
+
+    Limits come from DEFAULT_LIMITS, overridden by the APICALLS_RATE_LIMITS
+    environment variable and configure(). metrics() reports per host the
+    number of requests, how many of them waited and the total and maximum
+    wait in seconds.
+    """
+
+    def __init__(self, limits=None):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        for host, (rate, burst) in (limits or {}).items():
+            self.configure(host, rate, burst)
+
+    def configure(self, host: str, rate: float = None, burst: float = None):
+        """Limit requests to host to rate per second with bursts of up to burst; rate=None removes the limit."""
+        with self._lock:
+            if rate is None:
+                self._buckets.pop(host, None)
+            else:
+                self._buckets[host] = TokenBucket(rate, burst)
+
+    def limiter(self, host: str):
+        with self._lock:
+            return self._buckets.get(host)
+
+    def reserve(self, host: str) -> float:
+        bucket = self.limiter(host)
+        return bucket.reserve() if bucket is not None else 0.0
+
+    def acquire(self, host: str) -> float:
+        """Wait for a request slot to host; returns the seconds waited."""
+        bucket = self.limiter(host)
+        return bucket.acquire() if bucket is not None else 0.0
+
+    def metrics(self) -> dict:
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.metrics() for host, bucket in sorted(buckets.items())}
+
+    def reset_metrics(self):
+        with self._lock:
+            for bucket in self._buckets.values():
+                with bucket._lock:
+                    bucket.requests = bucket.waits = 0
+                    bucket.wait_seconds = bucket.max_wait = 0.0
+
+
+rate_limits = RateLimiterRegistry({**DEFAULT_LIMITS, **_limits_from_env(os.environ.get('APICALLS_RATE_LIMITS', ''))})
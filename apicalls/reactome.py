@@ -22,6 +22,10 @@ class ReactomeClient(APIClient):
                 f"Reactome API request failed: {str(e)}"
             ) from e
 
+    def map_proteins_to_pathways(self, uniprot_ids: List[str], species: str = "9606") -> Dict[str, List[str]]:
+        ids = list(dict.fromkeys(uniprot_ids))
+        return dict(zip(ids, self.gather("map_protein_to_pathways", ids, species=species)))
+
     @staticmethod
     def _parse_pathway_response(resp: Union[Dict, List]) -> List[str]:
         if isinstance(resp, list):
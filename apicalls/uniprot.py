@@ -1,80 +1,56 @@
 from apicalls.base import APIClient
 import time
-import traceback
 from typing import List, Dict, Union
 
 
+ID_MAPPING_MAX_IDS = 100_000  # ids per job accepted by the ID mapping service
+RESULTS_PAGE_SIZE = 500
+POLL_BACKOFF = 1.5
+POLL_MAX_INTERVAL = 30
+
+
 class UniProtClient(APIClient):
+    # id mapping jobs are asynchronous and their ids expire
+    cache_exclude = ('idmapping/',)
+
     def __init__(self):
         super().__init__("https://rest.uniprot.org")
 
     def convert_to_uniprot_id(self, db: str, ids: List[str], human: bool = True) -> tuple[Dict, List]:
-        return self._execute_id_mapping(
-            from_db=db,
-            to_db="UniProtKB-Swiss-Prot",
-            ids=ids,
-            human=human
-        )
+        return self.map_ids(db, "UniProtKB-Swiss-Prot", ids, human=human)
 
     def convert_from_uniprot_id(self, db: str, ids: List[str], human: bool = True) -> tuple[Dict, List]:
-        return self._execute_id_mapping(
-            from_db="UniProtKB_AC-ID",
-            to_db=db,
-            ids=ids,
-            human=human
-        )
-
-    def batch_convert_to_uniprot_id(self, db: str, ids: List[str], batch_size: int = 25, human=False) -> tuple[Dict, List]:
-        self.polling_interval = max(1.0, batch_size / 20)
-        results_dict = {}
-        failed_ids = []
-
-        for i in range(0, len(ids), batch_size):
-            batch = ids[i:i+batch_size]
-
-            try:
-                job_id = self._submit_id_mapping(db, "UniProtKB-Swiss-Prot", batch, human=human)
-                results, fails = self._get_id_mapping_results(job_id)
-                for result in results.get('results', []):
-                    from_id = result['from']
-                    to_id = result['to']
-                    results_dict[from_id] = to_id
-                    print(f"from: {from_id}, to: {to_id}")
-                failed_ids.extend(fails)
-            except Exception as e:
-                print(f"ERROR: {e}")
-                print(f"Error type: {type(e)}")
-                traceback.print_exc()
-                failed_ids.extend(batch)
-        return results_dict, failed_ids
-
-    def batch_convert_from_uniprot_id(self, db: str, ids: List[str], batch_size: int = 25) -> tuple[Dict, List]:
-        self.polling_interval = max(1.0, batch_size / 20)
-        results_dict = {}
-        failed_ids = []
-
-        for i in range(0, len(ids), batch_size):
-            batch = ids[i:i+batch_size]
-
-            try:
-                job_id = self._submit_id_mapping("UniProtKB_AC-ID", db, batch, human=False)
-                results = self._get_id_mapping_results(job_id)
-                for result in results.get('results', []):
-                    from_id = result['from']
-                    if 'ensembl' in db.lower():
-                        to_id = result['to'].split('.')[0]
-                    else:
-                        to_id = result['to']
-                    results_dict[from_id] = to_id
-                    print(f"from: {from_id}, to: {to_id}")
-                if 'failedIds' in results:
-                    failed_ids.extend(results['failedIds'])
-            except Exception as e:
-                print(f"ERROR: {e}")
-                print(f"Error type: {type(e)}")
-                traceback.print_exc()
-                failed_ids.extend(batch)
-        return results_dict, failed_ids
+        return self.map_ids("UniProtKB_AC-ID", db, ids, human=human)
+
+    def batch_convert_to_uniprot_id(self, db: str, ids: List[str], batch_size: int = ID_MAPPING_MAX_IDS,
+                                    human=False) -> tuple[Dict, List]:
+        return self.map_ids(db, "UniProtKB-Swiss-Prot", ids, human=human, job_size=batch_size)
+
+    def batch_convert_from_uniprot_id(self, db: str, ids: List[str],
+                                      batch_size: int = ID_MAPPING_MAX_IDS) -> tuple[Dict, List]:
+        return self.map_ids("UniProtKB_AC-ID", db, ids, human=False, job_size=batch_size)
+
+    def map_ids(self, from_db: str, to_db: str, ids: List[str], human: bool = True,
+                job_size: int = ID_MAPPING_MAX_IDS) -> tuple[Dict, List]:
+        """Map ids from one database to another with as few ID mapping jobs as possible.
+
+        The ids are split into jobs of at most job_size (the service limit by
+        default), which are submitted and polled concurrently. Returns
+        (mapping, failed): mapping holds the first target of every mapped id
+        (the accession for UniProtKB targets, without version for Ensembl
+        targets), failed the ids without a target, in input order.
+        """
+        ids = list(dict.fromkeys(ids))
+        jobs = [ids[i:i + job_size] for i in range(0, len(ids), job_size)]
+        results = self.gather("_run_id_mapping", jobs, from_db, to_db, human, return_exceptions=True)
+
+        mapping = {}
+        for batch, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                print(f"ERROR: ID mapping job of {len(batch)} ids failed: {result!r}")
+                continue
+            mapping.update(result)
+        return mapping, [id_value for id_value in ids if id_value not in mapping]
 
     def get_pr_fnc(self, uniprot_id: str) -> List[str]:
         fncs = []
@@ -93,49 +69,61 @@ class UniProtClient(APIClient):
                                 go_ids.append(go_id)
         return go_ids
 
-    def _execute_id_mapping(self, from_db: str, to_db: str, ids: List[str], human: bool) -> tuple[Dict, List]:
-        result_dict = {}
-        failed_ids = []
-
-        for id_value in ids:
-            print(id_value)
-            job_id = self._submit_id_mapping(from_db, to_db, [id_value], human)
-            results = self._get_id_mapping_results(job_id)
-
-            try:
-                result_dict[id_value] = self._parse_results(results, from_db, to_db)
-            except IndexError:
-                print(f'Failed to map ID {id_value} with job ID {job_id}')
-                failed_ids.append(id_value)
-
-        return result_dict, failed_ids
+    def _run_id_mapping(self, ids: List[str], from_db: str, to_db: str, human: bool) -> Dict:
+        job_id = self._submit_id_mapping(from_db, to_db, ids, human)
+        self._wait_for_id_mapping(job_id)
+        mapping = {}
+        for page in self._id_mapping_pages(job_id, to_db):
+            for result in page.get("results", []):
+                mapping.setdefault(result["from"], self._parse_target(result["to"], to_db))
+        return mapping
 
     def _submit_id_mapping(self, from_db: str, to_db: str, ids: List[str], human: bool) -> str:
-        data = {"from": from_db, "to": to_db, "ids": ids}
+        data = {"from": from_db, "to": to_db, "ids": ",".join(ids)}
         if human:
             data["taxId"] = "9606"
 
         response = self._make_request("POST", "idmapping/run", data=data)
         return response.json()["jobId"]
 
-    def _get_id_mapping_results(self, job_id: str) -> Dict:
+    def _wait_for_id_mapping(self, job_id: str):
+        # the interval grows while the job runs, so long jobs are not polled at the request rate
+        interval = self.polling_interval
         while True:
-            response = self._make_request("GET", f"idmapping/status/{job_id}")
+            # a finished job answers with a redirect to its results
+            response = self._make_request("GET", f"idmapping/status/{job_id}", allow_redirects=False)
+            if response.is_redirect:
+                return
             job = response.json()
-
-            if "jobStatus" in job:
-                if job["jobStatus"] in ("NEW", "RUNNING"):
-                    print(f"Retrying in {self.polling_interval}s")
-                    time.sleep(self.polling_interval)
-                else:
-                    raise Exception(job["jobStatus"])
-            else:
-                results = self._make_request("GET", f"idmapping/results/{job_id}?size=500")
-                return results.json(), list(set(job.get('failedIds', [])))
-
-    def _parse_results(self, results: Dict, from_db: str, to_db: str) -> Union[str, Dict]:
-        if "UniProt" in to_db:
-            return results['results'][0]['to']['primaryAccession']
-        elif "UniProt" in from_db:
-            return results['results'][0]['to']
-        raise ValueError("Unsupported database combination")
+            status = job.get("jobStatus", "FINISHED")
+            if status == "FINISHED":
+                return
+            if status not in ("NEW", "RUNNING"):
+                raise RuntimeError(f"ID mapping job {job_id} {status}: {job.get('errors', '')}")
+            time.sleep(float(response.headers.get("Retry-After", interval)))
+            interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+    def _id_mapping_pages(self, job_id: str, to_db: str):
+        """Result pages of a finished job, following the Link: next headers."""
+        details = self._make_request("GET", f"idmapping/details/{job_id}").json()
+        endpoint = self._endpoint(details.get("redirectURL", f"{self.base_url}/idmapping/results/{job_id}"))
+        params = {"format": "json", "size": RESULTS_PAGE_SIZE}
+        if "UniProtKB" in to_db:
+            params["fields"] = "accession"
+        while endpoint:
+            response = self._make_request("GET", endpoint, params=params)
+            yield response.json()
+            next_url = response.links.get("next", {}).get("url")
+            # the next link carries the cursor and the query parameters
+            endpoint, params = (self._endpoint(next_url), None) if next_url else (None, None)
+
+    def _endpoint(self, url: str) -> str:
+        return url.removeprefix(self.base_url).lstrip("/")
+
+    @staticmethod
+    def _parse_target(target: Union[str, Dict], to_db: str) -> str:
+        if isinstance(target, dict):
+            return target.get("primaryAccession", target.get("id"))
+        if "ensembl" in to_db.lower():
+            return target.split(".")[0]
+        return target
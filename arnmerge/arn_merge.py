@@ -4,22 +4,24 @@ from config import OUTPUTS_DIR, PROJECT_ROOT, SOURCES_DIR
 from database.sqlite_db_api3 import PsimiSQL
 
 
-def merge_strings(string_1, string_2, separator="|"):
-    if not string_1 and not string_2:
-        return ""
-    if not string_1:
-        return string_2
-    if not string_2:
-        return string_1
+ARN_EDGE_FILTER = "interaction_types LIKE 'True|true%'"
 
-    list_1 = [item for item in string_1.split(separator) if item and item != '-']
-    list_2 = [item for item in string_2.split(separator) if item and item != '-']
+# ARN edges repeating an (a, b, layer) key merge into one edge, as in PsimiSQL.upsert_edges
+EDGE_KEY_UPSERT = """
+    ON CONFLICT (interactor_a_node_id, interactor_b_node_id, layer) DO UPDATE SET
+        source_db = merge_strings(source_db, excluded.source_db),
+        interaction_types = merge_strings(interaction_types, excluded.interaction_types),
+        effect_on_ferroptosis = merge_strings(effect_on_ferroptosis, excluded.effect_on_ferroptosis)
+"""
 
-    merged = list(set(list_1 + list_2))
-    return separator.join(merged)
 
+def merge_arn(set_based=True):
+    """Merge the directed ARN edges and their nodes into the ferroptosis network.
 
-def merge_arn():
+    With set_based=True the ARN database is attached and merged with
+    INSERT ... SELECT anti-joins inside SQLite; otherwise its rows are
+    checked and inserted from Python.
+    """
     SQL_SEED = PROJECT_ROOT / "database" / "network_db_seed3.sql"
     FERROPTOSIS_DB = OUTPUTS_DIR / "merged_ferroptosis_w_omnipath.db"
     ARN_DB = SOURCES_DIR / "arn" / "arn.db"
@@ -34,6 +36,118 @@ def merge_arn():
     parser.cursor.execute("UPDATE edge SET source_db = 'ferroptosis_network'")
     parser.db.commit()
 
+    if set_based:
+        nodes_added, edges_processed, edges_skipped, edges_added = _merge_arn_attached(parser, ARN_DB)
+    else:
+        nodes_added, edges_processed, edges_skipped, edges_added = _merge_arn_rows(parser, ARN_DB)
+
+    # nodes and edges above were written with raw SQL
+    parser.rebuild_attribute_tables()
+
+    print(f"ARN nodes: {nodes_added} added")
+    print(f"Total ARN edges processed: {edges_processed}")
+    print(f"Edges skipped (already in ferroptosis network): {edges_skipped}")
+    print(f"New ARN edges added: {edges_added}")
+
+    parser.save_db_to_file(str(OUTPUT_DB))
+    print(f"Final merge complete: {OUTPUT_DB}")
+
+
+def _changes(parser):
+    return parser.db.execute("SELECT changes()").fetchone()[0]
+
+
+def _edge_count(parser):
+    return parser.db.execute("SELECT COUNT(*) FROM main.edge").fetchone()[0]
+
+
+def _edge_conflict_clause(parser):
+    """EDGE_KEY_UPSERT where the idx_edge_key unique index enforces the edge key, else a plain INSERT."""
+    has_key = parser.db.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE type = 'index' AND name = 'idx_edge_key'").fetchone()
+    return EDGE_KEY_UPSERT if has_key else ''
+
+
+def _merge_arn_attached(parser, arn_db_path):
+    """Merge the ARN database inside SQLite.
+
+    Returns (nodes added, edges processed, edges skipped, edges added).
+    """
+    parser.db.commit()
+    parser.db.execute("ATTACH DATABASE ? AS arn", (str(arn_db_path),))
+    try:
+        with parser.db:
+            print(f"Existing nodes: {parser.db.execute('SELECT COUNT(*) FROM node').fetchone()[0]}")
+
+            # the existing edges are snapshotted before the ARN edges go in
+            parser.db.execute("""
+                CREATE TEMP TABLE existing_edge_name (
+                    a_name TEXT, b_name TEXT, PRIMARY KEY (a_name, b_name)
+                ) WITHOUT ROWID
+            """)
+            parser.db.execute("""
+                INSERT OR IGNORE INTO existing_edge_name
+                SELECT interactor_a_node_name, interactor_b_node_name FROM main.edge
+            """)
+            print(f"Existing edges: {parser.db.execute('SELECT COUNT(*) FROM existing_edge_name').fetchone()[0]}")
+
+            parser.db.execute("""
+                INSERT INTO main.node (name, primary_id_type, display_name, tax_id, type, pathways, role_in_ferroptosis, function, source_db)
+                SELECT a.name, 'uniprot_id', COALESCE(NULLIF(a.display_name, ''), a.name),
+                       COALESCE(NULLIF(NULLIF(a.tax_id, ''), 0), 9606), COALESCE(NULLIF(a.type, ''), 'protein'), '', '', '', 'ARN'
+                FROM arn.node a
+                WHERE NOT EXISTS (SELECT 1 FROM main.node n WHERE n.name = a.name)
+                ORDER BY a.rowid
+            """)
+            nodes_added = _changes(parser)
+
+            # name -> id of the last node with that name
+            parser.db.execute("""
+                CREATE TEMP TABLE node_name_id (name TEXT PRIMARY KEY, id INTEGER) WITHOUT ROWID
+            """)
+            parser.db.execute("INSERT INTO node_name_id SELECT name, MAX(id) FROM main.node GROUP BY name")
+
+            edges_processed, edges_skipped = parser.db.execute(f"""
+                SELECT COUNT(*),
+                       COALESCE(SUM(EXISTS (SELECT 1 FROM existing_edge_name x
+                                            WHERE x.a_name = e.interactor_a_node_name AND x.b_name = e.interactor_b_node_name)
+                                    AND EXISTS (SELECT 1 FROM node_name_id WHERE name = e.interactor_a_node_name)
+                                    AND EXISTS (SELECT 1 FROM node_name_id WHERE name = e.interactor_b_node_name)), 0)
+                FROM arn.edge e
+                WHERE e.{ARN_EDGE_FILTER}
+            """).fetchone()
+
+            edges_before = _edge_count(parser)
+            parser.db.execute(f"""
+                INSERT INTO main.edge (interactor_a_node_id, interactor_b_node_id, interactor_a_node_name,
+                                                 interactor_b_node_name, layer, interaction_types, effect_on_ferroptosis, source_db)
+                SELECT a.id, b.id, e.interactor_a_node_name, e.interactor_b_node_name, e.layer,
+                       COALESCE(e.interaction_types, ''), '', 'ARN'
+                FROM arn.edge e
+                JOIN node_name_id a ON a.name = e.interactor_a_node_name
+                JOIN node_name_id b ON b.name = e.interactor_b_node_name
+                WHERE e.{ARN_EDGE_FILTER}
+                AND NOT EXISTS (SELECT 1 FROM existing_edge_name x
+                                WHERE x.a_name = e.interactor_a_node_name AND x.b_name = e.interactor_b_node_name)
+                ORDER BY e.rowid
+                {_edge_conflict_clause(parser)}
+            """)
+            edges_added = _edge_count(parser) - edges_before
+
+            parser.db.execute("DROP TABLE temp.existing_edge_name")
+            parser.db.execute("DROP TABLE temp.node_name_id")
+    finally:
+        parser.db.execute("DETACH DATABASE arn")
+
+    parser.invalidate_node_index()
+    return nodes_added, edges_processed, edges_skipped, edges_added
+
+
+def _merge_arn_rows(parser, arn_db_path):
+    """Merge the ARN database row by row from Python.
+
+    Returns (nodes added, edges processed, edges skipped, edges added).
+    """
     # Build existing node lookup
     parser.cursor.execute("SELECT id, name FROM node")
     existing_nodes = {name: node_id for node_id, name in parser.cursor.fetchall()}
@@ -46,7 +160,7 @@ def merge_arn():
         existing_edges.add((a, b))
     print(f"Existing edges: {len(existing_edges)}")
 
-    arn_db = sqlite3.connect(ARN_DB)
+    arn_db = sqlite3.connect(arn_db_path)
     arn_cursor = arn_db.cursor()
 
     # Process ARN nodes
@@ -54,13 +168,9 @@ def merge_arn():
     arn_nodes = arn_cursor.fetchall()
 
     nodes_to_insert = []
-    name_mapping = {}
 
     for name, display_name, tax_id, node_type in arn_nodes:
-        if name in existing_nodes:
-            name_mapping[name] = name
-        else:
-            name_mapping[name] = name
+        if name not in existing_nodes:
             nodes_to_insert.append((
                 name,
                 'uniprot_id',
@@ -79,19 +189,19 @@ def merge_arn():
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, nodes_to_insert)
         parser.db.commit()
-
-    print(f"ARN nodes: {len(nodes_to_insert)} added")
+        parser.invalidate_node_index()
 
     # Rebuild node lookup after inserts
     parser.cursor.execute("SELECT id, name FROM node")
     all_nodes = {name: node_id for node_id, name in parser.cursor.fetchall()}
 
     # Process ARN edges in batches, only directed edges
-    arn_cursor.execute("SELECT interactor_a_node_name, interactor_b_node_name, layer, interaction_types FROM edge WHERE interaction_types LIKE 'True|true%'")
+    arn_cursor.execute(f"SELECT interactor_a_node_name, interactor_b_node_name, layer, interaction_types FROM edge WHERE {ARN_EDGE_FILTER}")
 
     edges_to_insert = []
     edges_processed = 0
     edges_skipped = 0
+    edges_added = 0
     batch_size = 10000
 
     for source_name, target_name, layer, interaction_types in arn_cursor:
@@ -119,26 +229,23 @@ def merge_arn():
         ))
 
         if len(edges_to_insert) >= batch_size:
-            parser.cursor.executemany("""
-                INSERT INTO edge (interactor_a_node_id, interactor_b_node_id, interactor_a_node_name, interactor_b_node_name, layer, interaction_types, effect_on_ferroptosis, source_db)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, edges_to_insert)
-            parser.db.commit()
+            edges_added += _insert_arn_edges(parser, edges_to_insert)
             print(f"Inserted batch of {len(edges_to_insert)} edges")
             edges_to_insert = []
 
     if edges_to_insert:
-        parser.cursor.executemany("""
-            INSERT INTO edge (interactor_a_node_id, interactor_b_node_id, interactor_a_node_name, interactor_b_node_name, layer, interaction_types, effect_on_ferroptosis, source_db)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, edges_to_insert)
-        parser.db.commit()
+        edges_added += _insert_arn_edges(parser, edges_to_insert)
 
     arn_db.close()
+    return len(nodes_to_insert), edges_processed, edges_skipped, edges_added
 
-    print(f"Total ARN edges processed: {edges_processed}")
-    print(f"Edges skipped (already in ferroptosis network): {edges_skipped}")
-    print(f"New ARN edges added: {len(edges_to_insert) + (edges_processed // batch_size) * batch_size - edges_skipped}")
 
-    parser.save_db_to_file(str(OUTPUT_DB))
-    print(f"Final merge complete: {OUTPUT_DB}")
+def _insert_arn_edges(parser, edges):
+    edges_before = _edge_count(parser)
+    parser.cursor.executemany(f"""
+        INSERT INTO edge (interactor_a_node_id, interactor_b_node_id, interactor_a_node_name, interactor_b_node_name, layer, interaction_types, effect_on_ferroptosis, source_db)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        {_edge_conflict_clause(parser)}
+    """, edges)
+    parser.db.commit()
+    return _edge_count(parser) - edges_before
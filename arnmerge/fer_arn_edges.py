@@ -1,17 +1,63 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from config import OUTPUTS_DIR, SOURCES_DIR, PROJECT_ROOT
+from config import OUTPUTS_DIR, PROJECT_ROOT
 from database.sqlite_db_api3 import PsimiSQL
+from datawrangling.adjacency import expand_layers
+from datawrangling.omnipath_store import OMNIPATH_FILE, load_omnipath
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+CROSS_LAYERS = ('cross_0', 'cross_1', 'cross_other')
+
+
+def classify_cross_edges(omnipath_df, ferroptosis_proteins, arn_proteins, layer0_proteins, layer1_proteins,
+                         existing_edges=()):
+    """Select the OmniPath interactions linking a ferroptosis and an ARN protein.
+
+    The layer is cross_0 or cross_1 when the ferroptosis end is a layer 0 or
+    layer 1 protein, cross_other otherwise. Interactions whose (source,
+    target) pair is in existing_edges are left out. Returns the matching rows
+    as a frame of source, target, layer and interaction_types.
+    """
+    source = omnipath_df['source']
+    target = omnipath_df['target']
+    source_in_ferro = source.isin(ferroptosis_proteins).to_numpy()
+    target_in_ferro = target.isin(ferroptosis_proteins).to_numpy()
+    source_in_arn = source.isin(arn_proteins).to_numpy()
+    target_in_arn = target.isin(arn_proteins).to_numpy()
+
+    is_cross = (source_in_ferro & target_in_arn) | (source_in_arn & target_in_ferro)
+    if existing_edges:
+        is_cross &= ~pd.MultiIndex.from_arrays([source, target]).isin(list(existing_edges))
+
+    cross_edges = pd.DataFrame({
+        'source': source.to_numpy(object)[is_cross],
+        'target': target.to_numpy(object)[is_cross],
+    })
+
+    # the ferroptosis protein involved decides the layer
+    ferro_protein = pd.Series(np.where(source_in_ferro[is_cross], cross_edges['source'], cross_edges['target']))
+    cross_edges['layer'] = np.select(
+        [ferro_protein.isin(layer0_proteins), ferro_protein.isin(layer1_proteins)],
+        ['cross_0', 'cross_1'], default='cross_other')
+
+    interaction_types = pd.Series('is_directed:true|is_direct:true', index=cross_edges.index)
+    if 'sources' in omnipath_df:
+        sources = pd.Series(omnipath_df['sources'].to_numpy(object)[is_cross])
+        has_sources = sources.notna()
+        interaction_types[has_sources] += '|sources:' + sources[has_sources].astype(str)
+    cross_edges['interaction_types'] = interaction_types
+    return cross_edges
+
+
 def extend_arn_ferr_with_cross_edges():
     arn_ferr_db_path = OUTPUTS_DIR / "ferroptosis_autophagy.db"
     output_db_path = OUTPUTS_DIR / "final.db"
-    omnipath_file = SOURCES_DIR / "omnipath" / "omnipath_interactions.txt"
+    omnipath_file = OMNIPATH_FILE
 
     logger.info(f"Loading existing database: {arn_ferr_db_path}")
     sql_seed = PROJECT_ROOT / "database" / "network_db_seed3.sql"
@@ -19,7 +65,7 @@ def extend_arn_ferr_with_cross_edges():
     db_api.import_from_db_file(str(arn_ferr_db_path))
 
     logger.info(f"Loading OmniPath interactions: {omnipath_file}")
-    omnipath_df = pd.read_csv(omnipath_file, delimiter='\t')
+    omnipath_df = load_omnipath(omnipath_file).frame(sources=True)
     omnipath_df = omnipath_df[omnipath_df['is_directed'] == 1]
     logger.info(f"Found {len(omnipath_df)} directed OmniPath interactions")
 
@@ -41,42 +87,31 @@ def extend_arn_ferr_with_cross_edges():
     kegg_proteins = set()
     db_api.cursor.execute("""
         SELECT DISTINCT n.name
-        FROM node n
-        WHERE n.source_db LIKE '%KEGG%'
+        FROM node_source ns
+        JOIN node n ON n.id = ns.node_id
+        WHERE ns.source_db = 'KEGG'
         AND n.primary_id_type = 'uniprot_id'
     """)
     for name, in db_api.cursor.fetchall():
         kegg_proteins.add(name)
     logger.info(f"KEGG core proteins: {len(kegg_proteins)}")
 
-    # Build ferroptosis layer 0 edges and proteins
-    layer0_proteins = set(kegg_proteins)
+    # Ferroptosis layers: layer 0 is KEGG plus its direct targets, layer 1 the targets of
+    # layer 0, following non-ARN edges that point at UniProt nodes
     db_api.cursor.execute("""
-        SELECT DISTINCT e.interactor_b_node_name
+        SELECT e.interactor_a_node_name, e.interactor_b_node_name
         FROM edge e
-        JOIN node n ON e.interactor_b_node_name = n.name
-        WHERE e.interactor_a_node_name IN ({})
-        AND n.primary_id_type = 'uniprot_id'
-        AND e.source_db NOT LIKE '%ARN%'
-    """.format(','.join(['?' for _ in kegg_proteins])), list(kegg_proteins))
-    for name, in db_api.cursor.fetchall():
-        layer0_proteins.add(name)
-
-    # Build ferroptosis layer 1 proteins
-    layer1_proteins = set()
-    if layer0_proteins:
-        db_api.cursor.execute("""
-            SELECT DISTINCT e.interactor_b_node_name
-            FROM edge e
-            JOIN node n ON e.interactor_b_node_name = n.name
-            WHERE e.interactor_a_node_name IN ({})
-            AND e.interactor_b_node_name NOT IN ({})
-            AND n.primary_id_type = 'uniprot_id'
-            AND e.source_db NOT LIKE '%ARN%'
-        """.format(','.join(['?' for _ in layer0_proteins]), ','.join(['?' for _ in layer0_proteins])),
-           list(layer0_proteins) + list(layer0_proteins))
-        for name, in db_api.cursor.fetchall():
-            layer1_proteins.add(name)
+        WHERE NOT EXISTS (SELECT 1 FROM edge_attribute ea
+                          WHERE ea.edge_id = e.id AND ea.key = 'source_db' AND ea.value = 'ARN')
+    """)
+    ferroptosis_edges = db_api.cursor.fetchall()
+    db_api.cursor.execute("SELECT name FROM node WHERE primary_id_type = 'uniprot_id'")
+    uniprot_names = [name for name, in db_api.cursor.fetchall()]
+
+    adjacency, levels = expand_layers([a for a, _ in ferroptosis_edges], [b for _, b in ferroptosis_edges],
+                                      kegg_proteins, 2, direction='out', allowed=uniprot_names)
+    layer0_proteins = kegg_proteins | adjacency.layer(levels, 1)
+    layer1_proteins = adjacency.layer(levels, 2)
 
     logger.info(f"Ferroptosis layer 0 proteins: {len(layer0_proteins)}")
     logger.info(f"Ferroptosis layer 1 proteins: {len(layer1_proteins)}")
@@ -84,10 +119,11 @@ def extend_arn_ferr_with_cross_edges():
     # Get all ARN proteins
     arn_proteins = set()
     db_api.cursor.execute("""
-        SELECT DISTINCT name
-        FROM node
-        WHERE source_db LIKE '%ARN%'
-        AND primary_id_type = 'uniprot_id'
+        SELECT DISTINCT n.name
+        FROM node_source ns
+        JOIN node n ON n.id = ns.node_id
+        WHERE ns.source_db = 'ARN'
+        AND n.primary_id_type = 'uniprot_id'
     """)
     for name, in db_api.cursor.fetchall():
         arn_proteins.add(name)
@@ -97,8 +133,8 @@ def extend_arn_ferr_with_cross_edges():
     ferroptosis_proteins = set()
     db_api.cursor.execute("""
         SELECT DISTINCT name
-        FROM node
-        WHERE source_db NOT LIKE '%ARN%'
+        FROM node n
+        WHERE NOT EXISTS (SELECT 1 FROM node_source ns WHERE ns.node_id = n.id AND ns.source_db = 'ARN')
         AND primary_id_type = 'uniprot_id'
     """)
     for name, in db_api.cursor.fetchall():
@@ -113,64 +149,35 @@ def extend_arn_ferr_with_cross_edges():
 
     # Process cross-network edges from OmniPath
     logger.info("Processing cross-network edges...")
-    cross_edges_added = 0
-    layer_counts = {'cross_0': 0, 'cross_1': 0, 'cross_other': 0}
-
-    for _, interaction in omnipath_df.iterrows():
-        source_id = interaction['source']
-        target_id = interaction['target']
-
-        # Check if this is a cross-network edge
-        source_in_ferro = source_id in ferroptosis_proteins
-        target_in_ferro = target_id in ferroptosis_proteins
-        source_in_arn = source_id in arn_proteins
-        target_in_arn = target_id in arn_proteins
-
-        is_cross_network = (source_in_ferro and target_in_arn) or (source_in_arn and target_in_ferro)
-
-        if not is_cross_network:
-            continue
-
-        if (source_id, target_id) in existing_edges:
-            continue
-
-        source_dict = db_api.get_node_by_any_identifier(source_id)
-        target_dict = db_api.get_node_by_any_identifier(target_id)
-
-        if not source_dict or not target_dict:
-            continue
-
-        # Determine cross-network layer based on ferroptosis protein involved
-        ferro_protein = source_id if source_in_ferro else target_id
-
-        if ferro_protein in layer0_proteins:
-            layer = 'cross_0'
-            layer_counts['cross_0'] += 1
-        elif ferro_protein in layer1_proteins:
-            layer = 'cross_1'
-            layer_counts['cross_1'] += 1
-        else:
-            layer = 'cross_other'
-            layer_counts['cross_other'] += 1
-
-        # Only add cross_0 and cross_1 edges as requested
-        if layer in ['cross_0', 'cross_1']:
-            interaction_types = ["is_directed:true", "is_direct:true"]
-            if 'sources' in interaction and pd.notna(interaction['sources']):
-                interaction_types.append(f"sources:{interaction['sources']}")
-
-            edge_dict = {
-                'source_db': 'omnipath_cross',
-                'interaction_types': '|'.join(interaction_types),
-                'layer': layer,
-                'effect_on_ferroptosis': ''
-            }
-
-            db_api.insert_edge(source_dict, target_dict, edge_dict)
-            cross_edges_added += 1
-            existing_edges.add((source_id, target_id))
-
-    logger.info(f"Added {cross_edges_added} cross-network edges")
+    cross_edges = classify_cross_edges(omnipath_df, ferroptosis_proteins, arn_proteins,
+                                       layer0_proteins, layer1_proteins, existing_edges)
+
+    # one identifier lookup per distinct protein; rows with an unresolved end are dropped
+    node_lookup = db_api.resolve_many(pd.unique(cross_edges[['source', 'target']].values.ravel()))
+    source_dicts = cross_edges['source'].map(node_lookup)
+    target_dicts = cross_edges['target'].map(node_lookup)
+    cross_edges = cross_edges[source_dicts.notna().to_numpy() & target_dicts.notna().to_numpy()]
+
+    layer_counts = {layer: int((cross_edges['layer'] == layer).sum()) for layer in CROSS_LAYERS}
+
+    # Only add cross_0 and cross_1 edges as requested, once per interaction pair
+    cross_edges = cross_edges[cross_edges['layer'] != 'cross_other']
+    cross_edges = cross_edges[~cross_edges.duplicated(['source', 'target'])]
+    for layer in ('cross_0', 'cross_1'):
+        layer_counts[layer] = int((cross_edges['layer'] == layer).sum())
+
+    db_api.insert_edges([
+        (node_lookup[source_id], node_lookup[target_id], {
+            'source_db': 'omnipath_cross',
+            'interaction_types': interaction_types,
+            'layer': layer,
+            'effect_on_ferroptosis': ''
+        })
+        for source_id, target_id, layer, interaction_types in zip(
+            cross_edges['source'], cross_edges['target'], cross_edges['layer'], cross_edges['interaction_types'])
+    ])
+
+    logger.info(f"Added {len(cross_edges)} cross-network edges")
     logger.info(f"Cross-network distribution: {layer_counts}")
 
     # Final summary
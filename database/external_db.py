@@ -2,14 +2,29 @@ import pandas as pd
 from config import SOURCES_DIR, OUTPUTS_DIR
 import sqlite3
 from typing import List, Union, Optional, Any
+from database.temp_table import TempIdSet
 
 
 class DBconnector:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._connection = None
 
     def _get_connection(self):
-        return sqlite3.connect(self.db_path)
+        # one connection per connector, so TEMP tables outlive a single query
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.db_path)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def temp_ids(self, values, name: Optional[str] = None) -> TempIdSet:
+        """Load ids into a TEMP table that the following queries can join against."""
+        with self._get_connection() as conn:
+            return TempIdSet(conn, values, name)
 
     def get_table_names(self):
         with self._get_connection() as conn:
@@ -29,10 +44,9 @@ class DBconnector:
               values: Optional[List] = None) -> List:
         with self._get_connection() as conn:
             if values is not None and where is not None:
-                placeholders = ",".join("?" * len(values))
-                query = f'SELECT {what} FROM {table} WHERE {where} IN ({placeholders})'
-                cursor = conn.cursor()
-                res = cursor.execute(query, values).fetchall()
+                with TempIdSet(conn, values) as ids:
+                    query = f'SELECT {what} FROM {table} WHERE {where} IN {ids.table}'
+                    res = conn.execute(query).fetchall()
             else:
                 query = f'SELECT {what} FROM {table}'
                 cursor = conn.cursor()
@@ -49,9 +63,9 @@ class DBconnector:
             else:
                 return res
 
-    def query_to_dataframe(self, query: str) -> pd.DataFrame:
+    def query_to_dataframe(self, query: str, params: Optional[Any] = None) -> pd.DataFrame:
         with self._get_connection() as conn:
-            return pd.read_sql_query(query, conn)
+            return pd.read_sql_query(query, conn, params=params)
 
     @staticmethod
     def compile_query_string(columns: str, table: str,
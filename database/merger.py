@@ -1,41 +1,147 @@
-
-import sqlite3
-import os
+import json
+from collections import Counter
 from pathlib import Path
 from config import OUTPUTS_DIR, PROJECT_ROOT
 from database.sqlite_db_api3 import PsimiSQL
+from database.resolver import EntityResolver
+from database.source_reader import read_source_dbs, rows, row_fingerprint
+from datawrangling.array_store import file_digest
+from database.multivalue import merge_values
+from database.temp_table import TempIdSet
 
+# Node names and identifiers of any type are matched against each other.
+RESOLVE_TYPED = False
+# Merged groups above this size are reported as likely false merges.
+HAIRBALL_SIZE = 50
 
-def merge_strings(string_1, string_2, separator="|"):
-    if not string_1 and not string_2:
-        return ""
-    if not string_1:
-        return string_2
-    if not string_2:
-        return string_1
-
-    list_1 = [item for item in string_1.split(separator) if item and item != '-']
-    list_2 = [item for item in string_2.split(separator) if item and item != '-']
 
-    merged = list(set(list_1 + list_2))
-    return separator.join(merged)
+MULTI_VALUE_NODE_FIELDS = ("pathways", "role_in_ferroptosis", "function", "source_db")
 
 
 def get_union_of_nodes(node_1, node_2):
-    return {
+    """Union of two nodes; multi-valued fields may come back as MultiValue, see serialize_node."""
+    merged_node = {
         "name": node_1["name"],
         "primary_id_type": node_1["primary_id_type"],
         "display_name": node_1["display_name"],
         "tax_id": node_1["tax_id"],
-        "type": node_1["type"],
-        "pathways": merge_strings(node_1["pathways"], node_2["pathways"]),
-        "role_in_ferroptosis": merge_strings(node_1["role_in_ferroptosis"], node_2["role_in_ferroptosis"]),
-        "function": merge_strings(node_1["function"], node_2["function"]),
-        "source_db": merge_strings(node_1["source_db"], node_2["source_db"])
+        "type": node_1["type"]
     }
+    for field in MULTI_VALUE_NODE_FIELDS:
+        merged_node[field] = merge_values(node_1[field], node_2[field])
+    return merged_node
+
 
+def serialize_node(node):
+    for field in MULTI_VALUE_NODE_FIELDS:
+        node[field] = str(node[field])
+    return node
 
-def merger_sources():
+
+def edge_payload(edge_dict):
+    """The part of a source edge row that is merged, and fingerprinted in merge_row."""
+    return {
+        'interactor_a_node_name': edge_dict['interactor_a_node_name'],
+        'interactor_b_node_name': edge_dict['interactor_b_node_name'],
+        'interaction_types': edge_dict['interaction_types'] or "",
+        'effect_on_ferroptosis': edge_dict.get('effect_on_ferroptosis', '') or "",
+        'source_db': edge_dict['source_db'] or "",
+        'layer': edge_dict['layer']
+    }
+
+
+def source_rows(source):
+    """Node, edge and disease payloads of a source read by read_source_dbs, in table order."""
+    node_identifiers = {}
+    for node_db_id, id_type, is_primary, id_value in zip(*(source['node_identifier'].get(column, [])
+                                                         for column in ('node_id', 'id_type', 'is_primary', 'id_value'))):
+        node_identifiers.setdefault(node_db_id, {})[id_type] = {
+            'value': id_value,
+            'is_primary': is_primary
+        }
+
+    payloads = {'node': [], 'edge': [], 'disease': []}
+    for node_dict in rows(source['node']):
+        payloads['node'].append({
+            "name": node_dict['name'],
+            "primary_id_type": node_dict['primary_id_type'],
+            "display_name": node_dict['display_name'],
+            "tax_id": node_dict['tax_id'],
+            "type": node_dict['type'],
+            "pathways": node_dict['pathways'] or "",
+            "role_in_ferroptosis": node_dict.get('role_in_ferroptosis', '') or "",
+            "function": node_dict['function'] or "",
+            "source_db": node_dict.get('source_db', '') or "",
+            "identifiers": node_identifiers.get(node_dict['id'], {})
+        })
+
+    for edge_dict in rows(source['edge']):
+        payloads['edge'].append(edge_payload(edge_dict))
+
+    for disease_id, disease_name, description in zip(*(source['disease'].get(column, [])
+                                                       for column in ('disease_id', 'disease_name', 'description'))):
+        payloads['disease'].append({
+            'disease_id': disease_id,
+            'disease_name': disease_name or "",
+            'description': description or ""
+        })
+
+    return payloads
+
+
+def _load_merge_rows(parser, source_name):
+    """Rows recorded for a source at the previous merge, per kind and in source order."""
+    recorded = {'node': [], 'edge': [], 'disease': []}
+    parser.cursor.execute("""
+        SELECT rowid, kind, fingerprint, payload, merged_id FROM merge_row
+        WHERE source = ? ORDER BY rowid
+    """, (source_name,))
+    for rowid, kind, fingerprint, payload, merged_id in parser.cursor.fetchall():
+        recorded[kind].append({
+            'rowid': rowid,
+            'source': source_name,
+            'fingerprint': fingerprint,
+            'payload': json.loads(payload),
+            'merged_id': merged_id,
+            'recorded_id': merged_id
+        })
+    return recorded
+
+
+def _diff_merge_rows(source_name, recorded, payloads):
+    """Match the current rows of a source against the recorded ones by fingerprint.
+
+    Returns (current rows, removed rows). Unchanged rows keep their merged_id,
+    added rows have none.
+    """
+    recorded_by_fingerprint = {}
+    for row in recorded:
+        recorded_by_fingerprint.setdefault(row['fingerprint'], []).append(row)
+
+    current = []
+    for payload in payloads:
+        fingerprint, _ = row_fingerprint(payload)
+        matches = recorded_by_fingerprint.get(fingerprint)
+        if matches:
+            row = matches.pop(0)
+        else:
+            row = {'rowid': None, 'merged_id': None}
+        row.update(source=source_name, fingerprint=fingerprint, payload=payload)
+        current.append(row)
+
+    removed = [row for matches in recorded_by_fingerprint.values() for row in matches]
+    return current, removed
+
+
+def merger_sources(incremental=True):
+    """Merge the source databases into merged_ferroptosis_network.db.
+
+    The merged database records a content hash per source and a fingerprint
+    per source row. On a rerun only sources whose hash changed are read, and
+    only the node groups and edges touched by their added or removed rows
+    are rewritten. incremental=False, or a merged database without this
+    record, rebuilds it from scratch.
+    """
     SQL_SEED = PROJECT_ROOT / "database" / "network_db_seed3.sql"
     OUTPUT_DB = OUTPUTS_DIR / "merged_ferroptosis_network.db"
 
@@ -44,133 +150,73 @@ def merger_sources():
         OUTPUTS_DIR / "ferrdb_network.db",
         OUTPUTS_DIR / "ferreg_network.db"
     ]
+    input_dbs = [Path(db_file) for db_file in input_dbs if Path(db_file).exists()]
+    content_hashes = {db_file.name: file_digest(db_file) for db_file in input_dbs}
 
-    # Collect all nodes and identifiers
-    all_nodes = []
-    all_identifiers = {}
-    diseases = {}
-    collected_edges_directed = {}
-    collected_edges_undirected = {}
-
-    for db_file in input_dbs:
-        if not os.path.exists(db_file):
+    parser = PsimiSQL(SQL_SEED)
+    if incremental and OUTPUT_DB.exists():
+        parser.import_from_db_file(str(OUTPUT_DB))
+        parser.cursor.execute("SELECT source, content_hash FROM merge_source")
+        recorded_hashes = dict(parser.cursor.fetchall())
+        if not recorded_hashes:
+            print("Merged database has no merge record, rebuilding")
+            parser.db.close()
+            parser = PsimiSQL(SQL_SEED)
+    else:
+        recorded_hashes = {}
+
+    changed_sources = [name for name, content_hash in content_hashes.items() if recorded_hashes.get(name) != content_hash]
+    removed_sources = [name for name in recorded_hashes if name not in content_hashes]
+    if not changed_sources and not removed_sources:
+        print("Merged database is up to date")
+        parser.db.close()
+        return
+
+    sources = {Path(source['path']).name: source
+               for source in read_source_dbs([db_file for db_file in input_dbs if db_file.name in changed_sources])}
+
+    # Current rows of every source, in input order; rows of unchanged sources come from the record
+    current = {'node': [], 'edge': [], 'disease': []}
+    removed = {'node': [], 'edge': [], 'disease': []}
+    for source_name in [db_file.name for db_file in input_dbs] + removed_sources:
+        recorded = _load_merge_rows(parser, source_name)
+        if source_name in removed_sources:
+            for kind in removed:
+                removed[kind].extend(recorded[kind])
+            continue
+        if source_name not in sources:
+            for kind in current:
+                current[kind].extend(recorded[kind])
             continue
 
-        print(f"Reading: {db_file}")
-        db = sqlite3.connect(db_file)
-        cursor = db.cursor()
-
-        # Get all columns for node table
-        cursor.execute("PRAGMA table_info(node)")
-        node_columns = [col[1] for col in cursor.fetchall()]
-
-        # Read nodes
-        cursor.execute("SELECT * FROM node")
-        db_nodes = cursor.fetchall()
-
-        # Read node identifiers if table exists
-        node_identifiers = {}
-        try:
-            cursor.execute("SELECT * FROM node_identifier")
-            for row in cursor.fetchall():
-                node_db_id, id_type, is_primary, id_value = row
-                if node_db_id not in node_identifiers:
-                    node_identifiers[node_db_id] = {}
-                node_identifiers[node_db_id][id_type] = {
-                    'value': id_value,
-                    'is_primary': is_primary
-                }
-        except:
-            pass
-
-        # Process each node
-        for node_row in db_nodes:
-            # Map row to columns
-            node_dict = {}
-            for i, col in enumerate(node_columns):
-                node_dict[col] = node_row[i]
-
-            node_data = {
-                "name": node_dict['name'],
-                "primary_id_type": node_dict['primary_id_type'],
-                "display_name": node_dict['display_name'],
-                "tax_id": node_dict['tax_id'],
-                "type": node_dict['type'],
-                "pathways": node_dict['pathways'] or "",
-                "role_in_ferroptosis": node_dict.get('role_in_ferroptosis', '') or "",
-                "function": node_dict['function'] or "",
-                "source_db": node_dict.get('source_db', '') or "",
-                "identifiers": node_identifiers.get(node_dict['id'], {})
-            }
-
-            node_index = len(all_nodes)
-            all_nodes.append(node_data)
-            if str(db_file).endswith('kegg.db'):
-                print(f"KEGG node collected: {node_data['name']} - {node_data['type']}")
-
-            # Map all identifiers
-            all_ids = [node_data["name"]]
-            for id_info in node_data["identifiers"].values():
-                if id_info["value"]:
-                    all_ids.append(id_info["value"])
-
-            for identifier in all_ids:
-                if identifier not in all_identifiers:
-                    all_identifiers[identifier] = []
-                all_identifiers[identifier].append(node_index)
-
-        # Read diseases if table exists
-        try:
-            cursor.execute("SELECT * FROM disease")
-            for row in cursor.fetchall():
-                disease_id, disease_name, description = row[1], row[2], row[3]
-                if disease_id not in diseases:
-                    diseases[disease_id] = {
-                        'disease_id': disease_id,
-                        'disease_name': disease_name or "",
-                        'description': description or ""
-                    }
-                else:
-                    diseases[disease_id]['description'] = merge_strings(
-                        diseases[disease_id]['description'],
-                        description or ""
-                    )
-        except:
-            pass
-
-        db.close()
+        print(f"Reading: {sources[source_name]['path']}")
+        payloads = source_rows(sources[source_name])
+        for kind in current:
+            source_current, source_removed = _diff_merge_rows(source_name, recorded[kind], payloads[kind])
+            current[kind].extend(source_current)
+            removed[kind].extend(source_removed)
+            added_count = sum(1 for row in source_current if row['rowid'] is None)
+            print(f"  {kind}: {added_count} added, {len(source_removed)} removed")
 
+    all_nodes = [row['payload'] for row in current['node']]
     print(f"Total nodes collected: {len(all_nodes)}")
 
-    # Find connected components
-    visited = set()
-    node_groups = []
-
-    def dfs(node_idx, group):
-        if node_idx in visited:
-            return
-        visited.add(node_idx)
-        group.append(node_idx)
-
-        node = all_nodes[node_idx]
-        all_ids = [node["name"]]
-        for id_info in node["identifiers"].values():
-            if id_info["value"]:
-                all_ids.append(id_info["value"])
-
-        for identifier in all_ids:
-            if identifier in all_identifiers:
-                for related_idx in all_identifiers[identifier]:
-                    if related_idx not in visited:
-                        dfs(related_idx, group)
-
-    for i in range(len(all_nodes)):
-        if i not in visited:
-            group = []
-            dfs(i, group)
-            node_groups.append(group)
+    for row in current['node']:
+        if row['source'] == 'kegg.db' and row['rowid'] is None:
+            print(f"KEGG node collected: {row['payload']['name']} - {row['payload']['type']}")
+
+    # Find connected components; nodes of earlier input databases come first in a group, then the smallest name
+    source_priority = {db_file.name: priority for priority, db_file in enumerate(input_dbs)}
+    resolver = EntityResolver(typed=RESOLVE_TYPED)
+    for row in current['node']:
+        node_data = row['payload']
+        resolver.add({id_type: id_info["value"] for id_type, id_info in node_data["identifiers"].items()},
+                     name=node_data["name"], priority=source_priority[row['source']])
+    node_groups = resolver.components()
 
     print(f"Unique nodes after deduplication: {len(node_groups)}")
+    for group, shared_keys in resolver.hairballs(HAIRBALL_SIZE):
+        print(f"WARNING: {len(group)} nodes merged into {all_nodes[group[0]]['name']}, most shared identifiers: {shared_keys}")
     for group_idx, group in enumerate(node_groups):
         for node_idx in group:
             node = all_nodes[node_idx]
@@ -181,12 +227,37 @@ def merger_sources():
 #                    print(f"  - {all_nodes[idx]['name']} from {all_nodes[idx]['db_file']}")
                     print(f"  - {all_nodes[idx]['name']} from {all_nodes[idx]['source_db']}")
                 break
-    # Merge nodes
+
+    # A group is unchanged when it is exactly the member set of one previously merged node
+    previous_group_sizes = Counter(row['merged_id'] for row in current['node'] + removed['node']
+                                   if row['merged_id'] is not None)
+    stale_node_ids = {row['merged_id'] for row in removed['node'] if row['merged_id'] is not None}
+    changed_groups = []
     nodes = {}
-    node_identifiers = {}
     name_mapping = {}
 
     for group in node_groups:
+        merged_ids = {current['node'][idx]['merged_id'] for idx in group}
+        canonical_name = all_nodes[group[0]]["name"]
+        if len(merged_ids) == 1 and None not in merged_ids and previous_group_sizes[next(iter(merged_ids))] == len(group):
+            nodes[canonical_name] = {'id': next(iter(merged_ids)), 'name': canonical_name}
+        else:
+            changed_groups.append(group)
+            stale_node_ids.update(merged_id for merged_id in merged_ids if merged_id is not None)
+
+        # Map all names to canonical
+        for idx in group:
+            node = all_nodes[idx]
+            name_mapping[node["name"]] = canonical_name
+            for id_info in node["identifiers"].values():
+                if id_info["value"]:
+                    name_mapping[id_info["value"]] = canonical_name
+
+    # Merge nodes
+    merged_nodes = {}
+    node_identifiers = {}
+
+    for group in changed_groups:
         base_node = all_nodes[group[0]]
         merged_node = dict(base_node)
         merged_identifiers = dict(base_node["identifiers"])
@@ -200,110 +271,114 @@ def merger_sources():
                     merged_identifiers[id_type] = id_info
 
         canonical_name = base_node["name"]
-        nodes[canonical_name] = merged_node
+        merged_nodes[canonical_name] = serialize_node(merged_node)
         node_identifiers[canonical_name] = merged_identifiers
 
-        # Map all names to canonical
+    # Edges touching a rewritten node group, or built from a removed row, are rebuilt from their rows
+    stale_edge_ids = {row['merged_id'] for row in removed['edge'] if row['merged_id'] is not None}
+    if stale_node_ids:
+        with TempIdSet(parser.db, stale_node_ids) as stale_nodes:
+            parser.cursor.execute(f"""
+                SELECT id FROM edge
+                WHERE interactor_a_node_id IN {stale_nodes.table} OR interactor_b_node_id IN {stale_nodes.table}
+            """)
+            stale_edge_ids.update(edge_id for edge_id, in parser.cursor.fetchall())
+
+    with parser.db:
+        parser.cursor.executemany("DELETE FROM edge WHERE id = ?", [(edge_id,) for edge_id in stale_edge_ids])
+        parser.cursor.executemany("DELETE FROM node WHERE id = ?", [(node_id,) for node_id in stale_node_ids])
+    parser.invalidate_node_index()
+
+    parser.insert_nodes(merged_nodes.values())
+    nodes.update(merged_nodes)
+    for group in changed_groups:
         for idx in group:
-            node = all_nodes[idx]
-            name_mapping[node["name"]] = canonical_name
-            for id_info in node["identifiers"].values():
-                if id_info["value"]:
-                    name_mapping[id_info["value"]] = canonical_name
-
-    # Create database
-    parser = PsimiSQL(SQL_SEED)
-
-    for node in nodes.values():
-        parser.insert_unique_node(node)
-        nodes[node['name']]['id'] = parser.cursor.lastrowid
+            current['node'][idx]['merged_id'] = merged_nodes[all_nodes[group[0]]["name"]]['id']
+
+    parser.insert_identifiers(
+        (merged_nodes[node_name]['id'], id_type, id_data['value'], id_data['is_primary'])
+        for node_name, identifiers in node_identifiers.items()
+        if node_name in merged_nodes
+        for id_type, id_data in identifiers.items()
+    )
+
+    if removed['disease'] or any(row['rowid'] is None for row in current['disease']):
+        diseases = {}
+        for row in current['disease']:
+            disease_id, description = row['payload']['disease_id'], row['payload']['description']
+            if disease_id not in diseases:
+                diseases[disease_id] = dict(row['payload'])
+            else:
+                diseases[disease_id]['description'] = merge_values(
+                    diseases[disease_id]['description'],
+                    description
+                )
 
-    for node_name, identifiers in node_identifiers.items():
-        if node_name in nodes:
-            node_id = nodes[node_name]['id']
-            for id_type, id_data in identifiers.items():
-                parser.insert_node_identifier(node_id, id_type, id_data['value'], id_data['is_primary'])
+        with parser.db:
+            parser.cursor.execute("DELETE FROM disease")
+        for disease in diseases.values():
+            disease['description'] = str(disease['description'])
+            parser.insert_disease(disease)
 
-    for disease in diseases.values():
-        parser.insert_disease(disease)
-        diseases[disease['disease_id']]['id'] = parser.cursor.lastrowid
+        print(f"Inserted {len(diseases)} diseases")
 
-    print(f"Inserted {len(nodes)} nodes and {len(diseases)} diseases")
+    print(f"Inserted {len(merged_nodes)} nodes, kept {len(nodes) - len(merged_nodes)} nodes, removed {len(stale_node_ids)} stale nodes")
 
     # Process edges
-    all_edge_counter = 0
-    merged_edge_counter = 0
-
-    for db_file in input_dbs:
-        if not os.path.exists(db_file):
-            continue
-
-        print(f"Processing edges from: {db_file}")
-        db = sqlite3.connect(db_file)
-        cursor = db.cursor()
-
-        # Get edge table columns
-        cursor.execute("PRAGMA table_info(edge)")
-        edge_columns = [col[1] for col in cursor.fetchall()]
+    edge_rows = [row for row in current['edge'] if row['merged_id'] is None or row['merged_id'] in stale_edge_ids]
+    edges_to_upsert = []
+    upserted_rows = []
 
-        cursor.execute("SELECT * FROM edge")
+    for row in edge_rows:
+        row['merged_id'] = None
+        edge_dict = row['payload']
 
-        for row in cursor.fetchall():
-            all_edge_counter += 1
+        source_name = name_mapping.get(edge_dict['interactor_a_node_name'])
+        target_name = name_mapping.get(edge_dict['interactor_b_node_name'])
 
-            # Map row to columns
-            edge_dict = {}
-            for i, col in enumerate(edge_columns):
-                edge_dict[col] = row[i]
-
-            source_name = name_mapping.get(edge_dict['interactor_a_node_name'])
-            target_name = name_mapping.get(edge_dict['interactor_b_node_name'])
-
-            if not source_name or not target_name:
-                continue
+        if not source_name or not target_name:
+            continue
 
-            edge_key = f"{source_name}@{target_name}@{edge_dict['layer']}"
-            edge_key_reverse = f"{target_name}@{source_name}@{edge_dict['layer']}"
+        current_edge = {
+            'interaction_types': edge_dict['interaction_types'],
+            'effect_on_ferroptosis': edge_dict['effect_on_ferroptosis'],
+            'source_db': edge_dict['source_db'],
+            'layer': edge_dict['layer']
+        }
+        edges_to_upsert.append((nodes[source_name], nodes[target_name], current_edge))
+        upserted_rows.append(row)
 
-            current_edge = {
-                'interaction_types': edge_dict['interaction_types'] or "",
-                'effect_on_ferroptosis': edge_dict.get('effect_on_ferroptosis', '') or "",
-                'source_db': edge_dict['source_db'] or "",
-                'layer': edge_dict['layer']
-            }
+    # directed edges merge on (a, b, layer), undirected ones in either orientation
+    upserted_edge_ids = parser.upsert_edges(edges_to_upsert)
+    for row, edge_id in zip(upserted_rows, upserted_edge_ids):
+        row['merged_id'] = edge_id
 
-            directed = current_edge['interaction_types'] and 'is_directed:true' in current_edge['interaction_types'].split('|')
+    unique_edge_count = len(set(upserted_edge_ids))
+    print(f"Total edges read: {len(current['edge'])}")
+    print(f"Edges rewritten: {unique_edge_count}, removed: {len(stale_edge_ids)}")
+    print(f"Merged edges: {len(upserted_edge_ids) - unique_edge_count}")
 
-            if directed:
-                if edge_key not in collected_edges_directed:
-                    collected_edges_directed[edge_key] = current_edge
-                else:
-                    existing = collected_edges_directed[edge_key]
-                    existing['interaction_types'] = merge_strings(existing['interaction_types'], current_edge['interaction_types'])
-                    existing['effect_on_ferroptosis'] = merge_strings(existing['effect_on_ferroptosis'], current_edge['effect_on_ferroptosis'])
-                    existing['source_db'] = merge_strings(existing['source_db'], current_edge['source_db'])
-                    merged_edge_counter += 1
-            else:
-                if edge_key not in collected_edges_undirected and edge_key_reverse not in collected_edges_undirected:
-                    collected_edges_undirected[edge_key] = current_edge
-                else:
-                    existing_key = edge_key if edge_key in collected_edges_undirected else edge_key_reverse
-                    existing = collected_edges_undirected[existing_key]
-                    existing['interaction_types'] = merge_strings(existing['interaction_types'], current_edge['interaction_types'])
-                    existing['effect_on_ferroptosis'] = merge_strings(existing['effect_on_ferroptosis'], current_edge['effect_on_ferroptosis'])
-                    existing['source_db'] = merge_strings(existing['source_db'], current_edge['source_db'])
-                    merged_edge_counter += 1
-
-        db.close()
-
-    print(f"Total edges read: {all_edge_counter}")
-    print(f"Unique edges to write: {len(collected_edges_directed) + len(collected_edges_undirected)}")
-    print(f"Merged edges: {merged_edge_counter}")
-
-    # Insert edges
-    for edge_key, edge_data in {**collected_edges_undirected, **collected_edges_directed}.items():
-        node_a, node_b, layer = edge_key.split('@')
-        parser.insert_edge(nodes[node_a], nodes[node_b], edge_data)
+    _write_merge_record(parser, current, removed_sources, changed_sources, content_hashes)
 
     parser.save_db_to_file(str(OUTPUT_DB))
     print(f"Merge complete: {OUTPUT_DB}")
+
+
+def _write_merge_record(parser, current, removed_sources, changed_sources, content_hashes):
+    with parser.db:
+        for source_name in removed_sources + changed_sources:
+            parser.cursor.execute("DELETE FROM merge_row WHERE source = ?", (source_name,))
+            parser.cursor.execute("DELETE FROM merge_source WHERE source = ?", (source_name,))
+
+        for kind in ('node', 'edge', 'disease'):
+            parser.cursor.executemany("""
+                INSERT INTO merge_row (source, kind, fingerprint, payload, merged_id) VALUES (?, ?, ?, ?, ?)
+            """, [(row['source'], kind, row['fingerprint'], row_fingerprint(row['payload'])[1], row['merged_id'])
+                  for row in current[kind] if row['source'] in changed_sources])
+            parser.cursor.executemany("UPDATE merge_row SET merged_id = ? WHERE rowid = ?",
+                                      [(row['merged_id'], row['rowid'])
+                                       for row in current[kind]
+                                       if row['source'] not in changed_sources and row['merged_id'] != row['recorded_id']])
+
+        parser.cursor.executemany("INSERT INTO merge_source (source, content_hash) VALUES (?, ?)",
+                                  [(source_name, content_hashes[source_name]) for source_name in changed_sources])
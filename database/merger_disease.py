@@ -1,27 +1,55 @@
 import sqlite3
+from pathlib import Path
 from config import OUTPUTS_DIR
+from database.merger import edge_payload
+from database.sqlite_db_api3 import rebuild_disease_nodes
+from database.source_reader import read_source_dbs, rows, row_fingerprint
+
+
+DEFAULT_SOURCES = ("kegg.db", "ferrdb_network.db", "ferreg_network.db")
+METADATA_TABLES = ('edge', 'disease', 'disease_edge', 'experiment_model')
+
+
+def _table_exists(cursor, table):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
 
 
 def migrate_metadata():
-    source_db_path = OUTPUTS_DIR / "ferreg_network.db"
+    """Copy disease_edge and experiment_model rows of every merged source onto the merged edges.
+
+    Source edges are matched to merged edges through the fingerprints that
+    merger_sources recorded in merge_row, so the identifier remapping of the
+    merge is honoured. Without that record edges are matched by their
+    interactor names. The disease_node index is rebuilt afterwards.
+    """
     target_db_path = OUTPUTS_DIR / "merged_ferroptosis_network.db"
 
-    source = sqlite3.connect(source_db_path)
     target = sqlite3.connect(target_db_path)
-    src = source.cursor()
     tgt = target.cursor()
 
-    # Build edge mapping: old edge id -> (source_name, target_name) from source db
-    src.execute("SELECT id, interactor_a_node_name, interactor_b_node_name FROM edge")
-    old_edge_names = {}
-    for edge_id, a_name, b_name in src.fetchall():
-        old_edge_names[edge_id] = (a_name, b_name)
-
-    # Build disease mapping: old auto-increment id -> disease_id string from source db
-    src.execute("SELECT id, disease_id FROM disease")
-    old_disease_to_string = {}
-    for auto_id, disease_id in src.fetchall():
-        old_disease_to_string[auto_id] = disease_id
+    # the metadata is migrated from scratch on every run
+    tgt.execute("DELETE FROM disease_edge")
+    tgt.execute("DELETE FROM experiment_model")
+
+    # (source, edge fingerprint) -> merged edge id, as recorded by merger_sources
+    merged_edge_ids = {}
+    if _table_exists(tgt, 'merge_row'):
+        tgt.execute("SELECT source, fingerprint, merged_id FROM merge_row WHERE kind = 'edge' AND merged_id IS NOT NULL")
+        for source_name, fingerprint, merged_id in tgt.fetchall():
+            merged_edge_ids[(source_name, fingerprint)] = merged_id
+
+    source_names = DEFAULT_SOURCES
+    if _table_exists(tgt, 'merge_source'):
+        tgt.execute("SELECT source FROM merge_source ORDER BY source")
+        source_names = [name for name, in tgt.fetchall()] or DEFAULT_SOURCES
+
+    # fallback for merged databases without a merge record: (source name, target name) -> first edge id
+    name_pair_to_edge_id = {}
+    if not merged_edge_ids:
+        tgt.execute("SELECT id, interactor_a_node_name, interactor_b_node_name FROM edge ORDER BY id")
+        for edge_id, a_name, b_name in tgt.fetchall():
+            name_pair_to_edge_id.setdefault((a_name, b_name), edge_id)
 
     # Build disease string -> new auto-increment id from target db
     tgt.execute("SELECT id, disease_id FROM disease")
@@ -29,79 +57,70 @@ def migrate_metadata():
     for auto_id, disease_id in tgt.fetchall():
         disease_string_to_new_id[disease_id] = auto_id
 
-    # Find new edge id by matching source/target names in target db
-    def find_new_edge_id(a_name, b_name):
-        tgt.execute(
-            "SELECT id FROM edge WHERE interactor_a_node_name = ? AND interactor_b_node_name = ?",
-            (a_name, b_name)
-        )
-        row = tgt.fetchone()
-        if row:
-            return row[0]
-        return None
-
-    # Migrate disease_edge
-    src.execute("SELECT disease_id, edge_id, reference, source_db FROM disease_edge")
-    disease_edge_rows = src.fetchall()
-
-    disease_edge_count = 0
+    disease_edge_rows = []
     disease_edge_pairs = set()
-
-    for old_disease_auto_id, old_edge_id, reference, source_db in disease_edge_rows:
-        a_name, b_name = old_edge_names.get(old_edge_id, (None, None))
-        if not a_name or not b_name:
-            continue
-
-        new_edge_id = find_new_edge_id(a_name, b_name)
-        if not new_edge_id:
-            continue
-
-        disease_string = old_disease_to_string.get(old_disease_auto_id)
-        if not disease_string:
-            continue
-
-        new_disease_id = disease_string_to_new_id.get(disease_string)
-        if not new_disease_id:
-            continue
-
-        pair = (new_disease_id, new_edge_id)
-        if pair in disease_edge_pairs:
-            continue
-        disease_edge_pairs.add(pair)
-
-        tgt.execute(
-            "INSERT INTO disease_edge (disease_id, edge_id, reference, source_db) VALUES (?, ?, ?, ?)",
-            (new_disease_id, new_edge_id, reference or '', source_db or '')
-        )
-        disease_edge_count += 1
-
-    target.commit()
-    print(f"Inserted {disease_edge_count} disease-edge associations")
-
-    # Migrate experiment_model
-    src.execute("SELECT edge_id, cellline, in_vivo, reference FROM experiment_model")
-    experiment_rows = src.fetchall()
-
-    experiment_count = 0
-
-    for old_edge_id, cellline, in_vivo, reference in experiment_rows:
-        a_name, b_name = old_edge_names.get(old_edge_id, (None, None))
-        if not a_name or not b_name:
-            continue
-
-        new_edge_id = find_new_edge_id(a_name, b_name)
-        if not new_edge_id:
-            continue
-
-        tgt.execute(
-            "INSERT INTO experiment_model (edge_id, cellline, in_vivo, reference) VALUES (?, ?, ?, ?)",
-            (new_edge_id, cellline or '', in_vivo or '', reference or '')
-        )
-        experiment_count += 1
+    experiment_rows = []
+
+    for source in read_source_dbs([OUTPUTS_DIR / name for name in source_names], tables=METADATA_TABLES):
+        source_name = Path(source['path']).name
+        print(f"Migrating metadata from: {source['path']}")
+
+        # Build edge mapping: old edge id -> new edge id
+        old_to_new_edge_id = {}
+        for edge_dict in rows(source['edge']):
+            if merged_edge_ids:
+                fingerprint, _ = row_fingerprint(edge_payload(edge_dict))
+                new_edge_id = merged_edge_ids.get((source_name, fingerprint))
+            else:
+                new_edge_id = name_pair_to_edge_id.get((edge_dict['interactor_a_node_name'],
+                                                        edge_dict['interactor_b_node_name']))
+            if new_edge_id:
+                old_to_new_edge_id[edge_dict['id']] = new_edge_id
+
+        # Build disease mapping: old auto-increment id -> new auto-increment id
+        old_to_new_disease_id = {}
+        for auto_id, disease_id in zip(source['disease'].get('id', []), source['disease'].get('disease_id', [])):
+            if disease_id in disease_string_to_new_id:
+                old_to_new_disease_id[auto_id] = disease_string_to_new_id[disease_id]
+
+        for disease_edge in rows(source['disease_edge']):
+            new_edge_id = old_to_new_edge_id.get(disease_edge['edge_id'])
+            new_disease_id = old_to_new_disease_id.get(disease_edge['disease_id'])
+            if not new_edge_id or not new_disease_id:
+                continue
+
+            pair = (new_disease_id, new_edge_id)
+            if pair in disease_edge_pairs:
+                continue
+            disease_edge_pairs.add(pair)
+            disease_edge_rows.append((new_disease_id, new_edge_id,
+                                      disease_edge['reference'] or '', disease_edge['source_db'] or ''))
+
+        for experiment in rows(source['experiment_model']):
+            new_edge_id = old_to_new_edge_id.get(experiment['edge_id'])
+            if not new_edge_id:
+                continue
+            experiment_rows.append((new_edge_id, experiment['cellline'] or '',
+                                    experiment['in_vivo'] or '', experiment['reference'] or ''))
+
+    tgt.executemany(
+        "INSERT INTO disease_edge (disease_id, edge_id, reference, source_db) VALUES (?, ?, ?, ?)",
+        disease_edge_rows
+    )
+    print(f"Inserted {len(disease_edge_rows)} disease-edge associations")
+
+    tgt.executemany(
+        "INSERT INTO experiment_model (edge_id, cellline, in_vivo, reference) VALUES (?, ?, ?, ?)",
+        experiment_rows
+    )
+    print(f"Inserted {len(experiment_rows)} experiment models")
+
+    # disease -> node index for disease subnetwork lookups
+    if _table_exists(tgt, 'disease_node'):
+        rebuild_disease_nodes(target)
+        tgt.execute("SELECT COUNT(*) FROM disease_node")
+        print(f"Indexed {tgt.fetchone()[0]} disease-node pairs")
 
     target.commit()
-    print(f"Inserted {experiment_count} experiment models")
-
-    source.close()
     target.close()
     print("Migration complete")
@@ -0,0 +1,72 @@
+import sys
+from typing import NamedTuple
+
+
+SEPARATOR = "|"
+EMPTY_VALUES = ('', '-')
+
+
+class EdgeKey(NamedTuple):
+    """(source, target, layer) key of an edge; string parts are interned."""
+    source: object
+    target: object
+    layer: str
+
+    @classmethod
+    def of(cls, source, target, layer):
+        return cls(_intern(source), _intern(target), _intern(str(layer)))
+
+    def reversed(self):
+        return EdgeKey(self.target, self.source, self.layer)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class MultiValue(set):
+    """Set of the values of a pipe-delimited field.
+
+    Empty and '-' values are dropped, and str() serializes it in sorted order.
+    """
+
+    @classmethod
+    def parse(cls, value, separator=SEPARATOR):
+        return cls(item for item in (value or '').split(separator) if item not in EMPTY_VALUES)
+
+    def add_string(self, value, separator=SEPARATOR):
+        self.update(item for item in (value or '').split(separator) if item not in EMPTY_VALUES)
+        return self
+
+    def serialize(self, separator=SEPARATOR):
+        return separator.join(sorted(self))
+
+    def __str__(self):
+        return self.serialize()
+
+
+def merge_values(value_1, value_2, separator=SEPARATOR):
+    """Union of two field values, each a pipe-delimited string or a MultiValue.
+
+    When one side is empty the other is returned unchanged, so a value that
+    never gets merged keeps its original string. Otherwise the result is a
+    MultiValue; a MultiValue passed as value_1 is updated in place.
+    """
+    if not value_1:
+        return value_2 or ""
+    if not value_2:
+        return value_1
+    merged = value_1 if isinstance(value_1, MultiValue) else MultiValue.parse(value_1, separator)
+    if isinstance(value_2, MultiValue):
+        merged.update(value_2)
+        return merged
+    return merged.add_string(value_2, separator)
+
+
+def merge_strings(string_1, string_2, separator=SEPARATOR):
+    """Union of two pipe-delimited strings, serialized in sorted order.
+
+    Registered as the merge_strings() SQL function on every PsimiSQL connection.
+    """
+    merged = merge_values(string_1, string_2, separator)
+    return merged.serialize(separator) if isinstance(merged, MultiValue) else merged
@@ -1,9 +1,16 @@
+DROP VIEW IF EXISTS `edge_legacy`;
+DROP TABLE IF EXISTS `edge_attribute`;
+DROP TABLE IF EXISTS `edge_adjacency`;
+DROP TABLE IF EXISTS `node_source`;
+DROP TABLE IF EXISTS `merge_source`;
+DROP TABLE IF EXISTS `merge_row`;
 DROP TABLE IF EXISTS `node`;
 DROP TABLE IF EXISTS `edge`;
 DROP TABLE IF EXISTS `node_identifier`;
 DROP TABLE IF EXISTS `experiment_model`;
 DROP TABLE IF EXISTS `disease`;
 DROP TABLE IF EXISTS `disease_edge`;
+DROP TABLE IF EXISTS `disease_node`;
 PRAGMA foreign_keys = ON;
 
 CREATE TABLE `node` (
@@ -67,6 +74,74 @@ CREATE TABLE `disease_edge` (
     FOREIGN KEY(`edge_id`) REFERENCES edge (`id`) ON UPDATE NO ACTION ON DELETE CASCADE
 );
 
+CREATE TABLE `disease_node` (
+    `disease_id` INTEGER NOT NULL,
+    `node_id` INTEGER NOT NULL,
+    `edge_count` INTEGER NOT NULL,
+    `layers` TEXT NOT NULL,
+    PRIMARY KEY (`disease_id`, `node_id`),
+    FOREIGN KEY (`disease_id`) REFERENCES `disease`(`id`) ON UPDATE NO ACTION ON DELETE CASCADE,
+    FOREIGN KEY (`node_id`) REFERENCES `node`(`id`) ON UPDATE NO ACTION ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE `node_source` (
+    `node_id` INTEGER NOT NULL,
+    `source_db` TEXT NOT NULL,
+    PRIMARY KEY (`node_id`, `source_db`),
+    FOREIGN KEY (`node_id`) REFERENCES `node`(`id`) ON UPDATE NO ACTION ON DELETE CASCADE
+);
+
+CREATE TABLE `edge_attribute` (
+    `edge_id` INTEGER NOT NULL,
+    `key` TEXT NOT NULL,
+    `value` TEXT NOT NULL,
+    FOREIGN KEY (`edge_id`) REFERENCES `edge`(`id`) ON UPDATE NO ACTION ON DELETE CASCADE
+);
+
+CREATE TABLE `edge_adjacency` (
+    `node_id` INTEGER NOT NULL,
+    `neighbor_id` INTEGER NOT NULL,
+    `edge_id` INTEGER NOT NULL,
+    `outgoing` INTEGER NOT NULL,
+    PRIMARY KEY (`node_id`, `edge_id`, `outgoing`),
+    FOREIGN KEY (`edge_id`) REFERENCES `edge`(`id`) ON UPDATE NO ACTION ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE `merge_source` (
+    `source` TEXT PRIMARY KEY,
+    `content_hash` TEXT NOT NULL
+);
+
+CREATE TABLE `merge_row` (
+    `source` TEXT NOT NULL,
+    `kind` TEXT NOT NULL,
+    `fingerprint` TEXT NOT NULL,
+    `payload` TEXT NOT NULL,
+    `merged_id` INTEGER
+);
+
+CREATE VIEW `edge_legacy` AS
+SELECT
+    e.id,
+    e.interactor_a_node_id,
+    e.interactor_b_node_id,
+    e.interactor_a_node_name,
+    e.interactor_b_node_name,
+    e.layer,
+    COALESCE((SELECT group_concat(CASE ea.key WHEN 'interaction_type' THEN ea.value ELSE ea.key || ':' || ea.value END, '|')
+              FROM (SELECT key, value FROM edge_attribute
+                    WHERE edge_id = e.id AND key NOT IN ('source_db', 'effect_on_ferroptosis')
+                    ORDER BY rowid) ea), '') AS interaction_types,
+    COALESCE((SELECT group_concat(ea.value, '|')
+              FROM (SELECT value FROM edge_attribute
+                    WHERE edge_id = e.id AND key = 'effect_on_ferroptosis'
+                    ORDER BY rowid) ea), '') AS effect_on_ferroptosis,
+    COALESCE((SELECT group_concat(ea.value, '|')
+              FROM (SELECT value FROM edge_attribute
+                    WHERE edge_id = e.id AND key = 'source_db'
+                    ORDER BY rowid) ea), '') AS source_db
+FROM edge e;
+
 CREATE INDEX `idx_node_name` ON `node`(`name`);
 CREATE INDEX `idx_node_name_tax` ON `node`(`name`, `tax_id`);
 CREATE INDEX `idx_node_type` ON `node`(`type`);
@@ -79,3 +154,9 @@ CREATE INDEX `idx_disease_id` ON `disease`(`disease_id`);
 CREATE INDEX `idx_disease_name` ON `disease`(`disease_name`);
 CREATE INDEX `idx_disease_edge_disease` ON `disease_edge`(`disease_id`);
 CREATE INDEX `idx_disease_edge_edge` ON `disease_edge`(`edge_id`);
+CREATE INDEX `idx_disease_node_node` ON `disease_node`(`node_id`);
+CREATE INDEX `idx_node_source_source` ON `node_source`(`source_db`, `node_id`);
+CREATE INDEX `idx_edge_attribute_key_value` ON `edge_attribute`(`key`, `value`, `edge_id`);
+CREATE INDEX `idx_edge_attribute_edge` ON `edge_attribute`(`edge_id`);
+CREATE INDEX `idx_edge_adjacency_edge` ON `edge_adjacency`(`edge_id`);
+CREATE INDEX `idx_merge_row_source` ON `merge_row`(`source`, `kind`);
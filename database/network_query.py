@@ -0,0 +1,315 @@
+import sqlite3
+import pandas as pd
+from database.sqlite_db_api3 import edge_attribute_rows, rebuild_disease_nodes
+from database.temp_table import TempIdSet
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DIRECTIONS = {'out': 'AND a.outgoing = 1', 'in': 'AND a.outgoing = 0', 'both': ''}
+
+EDGE_COLUMNS = """
+    e.id AS edge_id,
+    e.interactor_a_node_name AS source,
+    e.interactor_b_node_name AS target,
+    n_a.display_name AS source_display,
+    n_b.display_name AS target_display,
+    n_a.type AS source_type,
+    n_b.type AS target_type,
+    e.interaction_types,
+    e.layer,
+    e.source_db,
+    e.effect_on_ferroptosis
+"""
+
+EDGE_JOINS = """
+    JOIN edge e ON e.id = a.edge_id
+    JOIN node n_a ON n_a.id = e.interactor_a_node_id
+    JOIN node n_b ON n_b.id = e.interactor_b_node_id
+"""
+
+# with both directions a self loop would be reported twice, from its outgoing and its incoming row
+ONE_ROW_PER_LOOP = "(a.outgoing = 1 OR a.node_id != a.neighbor_id)"
+
+NODE_COLUMNS = "n.name, n.display_name, n.type, n.role_in_ferroptosis, n.source_db"
+
+
+def _names(names):
+    return [names] if isinstance(names, str) else list(dict.fromkeys(names))
+
+
+def _direction(direction):
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {sorted(DIRECTIONS)}, not {direction!r}")
+    return DIRECTIONS[direction]
+
+
+class NetworkQuery:
+    """Neighbourhood queries over a network database.
+
+    Lookups go through the edge_adjacency table, which holds every edge once
+    per direction keyed on node id, so the edges of a node are one index range
+    instead of an OR over the interactor name columns. Databases written
+    before the table existed get a TEMP copy built from the edge table, and
+    likewise for the disease_node index and the edge_attribute table.
+    Node arguments are node names, either one name or an iterable of names.
+    """
+
+    def __init__(self, db):
+        self._owns_connection = not isinstance(db, sqlite3.Connection)
+        self.connection = sqlite3.connect(db) if self._owns_connection else db
+        self._ensure_adjacency()
+
+    def _has_table(self, table):
+        return self.connection.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?
+            UNION ALL
+            SELECT 1 FROM sqlite_temp_master WHERE type = 'table' AND name = ?
+        """, (table, table)).fetchone() is not None
+
+    def _ensure_adjacency(self):
+        if self._has_table('edge_adjacency'):
+            return
+        logger.info("Database has no edge_adjacency table, building a TEMP copy")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TEMP TABLE edge_adjacency (
+                    node_id INTEGER NOT NULL,
+                    neighbor_id INTEGER NOT NULL,
+                    edge_id INTEGER NOT NULL,
+                    outgoing INTEGER NOT NULL,
+                    PRIMARY KEY (node_id, edge_id, outgoing)
+                ) WITHOUT ROWID
+            """)
+            self.connection.execute("""
+                INSERT INTO temp.edge_adjacency (node_id, neighbor_id, edge_id, outgoing)
+                SELECT interactor_a_node_id, interactor_b_node_id, id, 1 FROM edge
+                UNION ALL
+                SELECT interactor_b_node_id, interactor_a_node_id, id, 0 FROM edge
+            """)
+
+    def _ensure_disease_nodes(self):
+        if self._has_table('disease_node'):
+            return
+        logger.info("Database has no disease_node table, building a TEMP copy")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TEMP TABLE disease_node (
+                    disease_id INTEGER NOT NULL,
+                    node_id INTEGER NOT NULL,
+                    edge_count INTEGER NOT NULL,
+                    layers TEXT NOT NULL,
+                    PRIMARY KEY (disease_id, node_id)
+                ) WITHOUT ROWID
+            """)
+            rebuild_disease_nodes(self.connection, 'temp.disease_node')
+
+    def _ensure_edge_attributes(self):
+        if self._has_table('edge_attribute'):
+            return
+        logger.info("Database has no edge_attribute table, building a TEMP copy")
+        edges = self.connection.execute(
+            "SELECT id, interaction_types, source_db, effect_on_ferroptosis FROM edge").fetchall()
+        with self.connection:
+            self.connection.execute("""
+                CREATE TEMP TABLE edge_attribute (
+                    edge_id INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL
+                )
+            """)
+            self.connection.executemany("INSERT INTO temp.edge_attribute (edge_id, key, value) VALUES (?, ?, ?)",
+                                        [row for edge in edges for row in edge_attribute_rows(*edge)])
+            self.connection.execute(
+                "CREATE INDEX temp.idx_edge_attribute_key_value ON edge_attribute (key, value, edge_id)")
+
+    def close(self):
+        if self._owns_connection:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _frame(self, query, params=None):
+        return pd.read_sql_query(query, self.connection, params=params)
+
+    def nodes(self, names):
+        """Node rows (name, display_name, type, role_in_ferroptosis, source_db) of the given names."""
+        with TempIdSet(self.connection, _names(names)) as name_set:
+            return self._frame(f"""
+                SELECT {NODE_COLUMNS}
+                FROM {name_set.table} q
+                JOIN node n ON n.name = q.value
+                ORDER BY n.name
+            """)
+
+    def neighbors(self, names, direction='both'):
+        """Edges incident to the given nodes, one row per (node, edge).
+
+        `node` is the queried node and `neighbor` the other end; direction
+        'out' keeps edges starting at the node, 'in' edges ending at it.
+        """
+        direction_filter = _direction(direction)
+        loop_filter = f"WHERE {ONE_ROW_PER_LOOP}" if direction == 'both' else ''
+        with TempIdSet(self.connection, _names(names)) as name_set:
+            return self._frame(f"""
+                SELECT
+                    n.name AS node,
+                    n.display_name AS node_display,
+                    n.type AS node_type,
+                    m.name AS neighbor,
+                    m.display_name AS neighbor_display,
+                    m.type AS neighbor_type,
+                    {EDGE_COLUMNS}
+                FROM {name_set.table} q
+                JOIN node n ON n.name = q.value
+                JOIN edge_adjacency a ON a.node_id = n.id {direction_filter}
+                JOIN node m ON m.id = a.neighbor_id
+                {EDGE_JOINS}
+                {loop_filter}
+                ORDER BY n.name, e.id
+            """)
+
+    def k_hop(self, names, k, direction='both'):
+        """Nodes within k hops of the given nodes with their hop distance (the nodes themselves at 0)."""
+        direction_filter = _direction(direction)
+        with TempIdSet(self.connection, _names(names)) as name_set:
+            return self._frame(f"""
+                WITH RECURSIVE hop(node_id, depth) AS (
+                    SELECT n.id, 0 FROM {name_set.table} q JOIN node n ON n.name = q.value
+                    UNION
+                    SELECT a.neighbor_id, hop.depth + 1
+                    FROM hop
+                    JOIN edge_adjacency a ON a.node_id = hop.node_id {direction_filter}
+                    WHERE hop.depth < ?
+                )
+                SELECT {NODE_COLUMNS}, MIN(hop.depth) AS hop
+                FROM hop
+                JOIN node n ON n.id = hop.node_id
+                GROUP BY n.id
+                ORDER BY hop, n.name
+            """, params=(k,))
+
+    def shared_neighbors(self, name_1, name_2, direction='both'):
+        """Nodes adjacent to both nodes."""
+        direction_filter = _direction(direction)
+        return self._frame(f"""
+            SELECT {NODE_COLUMNS}
+            FROM node n
+            WHERE n.id IN (
+                SELECT a.neighbor_id FROM node q
+                JOIN edge_adjacency a ON a.node_id = q.id {direction_filter}
+                WHERE q.name = ?
+                INTERSECT
+                SELECT a.neighbor_id FROM node q
+                JOIN edge_adjacency a ON a.node_id = q.id {direction_filter}
+                WHERE q.name = ?
+            )
+            ORDER BY n.name
+        """, params=(name_1, name_2))
+
+    def edges_between(self, names_a, names_b=None, directed=False):
+        """Edges from a node of names_a to a node of names_b (names_a itself when omitted).
+
+        Unless directed, edges from names_b to names_a are included as well.
+        """
+        names_a = _names(names_a)
+        names_b = names_a if names_b is None else _names(names_b)
+        direction_filter = DIRECTIONS['out' if directed else 'both']
+        with TempIdSet(self.connection, names_a) as set_a, TempIdSet(self.connection, names_b) as set_b:
+            return self._frame(f"""
+                SELECT DISTINCT {EDGE_COLUMNS}
+                FROM {set_a.table} q
+                JOIN node n ON n.name = q.value
+                JOIN edge_adjacency a ON a.node_id = n.id {direction_filter}
+                JOIN node m ON m.id = a.neighbor_id
+                {EDGE_JOINS}
+                WHERE m.name IN {set_b.table}
+                ORDER BY e.id
+            """)
+
+    def disease_edges(self, names=None, disease_id=None):
+        """Disease associations of the edges incident to the given nodes, one row per (node, association).
+
+        Without names every edge end is reported; disease_id (e.g.
+        'ICD-11: 2A00') restricts the rows to one disease.
+        """
+        conditions = [ONE_ROW_PER_LOOP]
+        params = []
+        if disease_id is not None:
+            conditions.append("d.disease_id = ?")
+            params.append(disease_id)
+
+        name_set = TempIdSet(self.connection, _names(names)) if names is not None else None
+        node_source = f"{name_set.table} q JOIN node n ON n.name = q.value" if name_set is not None else "node n"
+        try:
+            return self._frame(f"""
+                SELECT
+                    n.name AS node,
+                    n.display_name AS node_display,
+                    n.type AS node_type,
+                    d.disease_name,
+                    d.disease_id,
+                    de.reference,
+                    de.source_db AS disease_source_db,
+                    {EDGE_COLUMNS}
+                FROM {node_source}
+                JOIN edge_adjacency a ON a.node_id = n.id
+                JOIN disease_edge de ON de.edge_id = a.edge_id
+                JOIN disease d ON d.id = de.disease_id
+                {EDGE_JOINS}
+                WHERE {' AND '.join(conditions)}
+                ORDER BY n.name, de.id
+            """, params=params)
+        finally:
+            if name_set is not None:
+                name_set.drop()
+
+    def disease_subnetwork(self, disease_ids=None):
+        """Nodes and edges of the subnetworks of one or more diseases, as (nodes, edges) DataFrames.
+
+        disease_ids are disease identifiers such as 'ICD-11: 2A00', all
+        diseases when omitted. Nodes come from the disease_node index, with
+        the number of disease edges of the node and their pipe-delimited
+        layers; edges come from disease_edge. Both frames carry disease_id
+        and disease_name, so a batch splits with groupby('disease_id').
+        """
+        self._ensure_disease_nodes()
+        self._ensure_edge_attributes()
+        disease_set = TempIdSet(self.connection, _names(disease_ids)) if disease_ids is not None else None
+        disease_source = f"{disease_set.table} q JOIN disease d ON d.disease_id = q.value" \
+            if disease_set is not None else "disease d"
+        try:
+            nodes = self._frame(f"""
+                SELECT d.disease_id, d.disease_name, {NODE_COLUMNS}, dn.edge_count, dn.layers
+                FROM {disease_source}
+                JOIN disease_node dn ON dn.disease_id = d.id
+                JOIN node n ON n.id = dn.node_id
+                ORDER BY d.disease_id, n.name
+            """)
+            edges = self._frame(f"""
+                SELECT
+                    d.disease_id,
+                    d.disease_name,
+                    de.reference,
+                    de.source_db AS disease_source_db,
+                    {EDGE_COLUMNS},
+                    n_a.role_in_ferroptosis AS source_role,
+                    n_b.role_in_ferroptosis AS target_role,
+                    EXISTS (SELECT 1 FROM edge_attribute ea
+                            WHERE ea.edge_id = e.id AND ea.key = 'is_direct' AND ea.value = 'true') AS is_direct
+                FROM {disease_source}
+                JOIN disease_edge de ON de.disease_id = d.id
+                JOIN edge e ON e.id = de.edge_id
+                JOIN node n_a ON n_a.id = e.interactor_a_node_id
+                JOIN node n_b ON n_b.id = e.interactor_b_node_id
+                ORDER BY d.disease_id, de.id
+            """)
+        finally:
+            if disease_set is not None:
+                disease_set.drop()
+        return nodes, edges
@@ -0,0 +1,110 @@
+from collections import Counter, defaultdict
+
+
+class UnionFind:
+    """Array-backed disjoint sets over the integers 0..n-1."""
+
+    def __init__(self, size=0):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def add(self):
+        self.parent.append(len(self.parent))
+        self.size.append(1)
+        return len(self.parent) - 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            # path halving keeps the trees flat without recursion
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item_1, item_2):
+        root_1, root_2 = self.find(item_1), self.find(item_2)
+        if root_1 == root_2:
+            return root_1
+        if self.size[root_1] < self.size[root_2]:
+            root_1, root_2 = root_2, root_1
+        self.parent[root_2] = root_1
+        self.size[root_1] += self.size[root_2]
+        return root_1
+
+
+class EntityResolver:
+    """Groups records that share an identifier.
+
+    Every record is added with its identifiers as {id_type: value} and an
+    optional name. Records sharing any (id_type, value) key, or the same
+    name, end up in one component. With typed=False keys are compared by
+    value only, so a name also matches an identifier of any type.
+
+    Within a component records are ordered by (priority, name), lowest
+    first, then by their keys. The first record of a component, which
+    callers take as its representative, thus does not depend on the order
+    the records were added in.
+    """
+
+    def __init__(self, typed=True):
+        self.typed = typed
+        self._sets = UnionFind()
+        self._key_owner = {}
+        self._record_keys = []
+        self._record_ranks = []
+
+    def __len__(self):
+        return len(self._record_keys)
+
+    def _keys(self, identifiers, name):
+        keys = []
+        if name:
+            keys.append(('name', name) if self.typed else name)
+        for id_type, value in identifiers.items():
+            if value:
+                keys.append((id_type, value) if self.typed else value)
+        return keys
+
+    def add(self, identifiers, name=None, priority=0):
+        """Add a record and return its index; a lower priority ranks first within its component."""
+        record = self._sets.add()
+        keys = self._keys(identifiers, name)
+        self._record_keys.append(keys)
+        self._record_ranks.append((priority, name or '', sorted(map(str, keys))))
+        for key in keys:
+            owner = self._key_owner.setdefault(key, record)
+            if owner != record:
+                self._sets.union(owner, record)
+        return record
+
+    def find(self, record):
+        return self._sets.find(record)
+
+    def components(self):
+        """Lists of record indexes, each ordered by (priority, name), the lists by their earliest added record."""
+        groups = defaultdict(list)
+        for record in range(len(self)):
+            groups[self._sets.find(record)].append(record)
+        ranks = self._record_ranks
+        # ties on (priority, name) are broken by the record's keys; identical records keep the order they were added in
+        return [sorted(group, key=ranks.__getitem__) for group in sorted(groups.values(), key=lambda group: group[0])]
+
+    def component_sizes(self):
+        """Counter of component size -> number of components."""
+        return Counter(len(group) for group in self.components())
+
+    def hairballs(self, max_size=50, top_keys=5):
+        """Components larger than max_size, with the keys shared by most of their records.
+
+        Oversized components are usually glued together by a generic name or
+        symbol, which shows up at the top of the key list.
+        Returns (records, [(key, record_count), ...]) tuples, largest first.
+        """
+        found = []
+        for group in self.components():
+            if len(group) <= max_size:
+                continue
+            key_counts = Counter(key for record in group for key in set(self._record_keys[record]))
+            shared = [(key, count) for key, count in key_counts.most_common(top_keys) if count > 1]
+            found.append((group, shared))
+        return sorted(found, key=lambda item: len(item[0]), reverse=True)
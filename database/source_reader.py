@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+
+SOURCE_TABLES = ('node', 'node_identifier', 'disease', 'edge')
+
+
+def row_fingerprint(payload):
+    """Stable (fingerprint, serialized payload) pair for a JSON-serializable row."""
+    serialized = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(serialized.encode()).hexdigest(), serialized
+
+
+def _read_table(db, table):
+    cursor = db.execute(f"SELECT * FROM {table}")
+    columns = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    if not rows:
+        return {column: [] for column in columns}
+    return {column: list(values) for column, values in zip(columns, zip(*rows))}
+
+
+def read_source_db(db_file, tables=SOURCE_TABLES):
+    """Read the given tables (by default node, node_identifier, disease and edge) of a source database.
+
+    Each table comes back column-wise as {column: [values]}, a missing table
+    as an empty dict.
+    """
+    db = sqlite3.connect(db_file)
+    try:
+        existing = {name for name, in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        content = {table: _read_table(db, table) if table in existing else {} for table in tables}
+    finally:
+        db.close()
+
+    content['path'] = str(db_file)
+    return content
+
+
+def read_source_dbs(db_files, max_workers=None, tables=SOURCE_TABLES):
+    """Read source databases concurrently, one thread and connection per file.
+
+    sqlite3 releases the GIL while it steps through a query, so the reads
+    overlap without worker processes (which would re-import __main__ and
+    pickle every row back). Files that do not exist are skipped; results
+    keep the order of db_files.
+    """
+    db_files = [db_file for db_file in db_files if os.path.exists(db_file)]
+    if len(db_files) < 2:
+        return [read_source_db(db_file, tables) for db_file in db_files]
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(db_files)) as executor:
+        return list(executor.map(read_source_db, db_files, [tables] * len(db_files)))
+
+
+def rows(table, columns=None):
+    """Iterate a column-wise table as {column: value} dicts."""
+    columns = columns or list(table)
+    if not columns or not table:
+        return
+    for values in zip(*(table[column] for column in columns)):
+        yield dict(zip(columns, values))
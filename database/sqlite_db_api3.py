@@ -1,4 +1,55 @@
+import itertools
+import os
 import sqlite3
+from database.multivalue import EdgeKey, merge_strings, merge_values
+
+
+NODE_COLUMNS = ('name', 'primary_id_type', 'display_name', 'tax_id', 'type',
+                'pathways', 'role_in_ferroptosis', 'function', 'source_db')
+# identifier values that remove an existing identifier instead of overwriting it
+BLANK_VALUES = ('', '-', None)
+NODE_IDENTIFIER_TYPES = ['kegg_id', 'uniprot_id', 'pubchem_id', "pubmed_id", "hgnc_id", "ensg_id", 'entrez_id']
+
+
+def split_pipe_string(string, separator="|"):
+    return [item for item in (string or '').split(separator) if item and item != '-']
+
+
+def edge_attribute_rows(edge_id, interaction_types, source_db, effect_on_ferroptosis):
+    """(edge_id, key, value) rows for the edge_attribute table.
+
+    'is_directed:true' becomes ('is_directed', 'true'), an interaction type
+    without a colon is stored under the 'interaction_type' key.
+    """
+    rows = []
+    for item in split_pipe_string(interaction_types):
+        key, value = item.split(':', 1) if ':' in item else ('interaction_type', item)
+        rows.append((edge_id, key, value))
+    rows.extend((edge_id, 'source_db', item) for item in split_pipe_string(source_db))
+    rows.extend((edge_id, 'effect_on_ferroptosis', item) for item in split_pipe_string(effect_on_ferroptosis))
+    return rows
+
+
+def rebuild_disease_nodes(connection, table='disease_node'):
+    """Refill a disease -> node index from disease_edge and edge_adjacency.
+
+    One row per (disease, node on a disease edge) with the number of disease
+    edges of the node and the pipe-delimited set of their layers.
+    """
+    connection.execute(f"DELETE FROM {table}")
+    connection.execute(f"""
+        INSERT INTO {table} (disease_id, node_id, edge_count, layers)
+        SELECT disease_id, node_id, SUM(edge_count), group_concat(layer, '|')
+        FROM (
+            SELECT de.disease_id, a.node_id, e.layer, COUNT(DISTINCT de.edge_id) AS edge_count
+            FROM disease_edge de
+            JOIN edge_adjacency a ON a.edge_id = de.edge_id
+            JOIN edge e ON e.id = de.edge_id
+            GROUP BY de.disease_id, a.node_id, e.layer
+            ORDER BY de.disease_id, a.node_id, e.layer
+        )
+        GROUP BY disease_id, node_id
+    """)
 
 
 class PsimiSQL:
@@ -6,53 +57,52 @@ class PsimiSQL:
         self.sql_seed = open(sql_seed_file_location).read()
         self.db = self.create_db(":memory:")
         self.cursor = self.db.cursor()
+        self._node_rows = None
 
-    def import_from_db_file(self, db_file_location):
-        temporary_db = sqlite3.connect(db_file_location)
-        temporary_db_name = "file_db"
-
-        params = (db_file_location, temporary_db_name)
-        self.db.execute("ATTACH ? AS ? ", params)
-        self.db.commit()
-
-        self.db.execute("INSERT INTO node SELECT * FROM %s.node" % temporary_db_name)
-        self.db.commit()
-
-        self.db.execute("INSERT INTO edge SELECT * FROM %s.edge" % temporary_db_name)
-        self.db.commit()
-
-        try:
-            self.db.execute("INSERT INTO node_identifier SELECT * FROM %s.node_identifier" % temporary_db_name)
-            self.db.commit()
-        except sqlite3.OperationalError:
-            pass
+    def import_from_db_file(self, db_file_location, pages=-1, progress=None):
+        """Replace the in-memory database with a page-level copy of a database file.
 
-        # MODIFICATION: Import new tables
+        pages and progress are passed on to sqlite3.Connection.backup, so a
+        progress(status, remaining, total) callback is called every `pages`
+        pages. Seed tables missing from older files are created afterwards.
+        """
+        file_db = sqlite3.connect(db_file_location)
         try:
-            self.db.execute("INSERT INTO disease SELECT * FROM %s.disease" % temporary_db_name)
-            self.db.commit()
-        except sqlite3.OperationalError:
-            pass
+            file_db.backup(self.db, pages=pages, progress=progress)
+        finally:
+            file_db.close()
 
-        try:
-            self.db.execute("INSERT INTO disease_edge SELECT * FROM %s.disease_edge" % temporary_db_name)
-            self.db.commit()
-        except sqlite3.OperationalError:
-            pass
+        created = self._ensure_schema()
+        if {'edge_attribute', 'node_source', 'edge_adjacency', 'disease_node'} & created:
+            self.rebuild_attribute_tables()
+        self.build_node_index()
 
-        try:
-            self.db.execute("INSERT INTO experiment_model SELECT * FROM %s.experiment_model" % temporary_db_name)
-            self.db.commit()
-        except sqlite3.OperationalError:
-            pass
+    def _ensure_schema(self):
+        """Create the seed tables, indexes and views that the current database lacks.
 
-        temporary_db.close()
-        self.db.execute("DETACH DATABASE %s" % temporary_db_name)
-        self.db.commit()
+        Returns the names of the created objects.
+        """
+        seed_db = self.create_db(":memory:")
+        existing = {name for name, in self.db.execute("SELECT name FROM sqlite_master")}
+        missing = seed_db.execute("""
+            SELECT name, sql FROM sqlite_master
+            WHERE sql IS NOT NULL
+            ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END
+        """).fetchall()
+        seed_db.close()
+
+        created = set()
+        with self.db:
+            for name, sql in missing:
+                if name not in existing:
+                    self.db.execute(sql)
+                    created.add(name)
+        return created
 
     def create_db(self, location):
         db = sqlite3.connect(location)
         db.text_factory = str
+        db.create_function("merge_strings", 2, merge_strings, deterministic=True)
         create_tables_query = self.sql_seed
         db.executescript(create_tables_query)
         db.commit()
@@ -73,17 +123,20 @@ class PsimiSQL:
         return res[0] if res else None
 
     def check_node_dict_identifiers(self, node_dict):
-        for id_type in ['kegg_id', 'uniprot_id', 'pubchem_id', "pubmed_id", "hgnc_id", "ensg_id", 'entrez_id']:
+        self.insert_identifiers(self._node_dict_identifiers(node_dict))
+
+    @staticmethod
+    def _node_dict_identifiers(node_dict):
+        identifiers = []
+        for id_type in NODE_IDENTIFIER_TYPES:
             if id_type in node_dict and node_dict[id_type]:
-                is_primary = False
-                if node_dict['primary_id_type'] == id_type:
-                    is_primary = True
-                self.insert_node_identifier(
-                        node_dict['id'],
-                        id_type,
-                        node_dict[id_type],
-                        is_primary
-                )
+                is_primary = node_dict['primary_id_type'] == id_type
+                identifiers.append((node_dict['id'], id_type, node_dict[id_type], is_primary))
+        return identifiers
+
+    def _next_id(self, table):
+        self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM %s" % table)
+        return self.cursor.fetchone()[0] + 1
 
     def insert_node(self, node_dict):
         node_id = self.check_if_node_exists(node_dict)
@@ -93,67 +146,64 @@ class PsimiSQL:
             existing_node = self.get_node_by_id(node_id)
 
         if ('id' not in node_dict) and not existing_node:
-            if 'display_name' not in node_dict:
-                node_dict['display_name'] = node_dict.get('name', '')
-
-            if 'type' not in node_dict:
-                node_dict['type'] = 'protein'
-
-            # MODIFICATION: Updated INSERT query for new schema
-            query = """
-                INSERT INTO node
-                (name, primary_id_type, display_name, tax_id, type, pathways, role_in_ferroptosis, function, source_db)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-
-            self.cursor.execute(query, (
-                node_dict['name'],
-                node_dict.get('primary_id_type'),
-                node_dict.get('display_name', ''),
-                node_dict.get('tax_id'),
-                node_dict.get('type', 'protein'),
-                node_dict.get('pathways', ''),
-                node_dict.get('role_in_ferroptosis', ''),  # MODIFICATION: New field
-                node_dict.get('function', ''),
-                node_dict.get('source_db', '')  # MODIFICATION: New field
-            ))
-            self.db.commit()
-
-            node_dict['id'] = self.cursor.lastrowid
-            self.check_node_dict_identifiers(node_dict)
+            self.insert_nodes([node_dict])
 
         elif ('id' not in node_dict) and existing_node:
             node_dict['id'] = existing_node['id']
 
     def insert_unique_node(self, node_dict):
-        if 'display_name' not in node_dict:
-            node_dict['display_name'] = node_dict.get('name', '')
+        return self.insert_nodes([node_dict])[0]
+
+    def insert_nodes(self, node_dicts):
+        """Insert nodes (and the identifiers found on them) in one transaction.
 
-        if 'type' not in node_dict:
-            node_dict['type'] = 'protein'
+        Every node dict gets its assigned id under the 'id' key, and the ids are
+        returned in input order.
+        """
+        node_dicts = list(node_dicts)
+        if not node_dicts:
+            return []
 
-        # MODIFICATION: Updated INSERT query for new schema
         query = """
             INSERT INTO node
-            (name, primary_id_type, display_name, tax_id, type, pathways, role_in_ferroptosis, function, source_db)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (id, name, primary_id_type, display_name, tax_id, type, pathways, role_in_ferroptosis, function, source_db)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
 
-        self.cursor.execute(query, (
-            node_dict['name'],
-            node_dict.get('primary_id_type'),
-            node_dict.get('display_name', ''),
-            node_dict.get('tax_id'),
-            node_dict.get('type', 'protein'),
-            node_dict.get('pathways', ''),
-            node_dict.get('role_in_ferroptosis', ''),  # MODIFICATION: New field
-            node_dict.get('function', ''),
-            node_dict.get('source_db', '')  # MODIFICATION: New field
-        ))
-        self.db.commit()
-
-        node_dict['id'] = self.cursor.lastrowid
-        self.check_node_dict_identifiers(node_dict)
+        with self.db:
+            next_id = self._next_id('node')
+            rows = []
+            identifiers = []
+            for offset, node_dict in enumerate(node_dicts):
+                if 'display_name' not in node_dict:
+                    node_dict['display_name'] = node_dict.get('name', '')
+
+                if 'type' not in node_dict:
+                    node_dict['type'] = 'protein'
+
+                node_dict['id'] = next_id + offset
+                rows.append((
+                    node_dict['id'],
+                    node_dict['name'],
+                    node_dict.get('primary_id_type'),
+                    node_dict.get('display_name', ''),
+                    node_dict.get('tax_id'),
+                    node_dict.get('type', 'protein'),
+                    node_dict.get('pathways', ''),
+                    node_dict.get('role_in_ferroptosis', ''),
+                    node_dict.get('function', ''),
+                    node_dict.get('source_db', '')
+                ))
+                identifiers.extend(self._node_dict_identifiers(node_dict))
+
+            self.cursor.executemany(query, rows)
+            self._write_node_sources((row[0], row[-1]) for row in rows)
+            if self._node_rows is not None:
+                for row in rows:
+                    self._index_node(self._node_row_to_dict(row))
+            self._write_identifiers(identifiers)
+
+        return [node_dict['id'] for node_dict in node_dicts]
 
     def get_node(self, node_name, node_tax_id=None):
         if node_tax_id is None:
@@ -271,34 +321,194 @@ class PsimiSQL:
         """
 
         self.cursor.execute(query, tup)
+        self._write_node_sources([(node_dict['id'], node_dict.get('source_db', '-'))])
         self.db.commit()
+        self.invalidate_node_index()
 
     def insert_edge(self, interactor_a_dict, interactor_b_dict, edge_dict):
+        return self.insert_edges([(interactor_a_dict, interactor_b_dict, edge_dict)])[0]
+
+    def insert_edges(self, edges):
+        """Insert (interactor_a_dict, interactor_b_dict, edge_dict) triples in one transaction.
+
+        Returns the ids assigned to the new edges in input order.
+        """
         query = """
                 INSERT INTO `edge` (
+                `id`,
                 `interactor_a_node_id`,
                 `interactor_b_node_id`,
                 `interactor_a_node_name`,
                 `interactor_b_node_name`,
                 `layer`,
                 `source_db`,
-                `interaction_types`
+                `interaction_types`,
+                `effect_on_ferroptosis`
                 )
-                VALUES ( ?, ?, ?, ?, ?, ?, ?)
+                VALUES ( ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """
 
-        tup = (
-            interactor_a_dict['id'],
-            interactor_b_dict['id'],
-            interactor_a_dict['name'],
-            interactor_b_dict['name'],
-            edge_dict['layer'],
-            edge_dict['source_db'],
-            edge_dict['interaction_types']
-        )
+        with self.db:
+            next_id = self._next_id('edge')
+            rows = []
+            for offset, (interactor_a_dict, interactor_b_dict, edge_dict) in enumerate(edges):
+                rows.append((
+                    next_id + offset,
+                    interactor_a_dict['id'],
+                    interactor_b_dict['id'],
+                    interactor_a_dict['name'],
+                    interactor_b_dict['name'],
+                    edge_dict['layer'],
+                    edge_dict['source_db'],
+                    edge_dict['interaction_types'],
+                    edge_dict.get('effect_on_ferroptosis', '')
+                ))
+            self.cursor.executemany(query, rows)
+            self._write_edge_attributes((row[0], row[7], row[6], row[8]) for row in rows)
+            self._write_edge_adjacency(row[:3] for row in rows)
+
+        return [row[0] for row in rows]
+
+    def upsert_edge(self, interactor_a_dict, interactor_b_dict, edge_dict):
+        return self.upsert_edges([(interactor_a_dict, interactor_b_dict, edge_dict)])[0]
+
+    def upsert_edges(self, edges):
+        """Insert or merge (interactor_a_dict, interactor_b_dict, edge_dict) triples.
+
+        Edges are keyed on (interactor_a_node_id, interactor_b_node_id, layer).
+        On a conflict the pipe-delimited source_db, interaction_types and
+        effect_on_ferroptosis sets are merged with merge_strings(). An
+        undirected edge (no 'is_directed:true' interaction type) also merges
+        into an existing undirected edge stored the other way round.
+
+        The key is enforced by the idx_edge_key unique index, created on first
+        use, so this fails on a database that already holds duplicate keys.
+        Returns the id of the inserted or merged edge for every input triple.
+        """
+        query = """
+            INSERT INTO edge (
+                interactor_a_node_id, interactor_b_node_id,
+                interactor_a_node_name, interactor_b_node_name,
+                layer, source_db, interaction_types, effect_on_ferroptosis
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (interactor_a_node_id, interactor_b_node_id, layer) DO UPDATE SET
+                source_db = merge_strings(source_db, excluded.source_db),
+                interaction_types = merge_strings(interaction_types, excluded.interaction_types),
+                effect_on_ferroptosis = merge_strings(effect_on_ferroptosis, excluded.effect_on_ferroptosis)
+            RETURNING id, interaction_types, source_db, effect_on_ferroptosis
+        """
 
-        self.db.execute(query, tup)
-        self.db.commit()
+        # rows sharing a key are merged in memory first, so every key is written once
+        merged_edges = {}
+        edge_keys = []
+        with self.db:
+            self.db.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS `idx_edge_key`
+                ON `edge`(`interactor_a_node_id`, `interactor_b_node_id`, `layer`)
+            """)
+            for interactor_a_dict, interactor_b_dict, edge_dict in edges:
+                interaction_types = edge_dict['interaction_types'] or ''
+                edge_key = EdgeKey.of(interactor_a_dict['id'], interactor_b_dict['id'], edge_dict['layer'])
+                if 'is_directed:true' not in interaction_types.split('|') and \
+                        self._has_undirected_reverse_edge(edge_key, merged_edges):
+                    interactor_a_dict, interactor_b_dict = interactor_b_dict, interactor_a_dict
+                    edge_key = edge_key.reversed()
+
+                merged_edge = merged_edges.get(edge_key)
+                if merged_edge is None:
+                    merged_edges[edge_key] = [interactor_a_dict, interactor_b_dict, edge_dict['source_db'],
+                                              interaction_types, edge_dict.get('effect_on_ferroptosis', '') or '']
+                else:
+                    merged_edge[2] = merge_values(merged_edge[2], edge_dict['source_db'])
+                    merged_edge[3] = merge_values(merged_edge[3], interaction_types)
+                    merged_edge[4] = merge_values(merged_edge[4], edge_dict.get('effect_on_ferroptosis', '') or '')
+                edge_keys.append(edge_key)
+
+            edge_ids = {}
+            for edge_key, (interactor_a_dict, interactor_b_dict, source_db, interaction_types, effect) in merged_edges.items():
+                self.cursor.execute(query, (
+                    interactor_a_dict['id'],
+                    interactor_b_dict['id'],
+                    interactor_a_dict['name'],
+                    interactor_b_dict['name'],
+                    edge_key.layer,
+                    str(source_db),
+                    str(interaction_types),
+                    str(effect)
+                ))
+                merged_edge = self.cursor.fetchone()
+                self._write_edge_attributes([merged_edge])
+                self._write_edge_adjacency([(merged_edge[0], interactor_a_dict['id'], interactor_b_dict['id'])])
+                edge_ids[edge_key] = merged_edge[0]
+
+        return [edge_ids[edge_key] for edge_key in edge_keys]
+
+    def _has_undirected_reverse_edge(self, edge_key, pending_edges):
+        """True if edge_key is not stored but its reverse is, and the reverse is undirected.
+
+        pending_edges holds the merged, not yet written edges of the current batch.
+        """
+        query = "SELECT id FROM edge WHERE interactor_a_node_id = ? AND interactor_b_node_id = ? AND layer = ?"
+        if edge_key in pending_edges or self.db.execute(query, edge_key).fetchone():
+            return False
+
+        reverse_key = edge_key.reversed()
+        pending_reverse = pending_edges.get(reverse_key)
+        stored_reverse = self.db.execute(query, reverse_key).fetchone()
+        if pending_reverse is None and not stored_reverse:
+            return False
+        if pending_reverse is not None and 'is_directed:true' in str(pending_reverse[3]).split('|'):
+            return False
+        return not stored_reverse or not self.db.execute("""
+            SELECT 1 FROM edge_attribute WHERE edge_id = ? AND key = 'is_directed' AND value = 'true'
+        """, stored_reverse).fetchone()
+
+    def _write_edge_attributes(self, edges):
+        """Replace the edge_attribute rows of (edge_id, interaction_types, source_db, effect_on_ferroptosis) edges."""
+        edges = list(edges)
+        self.cursor.executemany("DELETE FROM edge_attribute WHERE edge_id = ?", [(edge[0],) for edge in edges])
+        self.cursor.executemany("INSERT INTO edge_attribute (edge_id, key, value) VALUES (?, ?, ?)",
+                                [row for edge in edges for row in edge_attribute_rows(*edge)])
+
+    def _write_edge_adjacency(self, edges):
+        """Replace the edge_adjacency rows of (edge_id, interactor_a_node_id, interactor_b_node_id) edges.
+
+        Every edge is stored once per direction, so the neighbors of a node are
+        an index range on node_id whichever end of the edge the node is.
+        """
+        edges = list(edges)
+        self.cursor.executemany("DELETE FROM edge_adjacency WHERE edge_id = ?", [(edge[0],) for edge in edges])
+        self.cursor.executemany("INSERT INTO edge_adjacency (node_id, neighbor_id, edge_id, outgoing) VALUES (?, ?, ?, ?)",
+                                [row for edge_id, a_id, b_id in edges for row in ((a_id, b_id, edge_id, 1),
+                                                                                   (b_id, a_id, edge_id, 0))])
+
+    def _write_node_sources(self, nodes):
+        """Replace the node_source rows of (node_id, source_db) nodes."""
+        nodes = list(nodes)
+        self.cursor.executemany("DELETE FROM node_source WHERE node_id = ?", [(node[0],) for node in nodes])
+        self.cursor.executemany("INSERT OR IGNORE INTO node_source (node_id, source_db) VALUES (?, ?)",
+                                [(node_id, item) for node_id, source_db in nodes for item in split_pipe_string(source_db)])
+
+    def rebuild_attribute_tables(self):
+        """Rebuild edge_attribute, node_source, edge_adjacency and disease_node from the base tables.
+
+        Call this after changing edge or node rows with raw SQL.
+        """
+        with self.db:
+            self.db.execute("DELETE FROM edge_attribute")
+            self.db.execute("DELETE FROM node_source")
+            self.db.execute("DELETE FROM edge_adjacency")
+            self.db.execute("""
+                INSERT INTO edge_adjacency (node_id, neighbor_id, edge_id, outgoing)
+                SELECT interactor_a_node_id, interactor_b_node_id, id, 1 FROM edge
+                UNION ALL
+                SELECT interactor_b_node_id, interactor_a_node_id, id, 0 FROM edge
+            """)
+            self._write_edge_attributes(
+                self.db.execute("SELECT id, interaction_types, source_db, effect_on_ferroptosis FROM edge ORDER BY id"))
+            self._write_node_sources(self.db.execute("SELECT id, source_db FROM node ORDER BY id"))
+            rebuild_disease_nodes(self.db)
 
     def insert_disease(self, disease_dict):
         query = """
@@ -333,38 +543,77 @@ class PsimiSQL:
             return None
 
     def insert_disease_edge(self, disease_edge_dict):
+        self.insert_disease_edges([disease_edge_dict])
+
+    def insert_disease_edges(self, disease_edge_dicts):
         query = """
             INSERT INTO disease_edge (disease_id, edge_id, reference, source_db)
             VALUES (?, ?, ?, ?)
         """
-        self.cursor.execute(query, (
+        rows = [(
             disease_edge_dict['disease_id'],
             disease_edge_dict['edge_id'],
             disease_edge_dict.get('reference', ''),
             disease_edge_dict['source_db']
-        ))
-        self.db.commit()
+        ) for disease_edge_dict in disease_edge_dicts]
+
+        with self.db:
+            self.cursor.executemany(query, rows)
 
     def insert_experiment_model(self, experiment_dict):
+        self.insert_experiment_models([experiment_dict])
+
+    def insert_experiment_models(self, experiment_dicts):
         query = """
             INSERT INTO experiment_model (edge_id, cellline, in_vivo, reference)
             VALUES (?, ?, ?, ?)
         """
-        self.cursor.execute(query, (
+        rows = [(
             experiment_dict['edge_id'],
             experiment_dict.get('cellline', ''),
             experiment_dict.get('in_vivo', ''),
             experiment_dict.get('reference', '')
-        ))
-        self.db.commit()
+        ) for experiment_dict in experiment_dicts]
+
+        with self.db:
+            self.cursor.executemany(query, rows)
 
     def insert_node_identifier(self, node_id, id_type, id_value, is_primary=False):
-        query = "INSERT INTO node_identifier (node_id, id_type, id_value, is_primary) VALUES (?, ?, ?, ?)"
-        try:
-            self.cursor.execute(query, (node_id, id_type, id_value, is_primary))
-            self.db.commit()
-        except sqlite3.IntegrityError:
-            self.update_node_identifier(node_id, id_type, id_value, is_primary)
+        self.insert_identifiers([(node_id, id_type, id_value, is_primary)])
+
+    def insert_identifiers(self, identifiers):
+        """Insert (node_id, id_type, id_value, is_primary) tuples in one transaction.
+
+        A node keeps one value per identifier type, so an existing
+        (node_id, id_type) pair is overwritten; overwriting it with an empty
+        or '-' value deletes it instead.
+        """
+        with self.db:
+            self._write_identifiers(identifiers)
+
+    def _write_identifiers(self, identifiers):
+        query = """
+            INSERT INTO node_identifier (node_id, id_type, id_value, is_primary) VALUES (?, ?, ?, ?)
+            ON CONFLICT (node_id, id_type) DO UPDATE
+            SET id_value = excluded.id_value, is_primary = excluded.is_primary
+        """
+        identifiers = list(identifiers)
+        # runs of regular values go through executemany, blank values one by one, in input order
+        for blank, run in itertools.groupby(identifiers, key=lambda identifier: identifier[2] in BLANK_VALUES):
+            if not blank:
+                self.cursor.executemany(query, run)
+                continue
+            for node_id, id_type, id_value, is_primary in run:
+                self.cursor.execute("DELETE FROM node_identifier WHERE node_id = ? AND id_type = ?",
+                                    (node_id, id_type))
+                if self.cursor.rowcount:
+                    self.invalidate_node_index()
+                else:
+                    self.cursor.execute(query, (node_id, id_type, id_value, is_primary))
+
+        if self._node_rows is not None:
+            for node_id, id_type, id_value, is_primary in identifiers:
+                self._index_identifier(node_id, id_type, id_value)
 
     def update_node_identifier(self, node_id, id_type, id_value, is_primary=False):
         self.cursor.execute("DELETE FROM node_identifier WHERE node_id = ? AND id_type = ?",
@@ -373,6 +622,7 @@ class PsimiSQL:
             self.cursor.execute("INSERT INTO node_identifier (node_id, id_type, id_value, is_primary) VALUES (?, ?, ?, ?)",
                                (node_id, id_type, id_value, is_primary))
         self.db.commit()
+        self.invalidate_node_index()
 
     def get_node_identifiers(self, node_id):
         self.cursor.execute("SELECT id_type, id_value FROM node_identifier WHERE node_id = ?", (node_id,))
@@ -382,39 +632,76 @@ class PsimiSQL:
         return identifiers
 
     def get_node_by_any_identifier(self, id_value):
-        query = """
-            SELECT n.* FROM node n
-            JOIN node_identifier ni ON n.id = ni.node_id
-            WHERE ni.id_value = ?
-            OR n.display_name = ?
-            LIMIT 1
+        """Look up a node by identifier value, display name or name.
+
+        Served from the in-memory node index, so no SQL is run once the
+        index is built.
         """
-        self.cursor.execute(query, (id_value, id_value))
-        answer = self.cursor.fetchone()
+        if self._node_rows is None:
+            self.build_node_index()
+
+        node_id = self._identifier_index.get(id_value)
+        if node_id is None:
+            node_id = self._display_name_index.get(id_value)
+        if node_id is None:
+            node_id = self._name_index.get(id_value)
+        if node_id is None:
+            return None
+        return dict(self._node_rows[node_id])
 
-        if not answer:
-            self.cursor.execute("SELECT * FROM node WHERE name = ? LIMIT 1", (id_value,))
-            answer = self.cursor.fetchone()
+    def resolve_many(self, values):
+        """Batch version of get_node_by_any_identifier, returns {value: node_dict or None}."""
+        return {value: self.get_node_by_any_identifier(value) for value in values}
 
-        if not answer:
-            return None
+    def build_node_index(self):
+        """(Re)build the in-memory identifier, display name and name index.
 
-        # MODIFICATION: Updated field unpacking for new schema
-        id, name, primary_id_type, display_name, tax_id, mol_type, pathways, role_in_ferroptosis, function, source_db = answer
-        node_dict = {
-            "id": id,
-            "name": name,
-            "primary_id_type": primary_id_type,
-            "display_name": display_name,
-            "tax_id": tax_id,
-            "type": mol_type,
-            "pathways": pathways,
-            "role_in_ferroptosis": role_in_ferroptosis,  # MODIFICATION: New field
-            "function": function,
-            "source_db": source_db  # MODIFICATION: New field
-        }
-        node_dict.update(self.get_node_identifiers(id))
-        return node_dict
+        Ties resolve to the node with the lowest id. Display names are only
+        indexed for nodes that have at least one identifier.
+        """
+        self._node_rows = {}
+        self._identifier_index = {}
+        self._display_name_index = {}
+        self._name_index = {}
+
+        self.cursor.execute("SELECT * FROM node ORDER BY id")
+        for answer in self.cursor.fetchall():
+            self._index_node(self._node_row_to_dict(answer))
+
+        self.cursor.execute("SELECT node_id, id_type, id_value FROM node_identifier ORDER BY node_id")
+        for node_id, id_type, id_value in self.cursor.fetchall():
+            self._index_identifier(node_id, id_type, id_value)
+
+    def invalidate_node_index(self):
+        """Drop the node index; it is rebuilt on the next lookup.
+
+        Call this after changing node or node_identifier rows with raw SQL.
+        """
+        self._node_rows = None
+
+    @staticmethod
+    def _node_row_to_dict(answer):
+        return dict(zip(('id',) + NODE_COLUMNS, answer))
+
+    def _index_node(self, node_dict):
+        self._node_rows[node_dict['id']] = node_dict
+        self._name_index.setdefault(node_dict['name'], node_dict['id'])
+
+    def _index_identifier(self, node_id, id_type, id_value):
+        # an earlier identifier of the same batch may have invalidated the index
+        if self._node_rows is None:
+            return
+        node_dict = self._node_rows.get(node_id)
+        if node_dict is None:
+            return
+        old_value = node_dict.get(id_type)
+        if old_value is not None and old_value != id_value:
+            # overwritten identifier values cannot be unindexed cheaply
+            self.invalidate_node_index()
+            return
+        node_dict[id_type] = id_value
+        self._identifier_index.setdefault(id_value, node_id)
+        self._display_name_index.setdefault(node_dict['display_name'], node_id)
 
     def get_node_by_identifier(self, id_type, id_value):
         query = """
@@ -446,56 +733,28 @@ class PsimiSQL:
         node_dict.update(self.get_node_identifiers(id))
         return node_dict
 
-    def save_db_to_file(self, db_file_name):
+    def save_db_to_file(self, db_file_name, pages=-1, progress=None, vacuum=False):
+        """Write the in-memory database to a file and close the connection.
+
+        The file is written with the online backup API (see
+        import_from_db_file for pages and progress). With vacuum=True it is
+        written with VACUUM INTO instead, which produces a compacted file.
+        """
         if '.db' not in db_file_name:
             export_file = db_file_name + '.db'
         else:
             export_file = db_file_name
 
-        self.create_db(export_file)
-
-        db_file_name = db_file_name.split('/')[-1]
-        db_name = db_file_name.replace(".db", "")
-
-        tup = (export_file, db_name)
-        self.db.execute("ATTACH ? as ?", tup)
         self.db.commit()
-
-        attached_table = (db_name + '.node')
-        self.db.execute("INSERT INTO %s SELECT * FROM node" % attached_table)
-        self.db.commit()
-
-        attached_table = (db_name + '.edge')
-        self.db.execute("INSERT INTO %s SELECT * FROM edge" % attached_table)
-        self.db.commit()
-
-        try:
-            attached_table = (db_name + '.node_identifier')
-            self.db.execute("INSERT INTO %s SELECT * FROM node_identifier" % attached_table)
-            self.db.commit()
-        except sqlite3.OperationalError:
-            pass
-
-        # MODIFICATION: Export new tables
-        try:
-            attached_table = (db_name + '.disease')
-            self.db.execute("INSERT INTO %s SELECT * FROM disease" % attached_table)
-            self.db.commit()
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            attached_table = (db_name + '.disease_edge')
-            self.db.execute("INSERT INTO %s SELECT * FROM disease_edge" % attached_table)
-            self.db.commit()
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            attached_table = (db_name + '.experiment_model')
-            self.db.execute("INSERT INTO %s SELECT * FROM experiment_model" % attached_table)
-            self.db.commit()
-        except sqlite3.OperationalError:
-            pass
+        if vacuum:
+            if os.path.exists(export_file):
+                os.remove(export_file)
+            self.db.execute("VACUUM INTO ?", (export_file,))
+        else:
+            file_db = sqlite3.connect(export_file)
+            try:
+                self.db.backup(file_db, pages=pages, progress=progress)
+            finally:
+                file_db.close()
 
         self.db.close()
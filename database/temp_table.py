@@ -0,0 +1,47 @@
+import itertools
+
+
+_table_numbers = itertools.count()
+
+
+class TempIdSet:
+    """A set of ids loaded into an indexed TEMP table of one connection.
+
+    Queries join against `table` (one column, `value`) instead of binding the
+    ids as IN (?, ?, ...) lists, so the set size is not bounded by SQLite's
+    variable limit and is parsed once. The table lives until drop() or until
+    the connection closes, so several queries of a session can share it.
+    """
+
+    def __init__(self, connection, values=(), name=None):
+        self.connection = connection
+        self.table = name or f"id_set_{next(_table_numbers)}"
+        if not self.table.isidentifier():
+            raise ValueError(f"Invalid temp table name: {self.table!r}")
+
+        connection.execute(f"DROP TABLE IF EXISTS temp.{self.table}")
+        connection.execute(f"CREATE TEMP TABLE {self.table} (value PRIMARY KEY) WITHOUT ROWID")
+        self.update(values)
+
+    def update(self, values):
+        """Add ids to the set."""
+        self.connection.executemany(f"INSERT OR IGNORE INTO temp.{self.table} (value) VALUES (?)",
+                                    ((value,) for value in values))
+        return self
+
+    def replace(self, values):
+        """Replace the ids of the set, keeping the table for queries that refer to it."""
+        self.connection.execute(f"DELETE FROM temp.{self.table}")
+        return self.update(values)
+
+    def __len__(self):
+        return self.connection.execute(f"SELECT COUNT(*) FROM temp.{self.table}").fetchone()[0]
+
+    def drop(self):
+        self.connection.execute(f"DROP TABLE IF EXISTS temp.{self.table}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.drop()
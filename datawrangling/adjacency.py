@@ -0,0 +1,281 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+
+DIRECTIONS = ('out', 'in', 'both')
+
+
+def _csr(rows, columns, node_count):
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=node_count), out=indptr[1:])
+    return indptr, columns[order]
+
+
+def _gather(indptr, indices, codes):
+    """Concatenated neighbor lists of the given node codes, with the code each neighbor came from."""
+    starts = indptr[codes]
+    counts = indptr[codes + 1] - starts
+    total = counts.sum()
+    if not total:
+        return np.empty(0, dtype=indices.dtype), np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    return indices[offsets], np.repeat(codes, counts)
+
+
+class CSRAdjacency:
+    """Directed edge list indexed as integer CSR arrays, in both directions.
+
+    Nodes are identified by their labels (names, UniProt ids, ...), which are
+    encoded as codes into `nodes`. Edges keep their input order, so per-edge
+    results line up with the edge list the adjacency was built from.
+    """
+
+    def __init__(self, sources, targets):
+        labels = pd.Categorical(np.concatenate([np.asarray(sources, dtype=object), np.asarray(targets, dtype=object)]))
+        self.nodes = labels.categories
+        codes = labels.codes.astype(np.int64).reshape(2, -1)
+        self.edge_sources, self.edge_targets = codes[0], codes[1]
+        self._index()
+
+    @classmethod
+    def from_codes(cls, nodes, edge_sources, edge_targets, csr=None):
+        """Adjacency over edges already encoded as codes into `nodes`.
+
+        csr optionally restores the arrays returned by csr_arrays(), so a
+        saved adjacency is not re-indexed.
+        """
+        adjacency = cls.__new__(cls)
+        adjacency.nodes = pd.Index(nodes, dtype=object)
+        adjacency.edge_sources = np.asarray(edge_sources)
+        adjacency.edge_targets = np.asarray(edge_targets)
+        if csr is None:
+            adjacency._index()
+        else:
+            out_indptr, out_indices, in_indptr, in_indices = csr
+            adjacency._out = (out_indptr, out_indices)
+            adjacency._in = (in_indptr, in_indices)
+        return adjacency
+
+    def _index(self):
+        valid = (self.edge_sources >= 0) & (self.edge_targets >= 0)
+        sources, targets = self.edge_sources[valid], self.edge_targets[valid]
+        self._out = _csr(sources, targets, len(self.nodes))
+        self._in = _csr(targets, sources, len(self.nodes))
+
+    def csr_arrays(self):
+        """(out indptr, out indices, in indptr, in indices)."""
+        return (*self._out, *self._in)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def codes(self, labels):
+        """Codes of the given labels, -1 for labels not in the graph."""
+        return self.nodes.get_indexer(list(labels))
+
+    def mask(self, labels):
+        """Boolean node mask of the given labels."""
+        return self.nodes.isin(list(labels))
+
+    def _step(self, codes, direction):
+        """(neighbor, origin) code arrays of one hop from the given node codes."""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}, got {direction!r}")
+        codes = np.asarray(codes, dtype=np.int64)
+        found = []
+        if direction in ('out', 'both'):
+            found.append(_gather(*self._out, codes))
+        if direction in ('in', 'both'):
+            found.append(_gather(*self._in, codes))
+        return np.concatenate([neighbors for neighbors, _ in found]), np.concatenate([origins for _, origins in found])
+
+    def neighbors(self, codes, direction='both'):
+        """Unique neighbor codes of the given node codes."""
+        return np.unique(self._step(codes, direction)[0])
+
+    def expand(self, seeds, depth, direction='both', allowed=None):
+        """Frontier BFS from the seed labels up to `depth` hops.
+
+        Returns the layer of every node: 0 for seeds, k for nodes first
+        reached after k hops, -1 for nodes not reached. `allowed` is an
+        optional boolean node mask; other nodes are never entered.
+        """
+        levels = np.full(len(self.nodes), -1, dtype=np.int64)
+        frontier = self.codes(seeds)
+        frontier = np.unique(frontier[frontier >= 0])
+        levels[frontier] = 0
+
+        for level in range(1, depth + 1):
+            reached = self.neighbors(frontier, direction)
+            reached = reached[levels[reached] < 0]
+            if allowed is not None:
+                reached = reached[allowed[reached]]
+            if not len(reached):
+                break
+            levels[reached] = level
+            frontier = reached
+        return levels
+
+    def shortest_path_tree(self, source, direction='both', targets=None, max_depth=None):
+        """BFS tree from one node code.
+
+        Returns (levels, parents): the hop distance of every node (-1 when
+        unreached) and the code of one predecessor on a shortest path (-1
+        for the source and unreached nodes). The search stops early once all
+        `targets` codes are reached, or after max_depth hops.
+        """
+        levels = np.full(len(self.nodes), -1, dtype=np.int64)
+        parents = np.full(len(self.nodes), -1, dtype=np.int64)
+        levels[source] = 0
+        frontier = np.array([source], dtype=np.int64)
+        pending = None if targets is None else np.unique(np.asarray(targets, dtype=np.int64))
+
+        level = 0
+        while len(frontier) and (max_depth is None or level < max_depth):
+            if pending is not None:
+                pending = pending[levels[pending] < 0]
+                if not len(pending):
+                    break
+            level += 1
+            reached, origins = self._step(frontier, direction)
+            unseen = levels[reached] < 0
+            frontier, first = np.unique(reached[unseen], return_index=True)
+            levels[frontier] = level
+            parents[frontier] = origins[unseen][first]
+        return levels, parents
+
+    def shortest_path(self, source, target, direction='both'):
+        """Labels along one shortest path between two labels, None when there is none."""
+        source, target = self.codes([source, target])
+        if source < 0 or target < 0:
+            return None
+        levels, parents = self.shortest_path_tree(source, direction, [target])
+        if levels[target] < 0:
+            return None
+        codes = [target]
+        while parents[codes[-1]] >= 0:
+            codes.append(parents[codes[-1]])
+        return list(self.nodes[codes[::-1]])
+
+    def _spread(self, bits, direction):
+        """One hop of bit-parallel BFS: every node ORs the bits of the nodes that reach it."""
+        spread = np.zeros_like(bits)
+        csrs = []
+        if direction in ('out', 'both'):
+            csrs.append(self._in)
+        if direction in ('in', 'both'):
+            csrs.append(self._out)
+        for indptr, indices in csrs:
+            rows = np.flatnonzero(np.diff(indptr))
+            if len(rows):
+                spread[rows] |= np.bitwise_or.reduceat(bits[indices], indptr[rows])
+        return spread
+
+    def layer(self, levels, level):
+        """Labels of the nodes on one layer."""
+        return set(self.nodes[levels == level])
+
+    def edge_layers(self, levels, pair_layers, symmetric=True):
+        """Per-edge layer labels from the layers of both endpoints.
+
+        pair_layers maps (source layer, target layer) to an edge label, e.g.
+        {(0, 0): 0, (0, 1): 1}; with symmetric=True (1, 0) gets the label of
+        (0, 1). Edges matching no pair get -1.
+        """
+        max_level = max(max(pair) for pair in pair_layers)
+        table = np.full((max_level + 2, max_level + 2), -1, dtype=np.int64)
+        for (source_level, target_level), label in pair_layers.items():
+            table[source_level + 1, target_level + 1] = label
+            if symmetric:
+                table[target_level + 1, source_level + 1] = label
+
+        # unreached and too distant endpoints both fall on row/column 0
+        node_levels = np.where(levels > max_level, -1, levels)
+        node_levels = np.append(node_levels, -1)
+        return table[node_levels[self.edge_sources] + 1, node_levels[self.edge_targets] + 1]
+
+
+def expand_layers(sources, targets, seeds, depth, direction='both', allowed=None):
+    """Build a CSRAdjacency from an edge list and expand it from the seeds.
+
+    allowed may be given as labels here. Returns (adjacency, node levels).
+    """
+    adjacency = CSRAdjacency(sources, targets)
+    if allowed is not None:
+        allowed = adjacency.mask(allowed)
+    return adjacency, adjacency.expand(seeds, depth, direction, allowed)
+
+
+BFS_BLOCK = 64
+
+
+def _block_distances(adjacency, sources, pair_sources, pair_targets, direction):
+    """Distances of the pairs of up to 64 sources, searched together as the bits of a uint64 per node.
+
+    pair_sources indexes into sources; returns the distances in pair order.
+    """
+    bits = np.left_shift(np.uint64(1), np.arange(len(sources), dtype=np.uint64))
+    visited = np.zeros(len(adjacency), dtype=np.uint64)
+    np.bitwise_or.at(visited, sources, bits)
+    frontier = visited.copy()
+
+    distances = np.where(sources[pair_sources] == pair_targets, 0, -1)
+    pair_bits = bits[pair_sources]
+    level = 0
+    while (distances < 0).any() and frontier.any():
+        level += 1
+        frontier = adjacency._spread(frontier, direction) & ~visited
+        visited |= frontier
+        reached = (distances < 0) & (frontier[pair_targets] & pair_bits != 0)
+        distances[reached] = level
+    return distances
+
+
+_worker_adjacency = None
+
+
+def _init_distance_worker(adjacency):
+    global _worker_adjacency
+    _worker_adjacency = adjacency
+
+
+def _worker_block_distances(args):
+    return _block_distances(_worker_adjacency, *args)
+
+
+def pair_distances(adjacency, sources, targets, direction='both', max_workers=1):
+    """Shortest-path hop distances of (source, target) label pairs.
+
+    Every distinct source is searched once, 64 sources at a time with a
+    bit-parallel BFS over the CSR arrays. Returns an int array in pair
+    order, -1 for unreachable pairs and labels not in the graph. With
+    max_workers > 1 the source blocks are split over worker processes.
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {DIRECTIONS}, got {direction!r}")
+    source_codes = adjacency.codes(sources)
+    target_codes = adjacency.codes(targets)
+    distances = np.full(len(source_codes), -1, dtype=np.int64)
+
+    valid = np.flatnonzero((source_codes >= 0) & (target_codes >= 0))
+    unique_sources, source_index = np.unique(source_codes[valid], return_inverse=True)
+    blocks = source_index // BFS_BLOCK
+
+    tasks, pairs = [], []
+    for block in range(-(-len(unique_sources) // BFS_BLOCK)):
+        in_block = np.flatnonzero(blocks == block)
+        tasks.append((unique_sources[block * BFS_BLOCK:(block + 1) * BFS_BLOCK],
+                      source_index[in_block] - block * BFS_BLOCK, target_codes[valid[in_block]], direction))
+        pairs.append(valid[in_block])
+
+    if max_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers, initializer=_init_distance_worker, initargs=(adjacency,)) as executor:
+            results = list(executor.map(_worker_block_distances, tasks))
+    else:
+        results = [_block_distances(adjacency, *task) for task in tasks]
+
+    for pair_index, block_distances in zip(pairs, results):
+        distances[pair_index] = block_distances
+    return distances
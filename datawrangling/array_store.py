@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+from pathlib import Path
+
+
+MANIFEST = 'manifest.json'
+# version directories older than this without a manifest pointing at them are left over from crashed builds
+STALE_VERSION_SECONDS = 60 * 60
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """sha256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_manifest(source_file, digest):
+    """Manifest entries tying a store to the content (and stat shortcut) of its source file."""
+    stat = Path(source_file).stat()
+    return {'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _write_manifest(store_dir, manifest):
+    temp_file = store_dir / f"{MANIFEST}.tmp-{os.getpid()}"
+    temp_file.write_text(json.dumps(manifest, indent=2))
+    os.replace(temp_file, store_dir / MANIFEST)
+
+
+def _version_time(name):
+    try:
+        return int(name[1:].split('-')[0]) if name.startswith('v') else None
+    except ValueError:
+        return None
+
+
+def _current_version(store_dir):
+    try:
+        return json.loads((store_dir / MANIFEST).read_text()).get('version')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def write_store(store_dir, arrays, manifest):
+    """Save arrays ({name: ndarray}) as a new version of a store and return its manifest.
+
+    The arrays go to a fresh version directory, then the manifest, which
+    names the version, is replaced atomically: readers see either the old
+    or the new version, never a partial one. The replaced version is removed
+    afterwards (arrays already memory-mapped from it stay readable). When a
+    concurrent build started later has already published its version, that
+    manifest is kept and returned, and this build is discarded.
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    version_dir = store_dir / version
+    version_dir.mkdir()
+    for name, array in arrays.items():
+        np.save(version_dir / f"{name}.npy", array)
+
+    replaced = _current_version(store_dir)
+    if (_version_time(replaced or '') or 0) > _version_time(version):
+        current = read_manifest(store_dir)
+        if current is not None:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            return current
+
+    manifest = {**manifest, 'version': version, 'arrays': sorted(arrays)}
+    _write_manifest(store_dir, manifest)
+    if replaced and replaced != version:
+        shutil.rmtree(store_dir / replaced, ignore_errors=True)
+    _remove_stale_entries(store_dir, keep=version)
+    return manifest
+
+
+def _remove_stale_entries(store_dir, keep):
+    # other version directories may belong to builds still in progress, so only
+    # those older than STALE_VERSION_SECONDS (left by crashed builds) are removed
+    cutoff = time.time_ns() - STALE_VERSION_SECONDS * 10 ** 9
+    for entry in store_dir.iterdir():
+        if entry.name == MANIFEST or entry.name.startswith(f"{MANIFEST}.tmp-") or entry.name == keep:
+            continue
+        if entry.is_dir():
+            started = _version_time(entry.name)
+            if started is None or started < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+        else:
+            # .npy files of the unversioned store layout
+            entry.unlink(missing_ok=True)
+
+
+def read_manifest(store_dir):
+    """Manifest of a store, or None when it is missing, unreadable or its arrays are incomplete."""
+    store_dir = Path(store_dir)
+    try:
+        manifest = json.loads((store_dir / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+    if 'version' not in manifest:
+        return None
+    version_dir = store_dir / manifest['version']
+    if not all((version_dir / f"{name}.npy").exists() for name in manifest.get('arrays', ())):
+        return None
+    return manifest
+
+
+def load_arrays(store_dir, manifest):
+    """Memory-map the arrays of the store version named by a manifest."""
+    version_dir = Path(store_dir) / manifest['version']
+    return {name: np.load(version_dir / f"{name}.npy", mmap_mode='r') for name in manifest['arrays']}
+
+
+def load_store(source_file, store_dir, build):
+    """Manifest of the store built from source_file, calling build(digest) when the source changed.
+
+    The store is tied to the sha256 of the source. While the file's size
+    and mtime match the manifest the hash is not recomputed; the same
+    content under a new mtime only refreshes the stat shortcut.
+    """
+    stat = Path(source_file).stat()
+    manifest = read_manifest(store_dir)
+    if manifest is None or (manifest['size'], manifest['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+        digest = file_digest(source_file)
+        if manifest is None or manifest['sha256'] != digest:
+            manifest = build(digest)
+        else:
+            manifest.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            _write_manifest(Path(store_dir), manifest)
+    return manifest
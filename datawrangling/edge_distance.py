@@ -1,23 +1,24 @@
 import sqlite3
-import networkx as nx
-import pandas as pd
-from pathlib import Path
-from config import OUTPUTS_DIR, SOURCES_DIR
+import numpy as np
+from config import OUTPUTS_DIR
+from datawrangling.adjacency import CSRAdjacency, pair_distances
+from datawrangling.omnipath_store import OMNIPATH_FILE, load_omnipath
 from collections import defaultdict
 
-def analyze_edge_distances():
+def analyze_edge_distances(max_workers=1):
     db_path = OUTPUTS_DIR / "extended_omnipath_network.db"
-    omnipath_file = SOURCES_DIR / "omnipath" / "omnipath_interactions.txt"
+    omnipath_file = OMNIPATH_FILE
 
     # Build OmniPath network graph from source file
     print("Building OmniPath network graph from source file...")
-    omnipath_df = pd.read_csv(omnipath_file, sep='\t')
+    omnipath_df = load_omnipath(omnipath_file).frame(flags=())
+    adjacency = CSRAdjacency(omnipath_df['source'], omnipath_df['target'])
 
-    G = nx.Graph()
-    for _, row in omnipath_df.iterrows():
-        G.add_edge(row['source'], row['target'])
+    # undirected (lower code, higher code) pairs of the OmniPath edges
+    edge_ends = np.sort(np.column_stack([adjacency.edge_sources, adjacency.edge_targets]), axis=1)
+    undirected_edges = set(map(tuple, np.unique(edge_ends, axis=0).tolist()))
 
-    print(f"OmniPath graph: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+    print(f"OmniPath graph: {len(adjacency)} nodes, {len(undirected_edges)} edges")
 
     # Get FerReg/ferrdb edges from database
     conn = sqlite3.connect(db_path)
@@ -38,35 +39,42 @@ def analyze_edge_distances():
     target_edges = cursor.fetchall()
     print(f"Found {len(target_edges)} edges from FerReg/ferrdb with uniprot IDs")
 
-    # Analyze distances
+    # Analyze distances: one search per distinct source node
+    sources = [source for source, _, _, _ in target_edges]
+    targets = [target for _, target, _, _ in target_edges]
+    source_codes = adjacency.codes(sources)
+    target_codes = adjacency.codes(targets)
+    distances = pair_distances(adjacency, sources, targets, max_workers=max_workers)
+
     distance_stats = defaultdict(list)
     unreachable_pairs = []
     direct_connections = []
     not_in_omnipath = []
+    examples_by_distance = defaultdict(list)
 
-    for source, target, source_db, interaction_type in target_edges:
+    for (source, target, source_db, interaction_type), source_code, target_code, distance in zip(
+            target_edges, source_codes.tolist(), target_codes.tolist(), distances.tolist()):
         # Check if both nodes exist in OmniPath network
-        if source not in G and target not in G:
+        if source_code < 0 and target_code < 0:
             not_in_omnipath.append((source, target, source_db, 'both'))
             continue
-        elif source not in G:
+        elif source_code < 0:
             not_in_omnipath.append((source, target, source_db, 'source'))
             continue
-        elif target not in G:
+        elif target_code < 0:
             not_in_omnipath.append((source, target, source_db, 'target'))
             continue
 
         # Check if edge already exists in OmniPath
-        if G.has_edge(source, target):
+        if (min(source_code, target_code), max(source_code, target_code)) in undirected_edges:
             direct_connections.append((source, target, source_db))
             distance_stats[source_db].append(1)
+        elif distance < 0:
+            unreachable_pairs.append((source, target, source_db))
         else:
-            # Calculate shortest path
-            try:
-                distance = nx.shortest_path_length(G, source, target)
-                distance_stats[source_db].append(distance)
-            except nx.NetworkXNoPath:
-                unreachable_pairs.append((source, target, source_db))
+            distance_stats[source_db].append(distance)
+            if len(examples_by_distance[distance]) < 3:
+                examples_by_distance[distance].append((source, target, source_db))
 
     # Print results
     print("\n=== DISTANCE ANALYSIS RESULTS ===")
@@ -105,22 +113,11 @@ def analyze_edge_distances():
 
     # Show some examples of different distances
     print("\n=== EXAMPLE EDGES BY DISTANCE ===")
-    examples_by_distance = defaultdict(list)
-
-    for source, target, source_db, interaction_type in target_edges:
-        if source in G and target in G:
-            if not G.has_edge(source, target):
-                try:
-                    distance = nx.shortest_path_length(G, source, target)
-                    if len(examples_by_distance[distance]) < 3:
-                        examples_by_distance[distance].append((source, target, source_db))
-                except:
-                    pass
-
     for dist in sorted(examples_by_distance.keys())[:5]:
         print(f"\nDistance {dist}:")
         for source, target, db in examples_by_distance[dist][:3]:
-            print(f"  {source} -> {target} ({db})")
+            path = adjacency.shortest_path(source, target)
+            print(f"  {source} -> {target} ({db}): {' > '.join(path)}")
 
     conn.close()
     return distance_stats, unreachable_pairs, direct_connections, not_in_omnipath
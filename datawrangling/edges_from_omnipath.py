@@ -1,32 +1,66 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from config import OUTPUTS_DIR, SOURCES_DIR, PROJECT_ROOT
+from config import OUTPUTS_DIR, PROJECT_ROOT
 from database.sqlite_db_api3 import PsimiSQL
+from datawrangling.adjacency import CSRAdjacency
+from datawrangling.omnipath_store import OMNIPATH_FILE, load_omnipath
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def merge_strings(string_1, string_2, separator="|"):
-    if not string_1 and not string_2:
-        return ""
-    if not string_1:
-        return string_2
-    if not string_2:
-        return string_1
+OMNIPATH_EDGE_LAYERS = {(0, 0): 0, (0, 1): 1, (1, 1): 2, (1, 2): 2}
 
-    list_1 = [item for item in string_1.split(separator) if item and item != '-']
-    list_2 = [item for item in string_2.split(separator) if item and item != '-']
 
-    merged = list(set(list_1 + list_2))
-    return separator.join(merged)
+def classify_omnipath_layers(omnipath_df, kegg_proteins, existing_proteins=()):
+    """Assign every OmniPath interaction a ferroptosis layer.
+
+    Layer 1 proteins interact with a KEGG protein, layer 2 proteins with a
+    layer 1 protein (in either direction). Edges are layer 0 between KEGG
+    proteins, 1 between KEGG and layer 1, and 2 between layer 1 and layer 1
+    or 2; all other edges get -1.
+
+    Returns (edge layers, layer 1 proteins, layer 2 proteins, new proteins),
+    the new proteins being the layer 1 and 2 proteins not in existing_proteins,
+    in order of first appearance.
+    """
+    adjacency = CSRAdjacency(omnipath_df['source'], omnipath_df['target'])
+    levels = adjacency.expand(kegg_proteins, 2, direction='both')
+    edge_layers = adjacency.edge_layers(levels, OMNIPATH_EDGE_LAYERS)
+
+    # interleave source and target codes to list proteins in order of first appearance
+    is_new = ((levels == 1) | (levels == 2)) & ~adjacency.mask(existing_proteins)
+    appearance = np.column_stack([adjacency.edge_sources, adjacency.edge_targets]).ravel()
+    appearance = appearance[appearance >= 0]
+    appearance = appearance[is_new[appearance]]
+    _, first = np.unique(appearance, return_index=True)
+    new_proteins = list(adjacency.nodes[appearance[np.sort(first)]])
+
+    return edge_layers, adjacency.layer(levels, 1), adjacency.layer(levels, 2), new_proteins
+
+
+def omnipath_interaction_types(omnipath_df):
+    """Pipe-delimited interaction_types of every OmniPath interaction."""
+    if 'is_directed' in omnipath_df:
+        is_directed = np.where(omnipath_df['is_directed'] == 1, 'true', 'false')
+    else:
+        is_directed = np.full(len(omnipath_df), 'false')
+    interaction_types = pd.Series(is_directed, index=omnipath_df.index).map(
+        lambda directed: f"is_directed:{directed}|is_direct:{directed}")
+
+    if 'sources' in omnipath_df:
+        sources = omnipath_df['sources']
+        has_sources = sources.notna()
+        interaction_types[has_sources] += '|sources:' + sources[has_sources].astype(str)
+    return interaction_types.tolist()
 
 
 def extend_merged_db_with_omnipath():
     merged_db_path = OUTPUTS_DIR / "merged_ferroptosis_network.db"
     output_db_path = OUTPUTS_DIR / "merged_ferroptosis_w_omnipath.db"
-    omnipath_file = SOURCES_DIR / "omnipath" / "omnipath_interactions.txt"
+    omnipath_file = OMNIPATH_FILE
 
     if not merged_db_path.exists():
         raise FileNotFoundError(f"Merged database not found: {merged_db_path}")
@@ -39,25 +73,26 @@ def extend_merged_db_with_omnipath():
     db_api.import_from_db_file(str(merged_db_path))
 
     logger.info(f"Loading OmniPath interactions: {omnipath_file}")
-    omnipath_df = pd.read_csv(omnipath_file, delimiter='\t')
+    omnipath_df = load_omnipath(omnipath_file).frame(sources=True)
     logger.info(f"Found {len(omnipath_df)} OmniPath interactions")
 
     logger.info("Building protein sets from existing database...")
     kegg_proteins = set()
     all_existing_proteins = set()
 
-    db_api.cursor.execute("SELECT id, name, source_db FROM node WHERE type = 'protein'")
-    for node_id, name, source in db_api.cursor.fetchall():
-        is_kegg = ('KEGG' in source)
-
-        db_api.cursor.execute("SELECT id_value FROM node_identifier WHERE node_id = ? AND id_type = 'uniprot_id'", (node_id,))
-        uniprot_ids = [row[0] for row in db_api.cursor.fetchall()]
-
-        if uniprot_ids:
-            for uniprot_id in uniprot_ids:
-                all_existing_proteins.add(uniprot_id)
-                if is_kegg:
-                    kegg_proteins.add(uniprot_id)
+    db_api.cursor.execute("""
+        SELECT n.name, n.source_db,
+               EXISTS (SELECT 1 FROM node_source ns WHERE ns.node_id = n.id AND ns.source_db = 'KEGG'),
+               ni.id_value
+        FROM node n
+        LEFT JOIN node_identifier ni ON ni.node_id = n.id AND ni.id_type = 'uniprot_id'
+        WHERE n.type = 'protein'
+    """)
+    for name, source, is_kegg, uniprot_id in db_api.cursor.fetchall():
+        if uniprot_id:
+            all_existing_proteins.add(uniprot_id)
+            if is_kegg:
+                kegg_proteins.add(uniprot_id)
         else:
             logger.warning(f"Node '{name}' (source: {source}) has no UniProt ID")
             all_existing_proteins.add(name)
@@ -67,48 +102,8 @@ def extend_merged_db_with_omnipath():
     logger.info(f"Found {len(kegg_proteins)} KEGG proteins, {len(all_existing_proteins)} total existing proteins")
 
     logger.info("Building network layers...")
-    layer1_proteins = set()
-    layer2_proteins = set()
-    new_nodes_added = set()
-
-    # only considers directions pointing towards KEGG proteins
-    #for _, row in omnipath_df.iterrows():
-    #    source_id, target_id = row['source'], row['target']
-    #    if target_id in kegg_proteins and source_id not in kegg_proteins:
-    #        layer1_proteins.add(source_id)
-    #        if source_id not in all_existing_proteins:
-    #            new_nodes_added.add(source_id)
-
-    #for _, row in omnipath_df.iterrows():
-    #    source_id, target_id = row['source'], row['target']
-    #    if target_id in layer1_proteins and source_id not in kegg_proteins:
-    #        layer2_proteins.add(source_id)
-    #        if source_id not in all_existing_proteins:
-    #            new_nodes_added.add(source_id)
-
-
-    # considers both directions, but same distance.
-    for _, row in omnipath_df.iterrows():
-        source_id, target_id = row['source'], row['target']
-        if target_id in kegg_proteins and source_id not in kegg_proteins:
-            layer1_proteins.add(source_id)
-            if source_id not in all_existing_proteins:
-                new_nodes_added.add(source_id)
-        if source_id in kegg_proteins and target_id not in kegg_proteins:
-            layer1_proteins.add(target_id)
-            if target_id not in all_existing_proteins:
-                new_nodes_added.add(target_id)
-
-    for _, row in omnipath_df.iterrows():
-        source_id, target_id = row['source'], row['target']
-        if target_id in layer1_proteins and source_id not in kegg_proteins:
-            layer2_proteins.add(source_id)
-            if source_id not in all_existing_proteins:
-                new_nodes_added.add(source_id)
-        if source_id in layer1_proteins and target_id not in kegg_proteins:
-            layer2_proteins.add(target_id)
-            if target_id not in all_existing_proteins:
-                new_nodes_added.add(target_id)
+    edge_layers, layer1_proteins, layer2_proteins, new_nodes_added = classify_omnipath_layers(
+        omnipath_df, kegg_proteins, all_existing_proteins)
 
     logger.info(f"Layer 1: {len(layer1_proteins)} proteins, Layer 2: {len(layer2_proteins)} proteins")
     logger.info(f"New nodes to add: {len(new_nodes_added)}")
@@ -133,88 +128,36 @@ def extend_merged_db_with_omnipath():
         logger.info(f"Added {len(new_nodes_added)} new nodes")
 
     logger.info("Processing edges...")
-    edges_added = 0
-    edges_updated = 0
     edges_skipped = 0
     layer_counts = {0: 0, 1: 0, 2: 0}
 
-    for _, interaction in omnipath_df.iterrows():
-        try:
-            source_dict = db_api.get_node_by_any_identifier(interaction['source'])
-            target_dict = db_api.get_node_by_any_identifier(interaction['target'])
-
-            if not source_dict or not target_dict:
-                edges_skipped += 1
-                continue
-
-            source_id, target_id = interaction['source'], interaction['target']
-
-            if source_id in kegg_proteins and target_id in kegg_proteins:
-                layer = 0
-            elif (source_id in kegg_proteins and target_id in layer1_proteins) or \
-                 (target_id in kegg_proteins and source_id in layer1_proteins):
-                layer = 1
-            elif source_id in layer1_proteins and target_id in layer1_proteins:
-                layer = 2
-            elif (source_id in layer1_proteins and target_id in layer2_proteins) or \
-                 (target_id in layer1_proteins and source_id in layer2_proteins):
-                layer = 2
-            else:
-                edges_skipped += 1
-                continue
-
-            layer_counts[layer] += 1
-
-            interaction_types = []
-            if 'is_directed' in interaction and pd.notna(interaction['is_directed']):
-                is_directed = 'true' if interaction['is_directed'] == 1 else 'false'
-                interaction_types.extend([f"is_directed:{is_directed}", f"is_direct:{is_directed}"])
-            else:
-                interaction_types.extend(["is_directed:false", "is_direct:false"])
-
-            if 'sources' in interaction and pd.notna(interaction['sources']):
-                interaction_types.append(f"sources:{interaction['sources']}")
-
-            # Check for existing edge
-            existing_query = """
-                SELECT id, layer, source_db, interaction_types FROM edge
-                WHERE interactor_a_node_id = ? AND interactor_b_node_id = ?
-            """
-            db_api.cursor.execute(existing_query, (source_dict['id'], target_dict['id']))
-            existing_edge = db_api.cursor.fetchone()
-
-            if existing_edge:
-                # Update existing edge
-                edge_id, old_layer, old_source_db, old_interaction_types = existing_edge
-
-                # Merge source databases
-                new_source_db = merge_strings(old_source_db, 'OmniPath')
-
-                # Merge interaction types
-                new_interaction_types = merge_strings(old_interaction_types, '|'.join(interaction_types))
-
-                # Update with new layer
-                update_query = """
-                    UPDATE edge
-                    SET layer = ?, source_db = ?, interaction_types = ?
-                    WHERE id = ?
-                """
-                db_api.cursor.execute(update_query, (str(layer), new_source_db, new_interaction_types, edge_id))
-                db_api.db.commit()
-                edges_updated += 1
-            else:
-                # Insert new edge
-                edge_dict = {
-                    'source_db': 'OmniPath',
-                    'interaction_types': '|'.join(interaction_types),
-                    'layer': str(layer)
-                }
-                db_api.insert_edge(source_dict, target_dict, edge_dict)
-                edges_added += 1
+    node_lookup = db_api.resolve_many(pd.unique(omnipath_df[['source', 'target']].values.ravel()))
+    edges_to_upsert = []
+
+    interaction_types = omnipath_interaction_types(omnipath_df)
+    for source_id, target_id, layer, types in zip(omnipath_df['source'], omnipath_df['target'],
+                                                  edge_layers.tolist(), interaction_types):
+        source_dict = node_lookup[source_id]
+        target_dict = node_lookup[target_id]
 
-        except Exception as e:
-            logger.warning(f"Failed to process edge {interaction['source']} -> {interaction['target']}: {e}")
+        if not source_dict or not target_dict or layer < 0:
             edges_skipped += 1
+            continue
+
+        layer_counts[layer] += 1
+        edge_dict = {
+            'source_db': 'OmniPath',
+            'interaction_types': types,
+            'layer': str(layer)
+        }
+        edges_to_upsert.append((source_dict, target_dict, edge_dict))
+
+    db_api.cursor.execute("SELECT COUNT(*) FROM edge")
+    edge_count_before = db_api.cursor.fetchone()[0]
+    db_api.upsert_edges(edges_to_upsert)
+    db_api.cursor.execute("SELECT COUNT(*) FROM edge")
+    edges_added = db_api.cursor.fetchone()[0] - edge_count_before
+    edges_updated = len(edges_to_upsert) - edges_added
 
     logger.info(f"Added {edges_added} new edges, updated {edges_updated} existing edges, skipped {edges_skipped}")
     logger.info(f"Layer distribution: Layer 0: {layer_counts[0]}, Layer 1: {layer_counts[1]}, Layer 2: {layer_counts[2]}")
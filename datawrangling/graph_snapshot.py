@@ -0,0 +1,197 @@
+import hashlib
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datawrangling.array_store import file_digest, load_arrays, load_store, source_manifest, write_store
+from datawrangling.adjacency import CSRAdjacency
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+CSR_ARRAYS = ('out_indptr', 'out_indices', 'in_indptr', 'in_indices')
+
+
+def snapshot_path(db_path, filters=None):
+    """Directory of the snapshot of a network database for one filter set."""
+    db_path = Path(db_path)
+    filter_key = hashlib.sha1(json.dumps(_normalize_filters(filters), sort_keys=True).encode()).hexdigest()[:16]
+    return db_path.with_name(db_path.stem + '.snapshots') / filter_key
+
+
+def _normalize_filters(filters):
+    """{edge column: sorted list of accepted values}."""
+    normalized = {}
+    for column, values in (filters or {}).items():
+        if isinstance(values, (str, int, float)):
+            values = [values]
+        normalized[column] = sorted(values, key=str)
+    return normalized
+
+
+def _encode_column(values):
+    """('numeric', array) or ('categorical', codes, categories) for one column."""
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return 'numeric', values.to_numpy()
+    codes, categories = pd.factorize(values)
+    categories = np.asarray([str(category) for category in categories], dtype=str) if len(categories) \
+        else np.empty(0, dtype='U1')
+    return 'categorical', codes.astype(np.int32), categories
+
+
+def _read_edges(db, filters):
+    columns = [row[1] for row in db.execute("PRAGMA table_info(edge)")]
+    conditions, params = [], []
+    for column, values in filters.items():
+        if column not in columns:
+            raise ValueError(f"Unknown edge column in filters: {column!r}")
+        conditions.append(f"`{column}` IN ({','.join('?' * len(values))})")
+        params.extend(values)
+    query = "SELECT * FROM edge" + (" WHERE " + " AND ".join(conditions) if conditions else "") + " ORDER BY id"
+    return pd.read_sql_query(query, db, params=params)
+
+
+def build_snapshot(db_path, filters=None, digest=None):
+    """Build the snapshot of a network database and return its manifest.
+
+    Edges are those of the edge table matching every filter ({column: value
+    or values}). Nodes are all nodes of the node table plus any edge end
+    missing from it; their attributes are kept column-wise, aligned with
+    the adjacency's node order.
+    """
+    db_path = Path(db_path)
+    filters = _normalize_filters(filters)
+    snapshot_dir = snapshot_path(db_path, filters)
+    source = source_manifest(db_path, digest or file_digest(db_path))
+
+    db = sqlite3.connect(db_path)
+    try:
+        node_df = pd.read_sql_query("SELECT * FROM node ORDER BY id", db)
+        edge_df = _read_edges(db, filters)
+    finally:
+        db.close()
+
+    # nodes of the node table first, in id order, then edge ends without a node row
+    node_df = node_df.drop_duplicates('name').set_index('name')
+    nodes = node_df.index.append(pd.Index(edge_df['interactor_a_node_name'])).append(
+        pd.Index(edge_df['interactor_b_node_name'])).unique()
+    node_df = node_df.reindex(nodes)
+    adjacency = CSRAdjacency.from_codes(nodes, nodes.get_indexer(edge_df['interactor_a_node_name']),
+                                        nodes.get_indexer(edge_df['interactor_b_node_name']))
+
+    arrays = {'nodes': np.asarray(nodes, dtype=str) if len(nodes) else np.empty(0, dtype='U1'),
+              'edge_sources': adjacency.edge_sources,
+              'edge_targets': adjacency.edge_targets}
+    arrays.update(zip(CSR_ARRAYS, adjacency.csr_arrays()))
+
+    encodings = {}
+    for prefix, frame in (('node', node_df), ('edge', edge_df.drop(columns=['interactor_a_node_name',
+                                                                            'interactor_b_node_name']))):
+        encodings[prefix] = {}
+        for column in frame.columns:
+            kind, *column_arrays = _encode_column(frame[column])
+            encodings[prefix][column] = kind
+            arrays[f"{prefix}.{column}"] = column_arrays[0]
+            if kind == 'categorical':
+                arrays[f"{prefix}.{column}.categories"] = column_arrays[1]
+
+    manifest = write_store(snapshot_dir, arrays, {**source, 'filters': filters, 'columns': encodings})
+
+    logger.info(f"Built graph snapshot {snapshot_dir} ({len(nodes)} nodes, {len(edge_df)} edges)")
+    return manifest
+
+
+class GraphSnapshot:
+    """Read-only network graph loaded from memory-mapped arrays.
+
+    `adjacency` is a CSRAdjacency over the node names (directed: 'out'/'in',
+    undirected: 'both'); node and edge attributes are columns aligned with
+    `nodes` and with the edge order of the adjacency.
+    """
+
+    def __init__(self, snapshot_dir, manifest):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.manifest = manifest
+        self.filters = manifest['filters']
+        self._arrays = load_arrays(self.snapshot_dir, manifest)
+        self.adjacency = CSRAdjacency.from_codes(self._arrays['nodes'], self._arrays['edge_sources'],
+                                                 self._arrays['edge_targets'],
+                                                 [self._arrays[name] for name in CSR_ARRAYS])
+        self.nodes = self.adjacency.nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def node_columns(self):
+        return list(self.manifest['columns']['node'])
+
+    @property
+    def edge_columns(self):
+        return list(self.manifest['columns']['edge'])
+
+    def _column(self, prefix, column):
+        kind = self.manifest['columns'][prefix].get(column)
+        if kind is None:
+            raise KeyError(f"Graph snapshot has no {prefix} column {column!r}")
+        values = self._arrays[f"{prefix}.{column}"]
+        if kind == 'numeric':
+            return values
+        return pd.Categorical.from_codes(values, categories=pd.Index(self._arrays[f"{prefix}.{column}.categories"],
+                                                                      dtype=object))
+
+    def node_column(self, column):
+        """One node attribute, aligned with `nodes`."""
+        return self._column('node', column)
+
+    def edge_column(self, column):
+        """One edge attribute, aligned with the adjacency's edges."""
+        return self._column('edge', column)
+
+    def node_frame(self, columns=None):
+        frame = pd.DataFrame({column: self.node_column(column) for column in columns or self.node_columns})
+        frame.insert(0, 'name', self.nodes)
+        return frame
+
+    def edge_frame(self, columns=None):
+        """Edges as interactor_a_node_name, interactor_b_node_name and the requested attribute columns."""
+        frame = pd.DataFrame({
+            'interactor_a_node_name': self.nodes[self.adjacency.edge_sources],
+            'interactor_b_node_name': self.nodes[self.adjacency.edge_targets],
+        })
+        for column in columns or self.edge_columns:
+            frame[column] = self.edge_column(column)
+        return frame
+
+    def neighbors(self, name, direction='both'):
+        """Names of the neighbors of one node."""
+        codes = self.adjacency.codes([name])
+        if codes[0] < 0:
+            return set()
+        return set(self.nodes[self.adjacency.neighbors(codes, direction)])
+
+    def to_networkx(self, directed=True):
+        import networkx as nx
+        graph = nx.DiGraph() if directed else nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        graph.add_edges_from(zip(self.nodes[self.adjacency.edge_sources], self.nodes[self.adjacency.edge_targets]))
+        return graph
+
+
+def load_graph(db_path, filters=None):
+    """Load the graph snapshot of a network database, building it on first use.
+
+    Snapshots live next to the database, one per filter set, and are tied
+    to the sha256 of the database file: a changed file is rehashed (only
+    when its size or mtime moved) and rebuilt when the content differs.
+    """
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"Network database not found: {db_path}")
+
+    filters = _normalize_filters(filters)
+    snapshot_dir = snapshot_path(db_path, filters)
+    manifest = load_store(db_path, snapshot_dir, lambda digest: build_snapshot(db_path, filters, digest))
+    return GraphSnapshot(snapshot_dir, manifest)
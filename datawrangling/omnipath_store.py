@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from config import SOURCES_DIR
+from datawrangling.array_store import file_digest, load_arrays, load_store, source_manifest, write_store
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+OMNIPATH_FILE = SOURCES_DIR / "omnipath" / "omnipath_interactions.txt"
+FLAG_COLUMNS = ('is_directed', 'is_stimulation', 'is_inhibition',
+                'consensus_direction', 'consensus_stimulation', 'consensus_inhibition')
+
+
+def store_path(omnipath_file):
+    """Directory of the binary store built from an OmniPath TSV."""
+    omnipath_file = Path(omnipath_file)
+    return omnipath_file.with_name(omnipath_file.stem + '.store')
+
+
+def _unicode_array(values):
+    return np.asarray(list(values), dtype=str) if len(values) else np.empty(0, dtype='U1')
+
+
+def build_store(omnipath_file=OMNIPATH_FILE, digest=None):
+    """Convert the OmniPath TSV into the binary store and return its manifest.
+
+    Proteins are kept once in a dictionary and the interactions as int32
+    source/target codes into it, the flag columns as one uint8 bitfield and
+    the sources strings dictionary-encoded. The references column is not kept.
+    """
+    omnipath_file = Path(omnipath_file)
+    store_dir = store_path(omnipath_file)
+    source = source_manifest(omnipath_file, digest or file_digest(omnipath_file))
+
+    header = pd.read_csv(omnipath_file, sep='\t', nrows=0).columns
+    flag_columns = [column for column in FLAG_COLUMNS if column in header]
+    usecols = ['source', 'target', *flag_columns] + (['sources'] if 'sources' in header else [])
+    omnipath_df = pd.read_csv(omnipath_file, sep='\t', usecols=usecols, dtype={'source': str, 'target': str})
+
+    proteins = pd.Categorical(np.concatenate([omnipath_df['source'].to_numpy(object),
+                                              omnipath_df['target'].to_numpy(object)]))
+    codes = proteins.codes.astype(np.int32).reshape(2, -1)
+
+    flags = np.zeros(len(omnipath_df), dtype=np.uint8)
+    for bit, column in enumerate(flag_columns):
+        flags |= (omnipath_df[column].fillna(0).to_numpy() == 1).astype(np.uint8) << bit
+
+    sources = pd.Categorical(omnipath_df['sources'] if 'sources' in omnipath_df else [None] * len(omnipath_df))
+
+    arrays = {
+        'proteins': _unicode_array(proteins.categories),
+        'source': codes[0],
+        'target': codes[1],
+        'flags': flags,
+        'sources': _unicode_array(sources.categories),
+        'sources_codes': sources.codes.astype(np.int32),
+    }
+    manifest = write_store(store_dir, arrays, {**source, 'rows': len(omnipath_df), 'flags': flag_columns})
+
+    logger.info(f"Built OmniPath store {store_dir} ({len(omnipath_df)} interactions, {len(proteins.categories)} proteins)")
+    return manifest
+
+
+class OmniPathStore:
+    """Memory-mapped OmniPath interactions.
+
+    `proteins` is the UniProt dictionary, `source` and `target` are int32
+    codes into it and `flags` holds one bit per column in `flag_columns`.
+    """
+
+    def __init__(self, store_dir, manifest):
+        self.store_dir = Path(store_dir)
+        self.manifest = manifest
+        self.flag_columns = list(manifest['flags'])
+        arrays = load_arrays(self.store_dir, manifest)
+        self.proteins = arrays['proteins']
+        self.source = arrays['source']
+        self.target = arrays['target']
+        self.flags = arrays['flags']
+        self._sources = arrays['sources']
+        self._sources_codes = arrays['sources_codes']
+
+    def __len__(self):
+        return len(self.source)
+
+    def flag(self, column):
+        """Boolean array of one flag column."""
+        if column not in self.flag_columns:
+            raise KeyError(f"OmniPath store has no flag column {column!r}")
+        return (self.flags >> self.flag_columns.index(column)) & 1 == 1
+
+    def frame(self, flags=('is_directed',), sources=False):
+        """The interactions as a DataFrame with categorical source and target columns.
+
+        The requested flag columns come back as 0/1 integers, like in the TSV,
+        and sources as a categorical column when asked for.
+        """
+        proteins = pd.Index(self.proteins, dtype=object)
+        columns = {
+            'source': pd.Categorical.from_codes(self.source, categories=proteins),
+            'target': pd.Categorical.from_codes(self.target, categories=proteins),
+        }
+        for column in flags:
+            if column in self.flag_columns:
+                columns[column] = self.flag(column).astype(np.int8)
+        if sources:
+            columns['sources'] = pd.Categorical.from_codes(self._sources_codes,
+                                                           categories=pd.Index(self._sources, dtype=object))
+        return pd.DataFrame(columns)
+
+
+def load_omnipath(omnipath_file=OMNIPATH_FILE):
+    """Open the binary store of an OmniPath TSV, (re)building it when the TSV changed.
+
+    The store is keyed by the sha256 of the TSV. While the file's size and
+    mtime match the manifest the hash is not recomputed; a newly downloaded
+    file with different content triggers a rebuild.
+    """
+    omnipath_file = Path(omnipath_file)
+    if not omnipath_file.exists():
+        raise FileNotFoundError(f"OmniPath file not found: {omnipath_file}")
+
+    store_dir = store_path(omnipath_file)
+    manifest = load_store(omnipath_file, store_dir, lambda digest: build_store(omnipath_file, digest))
+    return OmniPathStore(store_dir, manifest)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    store = load_omnipath()
+    logger.info(f"OmniPath store ready: {len(store)} interactions, {len(store.proteins)} proteins")
@@ -95,17 +95,12 @@ def convert_kegg_source():
     kegg_edges = kegg_parser.read_edges("hsa04216.xml")
     kegg_id_list = kegg_parser.extract_gene_ids(kegg_src)
 
-    rows = []
-    for k, v in kegg_src.items():
-        display_name = v['display_name'][0] if isinstance(v['display_name'], list) else v['display_name']
-        display_name = display_name.rstrip('.')
-        kegg_item = v['kegg_id']
-
-        if 'path' in kegg_item or 'undefined' in kegg_item:
-            continue
-
-        kegg_res = kegg.get_molecule_info(kegg_item)
+    entries = [(k, v['kegg_id']) for k, v in kegg_src.items()
+               if 'path' not in v['kegg_id'] and 'undefined' not in v['kegg_id']]
+    kegg_results = kegg.get_molecules_info([kegg_item for _, kegg_item in entries])
 
+    rows = []
+    for (k, kegg_item), kegg_res in zip(entries, kegg_results):
         for node_info in kegg_res:
             df_dict = convert_kegg(node_info, k, kegg_item)
             if df_dict:
@@ -168,9 +163,10 @@ def convert_kegg_source():
                 is_primary = 1 if row['primary_id_type'] == key else 0
                 db_api.insert_node_identifier(node_id, key, value, is_primary)
 
-    for idx, row in edge_df.iterrows():
-        edge_dict = row.to_dict()
-        source_dict = db_api.get_node(row.interactor_a_node_name)
-        target_dict = db_api.get_node(row.interactor_b_node_name)
-        db_api.insert_edge(source_dict, target_dict, edge_dict)
+    edges_to_insert = []
+    for edge_dict in edge_df.to_dict('records'):
+        source_dict = db_api.get_node(edge_dict['interactor_a_node_name'])
+        target_dict = db_api.get_node(edge_dict['interactor_b_node_name'])
+        edges_to_insert.append((source_dict, target_dict, edge_dict))
+    db_api.insert_edges(edges_to_insert)
     db_api.save_db_to_file(str(DB_DESTINATION))
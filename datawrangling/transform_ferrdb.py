@@ -7,21 +7,34 @@ import pandas as pd
 from database.sqlite_db_api3 import PsimiSQL
 
 
-def get_node_dict(identifier, db_api, edge_node_dict, mygene, alias_map=None):
-    # MODIFICATION: check alias_map for merged node names
-    if alias_map and identifier in alias_map:
-        identifier = alias_map[identifier]
+def _find_node(identifier, db_api, edge_node_dict):
     node_dict = db_api.get_node_by_any_identifier(identifier)
     if node_dict:
         return node_dict
     try:
-        node_dict = db_api.get_node_by_any_identifier(edge_node_dict[identifier.lower()])
-        if node_dict:
-            return node_dict
+        return db_api.get_node_by_any_identifier(edge_node_dict[identifier.lower()])
     except:
-        pass
+        return None
+
+
+def query_unresolved_genes(identifiers, db_api, edge_node_dict, mygene, alias_map=None):
+    """MyGene responses of the identifiers the database cannot resolve, queried concurrently."""
+    if alias_map:
+        identifiers = [alias_map.get(identifier, identifier) for identifier in identifiers]
+    unresolved = [identifier for identifier in dict.fromkeys(identifiers)
+                  if not _find_node(identifier, db_api, edge_node_dict)]
+    return mygene.query_genes(unresolved, return_exceptions=True)
+
+
+def get_node_dict(identifier, db_api, edge_node_dict, mygene_hits, alias_map=None):
+    # MODIFICATION: check alias_map for merged node names
+    if alias_map and identifier in alias_map:
+        identifier = alias_map[identifier]
+    node_dict = _find_node(identifier, db_api, edge_node_dict)
+    if node_dict:
+        return node_dict
     try:
-        uniprot_id = mygene.query_gene(identifier)['hits'][0]['uniprot']['Swiss-Prot']
+        uniprot_id = mygene_hits[identifier]['hits'][0]['uniprot']['Swiss-Prot']
         node_dict = db_api.get_node_by_any_identifier(uniprot_id)
         if node_dict:
             return node_dict
@@ -201,9 +214,12 @@ def convert_ferrdb_source():
                 db_api.insert_node_identifier(node_id, key, value, is_primary)
 
     # MODIFICATION: pass alias_map to get_node_dict for edge resolution
+    mygene_hits = query_unresolved_genes(final_edges.source.tolist() + final_edges.target.tolist(),
+                                         db_api, edge_node_dict, mygene, alias_map)
+    edges_to_insert = []
     for idx, row in final_edges.iterrows():
-        source_dict = get_node_dict(row.source, db_api, edge_node_dict, mygene, alias_map)
-        target_dict = get_node_dict(row.target, db_api, edge_node_dict, mygene, alias_map)
+        source_dict = get_node_dict(row.source, db_api, edge_node_dict, mygene_hits, alias_map)
+        target_dict = get_node_dict(row.target, db_api, edge_node_dict, mygene_hits, alias_map)
         if not source_dict or not target_dict:
             print(f'Skipping {row.source} -> {row.target}: missing nodes')
             continue
@@ -217,5 +233,6 @@ def convert_ferrdb_source():
             'layer': "ferrdb_pw",
             'source_db': 'ferrdb'
         }
-        db_api.insert_edge(source_dict, target_dict, edge_dict)
+        edges_to_insert.append((source_dict, target_dict, edge_dict))
+    db_api.insert_edges(edges_to_insert)
     db_api.save_db_to_file(str(DB_DESTINATION))
@@ -89,6 +89,8 @@ def save_to_database(output_path, parser):
     print("Inserting edges and experiments")
     unique_id_to_edge_ids = defaultdict(list)
 
+    edges_to_insert = []
+    edge_unique_ids = []
     for edge_dict in parser.edges:
         a_ferreg_id = edge_dict['interactor_a_node_name']
         b_ferreg_id = edge_dict['interactor_b_node_name']
@@ -104,24 +106,28 @@ def save_to_database(output_path, parser):
                 'effect_on_ferroptosis': edge_dict['effect_on_ferroptosis'],
                 'source_db': edge_dict['source_db']
             }
-            db_api.insert_edge(source_node, target_node, db_edge_dict)
-            db_api.cursor.execute("SELECT last_insert_rowid()")
-            edge_id = db_api.cursor.fetchone()[0]
-            unique_id = edge_dict['_unique_id_']
+            edges_to_insert.append((source_node, target_node, db_edge_dict))
+            edge_unique_ids.append(edge_dict['_unique_id_'])
+
+    edge_ids = db_api.insert_edges(edges_to_insert)
 
-            # Insert experiment
-            if unique_id in parser.experiments:
-                experiment_dict = parser.experiments[unique_id].copy()
-                experiment_dict['edge_id'] = edge_id
-                db_api.insert_experiment_model(experiment_dict)
+    experiments = []
+    for edge_id, unique_id in zip(edge_ids, edge_unique_ids):
+        # Insert experiment
+        if unique_id in parser.experiments:
+            experiment_dict = parser.experiments[unique_id].copy()
+            experiment_dict['edge_id'] = edge_id
+            experiments.append(experiment_dict)
 
-            # Store mapping
-            unique_id_to_edge_ids[unique_id].append(edge_id)
+        # Store mapping
+        unique_id_to_edge_ids[unique_id].append(edge_id)
+    db_api.insert_experiment_models(experiments)
 
     # MODIFICATION: Correct disease-edge association
     print("Inserting disease-edge associations")
     disease_edge_count = 0
     edge_disease_pairs = set()  # Track unique pairs to avoid duplicates
+    disease_edges = []
 
     for unique_id, edge_ids in unique_id_to_edge_ids.items():
         # Find the disease for this unique_id (should be only one)
@@ -146,7 +152,7 @@ def save_to_database(output_path, parser):
                             'reference': '',
                             'source_db': "FerReg"
                         }
-                        db_api.insert_disease_edge(disease_edge_dict)
+                        disease_edges.append(disease_edge_dict)
                         edge_disease_pairs.add(pair)
                         disease_edge_count += 1
 
@@ -156,6 +162,7 @@ def save_to_database(output_path, parser):
         if not disease_found and unique_id_to_edge_ids[unique_id]:
             print(f"No disease found for unique_id {unique_id} with {len(edge_ids)} edges")
 
+    db_api.insert_disease_edges(disease_edges)
     print(f"Created {disease_edge_count} disease-edge associations")
     print(f"Unique disease-edge pairs: {len(edge_disease_pairs)}")
 
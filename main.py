@@ -6,14 +6,15 @@ from database.merger import merger_sources
 from database.merger_disease import migrate_metadata
 from datawrangling.edges_from_omnipath import extend_merged_db_with_omnipath
 
-# converts the source files to SQL schemas
-sources_to_sql_schema()
-# convert sql data into unified SQL schema
-convert_kegg_source()
-convert_ferrdb_source()
-convert_ferreg_source()
-# merges the unifiely formatted datafiles
-merger_sources()
-migrate_metadata()
-# looks for new edges in OmniPath database
-extend_merged_db_with_omnipath()
+if __name__ == "__main__":
+    # converts the source files to SQL schemas
+    sources_to_sql_schema()
+    # convert sql data into unified SQL schema
+    convert_kegg_source()
+    convert_ferrdb_source()
+    convert_ferreg_source()
+    # merges the unifiely formatted datafiles
+    merger_sources()
+    migrate_metadata()
+    # looks for new edges in OmniPath database
+    extend_merged_db_with_omnipath()
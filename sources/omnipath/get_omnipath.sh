@@ -8,6 +8,8 @@ curl -# -o "$OUTPUT_FILE" "$URL"
 
 if [ $? -eq 0 ]; then
     echo "Download completed"
+    # rebuild the binary interaction store for the new file
+    (cd "${SCRIPT_DIR}/../.." && python -m datawrangling.omnipath_store)
 else
     echo "Download failed"
     exit 1
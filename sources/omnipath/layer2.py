@@ -1,4 +1,4 @@
-import apicalls.api_oop as api
+import apicalls as api
 import pandas as pd
 from database.sqlite_db_api import PsimiSQL
 
@@ -1,4 +1,4 @@
-import apicalls.api_oop as api
+import apicalls as api
 import pandas as pd
 from config import OUTPUTS_DIR, SOURCES_DIR, PROJECT_ROOT
 from database.sqlite_db_api import PsimiSQL
@@ -9,12 +9,9 @@ core_df = pd.read_csv(OUTPUTS_DIR / "nodes_NO_op.csv")
 
 core_df['tax_id'] = 9606
 reactome_client = api.ReactomeClient()
-pathways = []
-for idx, row in core_df.iterrows():
-    print(row.uniprot_id)
-    pathways.append(reactome_client.map_protein_to_pathways(row.uniprot_id))
+pathways = reactome_client.map_proteins_to_pathways(core_df.uniprot_id.tolist())
 
-core_df['pathways'] = pathways
+core_df['pathways'] = core_df.uniprot_id.map(pathways)
 core_df['pathways'] = core_df['pathways'].apply(lambda x: ';'.join(x))
 core_df.to_csv(OUTPUTS_DIR / "nodes_w_pw.csv")
 
@@ -0,0 +1,62 @@
+import random
+from collections import deque
+import pytest
+from datawrangling.adjacency import CSRAdjacency, pair_distances
+
+
+def _random_graph(rng, node_count, edge_count):
+    labels = [f"N{index}" for index in range(node_count)]
+    edges = [(rng.choice(labels), rng.choice(labels)) for _ in range(edge_count)]
+    return labels, edges
+
+
+def _reference_distance(edges, source, target, direction):
+    """Plain BFS over an adjacency dict."""
+    neighbors = {}
+    for edge_source, edge_target in edges:
+        if direction in ('out', 'both'):
+            neighbors.setdefault(edge_source, []).append(edge_target)
+        if direction in ('in', 'both'):
+            neighbors.setdefault(edge_target, []).append(edge_source)
+    known = {node for edge in edges for node in edge}
+    if source not in known or target not in known:
+        return -1
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        if node == target:
+            return distances[node]
+        for neighbor in neighbors.get(node, ()):
+            if neighbor not in distances:
+                distances[neighbor] = distances[node] + 1
+                queue.append(neighbor)
+    return -1
+
+
+def _check(rng, node_count, edge_count, pair_count, max_workers=1):
+    labels, edges = _random_graph(rng, node_count, edge_count)
+    adjacency = CSRAdjacency([source for source, _ in edges], [target for _, target in edges])
+    # include labels that are not in the graph
+    candidates = labels + ['missing']
+    pairs = [(rng.choice(candidates), rng.choice(candidates)) for _ in range(pair_count)]
+    sources, targets = [source for source, _ in pairs], [target for _, target in pairs]
+
+    for direction in ('out', 'in', 'both'):
+        expected = [_reference_distance(edges, source, target, direction) for source, target in pairs]
+        distances = pair_distances(adjacency, sources, targets, direction, max_workers=max_workers)
+        assert distances.tolist() == expected, direction
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pair_distances_match_reference_bfs(seed):
+    _check(random.Random(seed), node_count=30, edge_count=40, pair_count=200)
+
+
+def test_pair_distances_more_than_one_source_block():
+    # far more than 64 distinct sources, on a sparse graph with long paths
+    _check(random.Random(10), node_count=300, edge_count=330, pair_count=2000)
+
+
+def test_pair_distances_with_worker_processes():
+    _check(random.Random(20), node_count=200, edge_count=260, pair_count=1500, max_workers=2)
@@ -0,0 +1,40 @@
+import threading
+import numpy as np
+from datawrangling import array_store
+from datawrangling.array_store import load_arrays, read_manifest, write_store
+
+
+def test_overlapping_builds_keep_the_newer_version(tmp_path, monkeypatch):
+    first_saving = threading.Event()
+    second_done = threading.Event()
+    save = np.save
+
+    def slow_first_save(path, array):
+        if array[0] == 1 and not second_done.is_set():
+            first_saving.set()
+            second_done.wait(5)
+        save(path, array)
+
+    monkeypatch.setattr(array_store.np, 'save', slow_first_save)
+    results = {}
+    first = threading.Thread(target=lambda: results.update(
+        first=write_store(tmp_path, {'a': np.array([1]), 'b': np.array([1])}, {'build': 1})))
+    first.start()
+    first_saving.wait(5)
+    results['second'] = write_store(tmp_path, {'a': np.array([2]), 'b': np.array([2])}, {'build': 2})
+    second_done.set()
+    first.join()
+
+    manifest = read_manifest(tmp_path)
+    assert manifest['build'] == 2
+    assert results['first'] == results['second'] == manifest
+    assert load_arrays(tmp_path, manifest)['a'][0] == 2
+    assert [entry.name for entry in tmp_path.iterdir() if entry.is_dir()] == [manifest['version']]
+
+
+def test_new_version_replaces_and_removes_the_previous_one(tmp_path):
+    first = write_store(tmp_path, {'a': np.arange(3)}, {})
+    second = write_store(tmp_path, {'a': np.arange(4)}, {})
+    assert read_manifest(tmp_path) == second
+    assert not (tmp_path / first['version']).exists()
+    assert len(load_arrays(tmp_path, second)['a']) == 4
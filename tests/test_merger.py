@@ -0,0 +1,100 @@
+import shutil
+import sqlite3
+from config import PROJECT_ROOT
+from database import merger
+from database.sqlite_db_api3 import PsimiSQL
+
+
+SQL_SEED = PROJECT_ROOT / "database" / "network_db_seed3.sql"
+MERGED_DB = "merged_ferroptosis_network.db"
+
+
+def _write_source(db_file, nodes, edges):
+    """Source database of nodes ({name, uniprot_id?, ...}) and edges ((name_a, name_b, edge_dict))."""
+    db_api = PsimiSQL(SQL_SEED)
+    node_dicts = {}
+    for node in nodes:
+        node_dict = {'tax_id': 9606, 'primary_id_type': 'uniprot_id', 'pathways': '', 'function': '', **node}
+        node_dicts[node_dict['name']] = node_dict
+    db_api.insert_nodes(node_dicts.values())
+    db_api.insert_edges([(node_dicts[name_a], node_dicts[name_b], edge_dict) for name_a, name_b, edge_dict in edges])
+    if db_file.exists():
+        db_file.unlink()
+    db_api.save_db_to_file(str(db_file))
+
+
+def _edge(interaction_types, source_db, layer='1', effect=''):
+    return {'interaction_types': interaction_types, 'source_db': source_db, 'layer': layer,
+            'effect_on_ferroptosis': effect}
+
+
+def _tables(db_file):
+    db = sqlite3.connect(db_file)
+    try:
+        return {
+            'node': sorted(db.execute("""
+                SELECT name, primary_id_type, display_name, tax_id, type, pathways, role_in_ferroptosis, function,
+                       source_db
+                FROM node
+            """)),
+            'node_identifier': sorted(db.execute("""
+                SELECT n.name, ni.id_type, ni.id_value, ni.is_primary
+                FROM node_identifier ni JOIN node n ON n.id = ni.node_id
+            """)),
+            'edge': sorted(db.execute("""
+                SELECT interactor_a_node_name, interactor_b_node_name, layer, source_db, interaction_types,
+                       effect_on_ferroptosis
+                FROM edge
+            """)),
+        }
+    finally:
+        db.close()
+
+
+def test_incremental_merge_matches_full_merge(tmp_path, monkeypatch):
+    outputs = tmp_path / "outputs"
+    outputs.mkdir()
+    monkeypatch.setattr(merger, 'OUTPUTS_DIR', outputs)
+
+    _write_source(outputs / "kegg.db", [
+        {'name': 'P1', 'uniprot_id': 'P1', 'source_db': 'KEGG'},
+        {'name': 'P2', 'uniprot_id': 'P2', 'source_db': 'KEGG'},
+        {'name': 'P3', 'uniprot_id': 'P3', 'source_db': 'KEGG'},
+    ], [
+        ('P1', 'P2', _edge('is_directed:true', 'KEGG')),
+        ('P2', 'P3', _edge('is_directed:false', 'KEGG')),
+    ])
+    _write_source(outputs / "ferrdb_network.db", [
+        {'name': 'GPX4', 'uniprot_id': 'P1', 'role_in_ferroptosis': 'suppressor', 'source_db': 'FerrDb'},
+        {'name': 'ACSL4', 'uniprot_id': 'P4', 'role_in_ferroptosis': 'driver', 'source_db': 'FerrDb'},
+        {'name': 'P2', 'uniprot_id': 'P2', 'source_db': 'FerrDb'},
+        {'name': 'P3', 'uniprot_id': 'P3', 'source_db': 'FerrDb'},
+    ], [
+        ('GPX4', 'ACSL4', _edge('is_directed:true', 'FerrDb', effect='inhibits')),
+        ('P3', 'P2', _edge('is_directed:false', 'FerrDb')),
+        ('ACSL4', 'P3', _edge('is_directed:false', 'FerrDb')),
+    ])
+    merger.merger_sources()
+
+    # change a node, drop a node with its edge, and add a node and an edge
+    _write_source(outputs / "ferrdb_network.db", [
+        {'name': 'GPX4', 'uniprot_id': 'P1', 'role_in_ferroptosis': 'suppressor|marker', 'source_db': 'FerrDb'},
+        {'name': 'ACSL4', 'uniprot_id': 'P4', 'role_in_ferroptosis': 'driver', 'source_db': 'FerrDb'},
+        {'name': 'SLC7A11', 'uniprot_id': 'P5', 'role_in_ferroptosis': 'suppressor', 'source_db': 'FerrDb'},
+    ], [
+        ('GPX4', 'ACSL4', _edge('is_directed:true', 'FerrDb', effect='inhibits')),
+        ('SLC7A11', 'GPX4', _edge('is_directed:true', 'FerrDb', effect='promotes')),
+    ])
+    merger.merger_sources()
+
+    full_outputs = tmp_path / "full"
+    full_outputs.mkdir()
+    for source in ("kegg.db", "ferrdb_network.db"):
+        shutil.copy(outputs / source, full_outputs / source)
+    monkeypatch.setattr(merger, 'OUTPUTS_DIR', full_outputs)
+    merger.merger_sources(incremental=False)
+
+    incremental_tables = _tables(outputs / MERGED_DB)
+    assert incremental_tables == _tables(full_outputs / MERGED_DB)
+    assert ('P2', 'P3', '1', 'KEGG', 'is_directed:false', '') in incremental_tables['edge']
+    assert not any('ACSL4' in edge[:2] and 'P3' in edge[:2] for edge in incremental_tables['edge'])
@@ -0,0 +1,43 @@
+import random
+from database.resolver import EntityResolver
+
+
+RECORDS = [
+    # (identifiers, name, priority)
+    ({'uniprot_id': 'P1'}, 'GPX4', 1),
+    ({'uniprot_id': 'P1', 'hgnc_id': 'H1'}, 'P1', 0),
+    ({'hgnc_id': 'H1'}, 'HGNC:1', 0),
+    ({'uniprot_id': 'P2'}, 'ACSL4', 2),
+    ({'uniprot_id': 'P2', 'entrez_id': 'E2'}, 'ACSL4', 1),
+    ({'entrez_id': 'E2'}, 'ACSL4', 1),
+    ({'uniprot_id': 'P3'}, 'TFRC', 0),
+]
+
+
+def _groups(records, typed=True):
+    """Components as lists of records, sorted by their first record."""
+    resolver = EntityResolver(typed=typed)
+    for identifiers, name, priority in records:
+        resolver.add(identifiers, name=name, priority=priority)
+    groups = [[records[record] for record in group] for group in resolver.components()]
+    return sorted(groups, key=lambda group: repr(group[0]))
+
+
+def test_components_do_not_depend_on_insertion_order():
+    for typed in (True, False):
+        expected = _groups(RECORDS, typed)
+        records = list(RECORDS)
+        for seed in range(20):
+            random.Random(seed).shuffle(records)
+            assert _groups(records, typed) == expected
+        assert _groups(RECORDS[::-1], typed) == expected
+
+
+def test_lowest_priority_then_smallest_name_comes_first():
+    groups = {group[0][1]: [(name, priority) for _, name, priority in group] for group in _groups(RECORDS)}
+
+    assert groups == {
+        'HGNC:1': [('HGNC:1', 0), ('P1', 0), ('GPX4', 1)],
+        'ACSL4': [('ACSL4', 1), ('ACSL4', 1), ('ACSL4', 2)],
+        'TFRC': [('TFRC', 0)],
+    }
@@ -0,0 +1,45 @@
+import sqlite3
+import pytest
+from config import PROJECT_ROOT
+from database.sqlite_db_api3 import PsimiSQL
+
+
+SQL_SEED = PROJECT_ROOT / "database" / "network_db_seed3.sql"
+
+
+def test_insert_identifiers_overwrite_then_new_identifier():
+    db_api = PsimiSQL(SQL_SEED)
+    node_1, node_2 = db_api.insert_nodes([{'name': 'N1', 'tax_id': 9606}, {'name': 'N2', 'tax_id': 9606}])
+    db_api.insert_identifiers([(node_1, 'uniprot_id', 'P1', 1)])
+    db_api.build_node_index()
+
+    db_api.insert_identifiers([(node_1, 'uniprot_id', 'P1new', 1), (node_2, 'gene', 'G2', 0)])
+
+    assert db_api.get_node_by_any_identifier('P1new')['id'] == node_1
+    assert db_api.get_node_by_any_identifier('G2')['id'] == node_2
+    assert db_api.get_node_by_any_identifier('P1') is None
+
+
+def test_blank_identifier_value_deletes_existing_identifier():
+    db_api = PsimiSQL(SQL_SEED)
+    node_id, = db_api.insert_nodes([{'name': 'N1', 'tax_id': 9606}])
+    db_api.insert_identifiers([(node_id, 'uniprot_id', 'P1', 1), (node_id, 'hgnc_id', 'H1', 0)])
+    db_api.build_node_index()
+
+    db_api.insert_identifiers([(node_id, 'uniprot_id', '-', 1), (node_id, 'hgnc_id', '', 0)])
+
+    assert db_api.get_node_identifiers(node_id) == {}
+    assert db_api.get_node_by_any_identifier('P1') is None
+
+
+def test_insert_nodes_is_atomic():
+    db_api = PsimiSQL(SQL_SEED)
+    db_api.db.execute("""
+        CREATE TRIGGER fail_identifier BEFORE INSERT ON node_identifier WHEN NEW.id_value = 'boom'
+        BEGIN SELECT RAISE(ABORT, 'boom'); END
+    """)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db_api.insert_nodes([{'name': 'N1', 'tax_id': 9606, 'primary_id_type': 'uniprot_id', 'uniprot_id': 'boom'}])
+
+    assert db_api.db.execute("SELECT COUNT(*) FROM node").fetchone()[0] == 0
@@ -0,0 +1,116 @@
+from config import PROJECT_ROOT
+from database.sqlite_db_api3 import PsimiSQL
+
+
+SQL_SEED = PROJECT_ROOT / "database" / "network_db_seed3.sql"
+
+
+def _nodes(db_api, *names):
+    node_ids = db_api.insert_nodes([{'name': name, 'tax_id': 9606} for name in names])
+    return [{'id': node_id, 'name': name} for node_id, name in zip(node_ids, names)]
+
+
+def _edge(interaction_types, source_db='DB1', layer='1', effect=''):
+    return {'interaction_types': interaction_types, 'source_db': source_db, 'layer': layer,
+            'effect_on_ferroptosis': effect}
+
+
+def _edges(db_api):
+    return db_api.db.execute("""
+        SELECT interactor_a_node_name, interactor_b_node_name, layer, source_db, interaction_types, effect_on_ferroptosis
+        FROM edge ORDER BY id
+    """).fetchall()
+
+
+def test_undirected_reverse_edge_merges_into_stored_edge():
+    db_api = PsimiSQL(SQL_SEED)
+    a, b = _nodes(db_api, 'A', 'B')
+    first, = db_api.upsert_edges([(a, b, _edge('is_directed:false', 'DB1'))])
+
+    second, = db_api.upsert_edges([(b, a, _edge('is_directed:false', 'DB2'))])
+
+    assert second == first
+    assert _edges(db_api) == [('A', 'B', '1', 'DB1|DB2', 'is_directed:false', '')]
+
+
+def test_undirected_reverse_edge_merges_within_one_batch():
+    db_api = PsimiSQL(SQL_SEED)
+    a, b = _nodes(db_api, 'A', 'B')
+
+    edge_ids = db_api.upsert_edges([
+        (a, b, _edge('is_directed:false', 'DB1')),
+        (b, a, _edge('is_directed:false', 'DB2')),
+    ])
+
+    assert edge_ids[0] == edge_ids[1]
+    assert _edges(db_api) == [('A', 'B', '1', 'DB1|DB2', 'is_directed:false', '')]
+
+
+def test_directed_edges_keep_their_direction():
+    db_api = PsimiSQL(SQL_SEED)
+    a, b = _nodes(db_api, 'A', 'B')
+
+    forward, backward = db_api.upsert_edges([
+        (a, b, _edge('is_directed:true', 'DB1')),
+        (b, a, _edge('is_directed:true', 'DB2')),
+    ])
+    # an undirected edge does not merge into a directed one stored the other way round
+    undirected, = db_api.upsert_edges([(b, a, _edge('is_directed:false', 'DB3'))])
+
+    assert len({forward, backward}) == 2
+    assert undirected == backward
+    assert _edges(db_api) == [
+        ('A', 'B', '1', 'DB1', 'is_directed:true', ''),
+        ('B', 'A', '1', 'DB2|DB3', 'is_directed:false|is_directed:true', ''),
+    ]
+
+
+def test_layers_are_separate_edges():
+    db_api = PsimiSQL(SQL_SEED)
+    a, b = _nodes(db_api, 'A', 'B')
+
+    edge_ids = db_api.upsert_edges([
+        (a, b, _edge('is_directed:false', layer='1')),
+        (b, a, _edge('is_directed:false', layer='2')),
+    ])
+
+    assert len(set(edge_ids)) == 2
+    assert [edge[:3] for edge in _edges(db_api)] == [('A', 'B', '1'), ('B', 'A', '2')]
+
+
+def test_pipe_delimited_fields_merge_across_batch_and_calls():
+    db_api = PsimiSQL(SQL_SEED)
+    a, b = _nodes(db_api, 'A', 'B')
+
+    db_api.upsert_edges([
+        (a, b, _edge('is_directed:true|is_direct:true', 'DB2|DB1', effect='promotes')),
+        (a, b, _edge('is_directed:true|-', 'DB1', effect='')),
+    ])
+    db_api.upsert_edges([(a, b, _edge('is_directed:true|is_stimulation:true', 'DB3', effect='-|inhibits'))])
+
+    assert _edges(db_api) == [(
+        'A', 'B', '1', 'DB1|DB2|DB3',
+        'is_direct:true|is_directed:true|is_stimulation:true',
+        'inhibits|promotes',
+    )]
+    attributes = db_api.db.execute("SELECT key, value FROM edge_attribute ORDER BY key, value").fetchall()
+    assert ('is_stimulation', 'true') in attributes
+    assert ('source_db', 'DB3') in attributes
+
+
+def test_edge_key_index_is_created_on_first_upsert(tmp_path):
+    db_file = tmp_path / "network.db"
+    db_api = PsimiSQL(SQL_SEED)
+    a, b = _nodes(db_api, 'A', 'B')
+    db_api.insert_edges([(a, b, _edge('is_directed:true', 'DB1'))])
+    db_api.save_db_to_file(str(db_file))
+
+    db_api = PsimiSQL(SQL_SEED)
+    db_api.import_from_db_file(str(db_file))
+    index_query = "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_edge_key'"
+    assert db_api.db.execute(index_query).fetchone() is None
+
+    db_api.upsert_edges([(a, b, _edge('is_directed:true', 'DB2'))])
+
+    assert db_api.db.execute(index_query).fetchone() is not None
+    assert _edges(db_api) == [('A', 'B', '1', 'DB1|DB2', 'is_directed:true', '')]
@@ -1,89 +1,57 @@
+import pandas as pd
 from database.external_db import DBconnector
+from database.network_query import NetworkQuery
 from config import OUTPUTS_DIR
 
 db = DBconnector(OUTPUTS_DIR / 'merged_ferroptosis_w_omnipath.db')
+network = NetworkQuery(OUTPUTS_DIR / 'merged_ferroptosis_w_omnipath.db')
 
-# 1. All GBM-associated edges with full node info
-gbm_edges = db.query_to_dataframe("""
-    SELECT
-        e.interactor_a_node_name as source_id,
-        e.interactor_b_node_name as target_id,
-        n1.display_name as source_display,
-        n2.display_name as target_display,
-        n1.type as source_type,
-        n2.type as target_type,
-        n1.role_in_ferroptosis as source_role,
-        n2.role_in_ferroptosis as target_role,
-        e.interaction_types,
-        e.layer,
-        e.source_db
-    FROM disease_edge de
-    JOIN disease d ON de.disease_id = d.id
-    JOIN edge e ON de.edge_id = e.id
-    JOIN node n1 ON e.interactor_a_node_name = n1.name
-    JOIN node n2 ON e.interactor_b_node_name = n2.name
-    WHERE d.disease_id = 'ICD-11: 2A00'
-""")
-
-# 2. Unique GBM nodes categorized by type
-gbm_nodes = db.query_to_dataframe("""
-    SELECT DISTINCT
-        n.name, n.display_name, n.type,
-        n.role_in_ferroptosis, n.source_db
-    FROM disease_edge de
-    JOIN disease d ON de.disease_id = d.id
-    JOIN edge e ON de.edge_id = e.id
-    JOIN node n ON n.name IN (e.interactor_a_node_name, e.interactor_b_node_name)
-    WHERE d.disease_id = 'ICD-11: 2A00'
-""")
+# 1. All GBM-associated edges with full node info, 2. unique GBM nodes
+gbm_nodes, gbm_subnetwork_edges = network.disease_subnetwork('ICD-11: 2A00')
+gbm_edges = gbm_subnetwork_edges.rename(columns={'source': 'source_id', 'target': 'target_id'})[[
+    'source_id', 'target_id', 'source_display', 'target_display', 'source_type', 'target_type',
+    'source_role', 'target_role', 'interaction_types', 'is_direct', 'layer', 'source_db']]
 
 # 3. Which GBM proteins sit in which ferroptosis layer
-gbm_protein_layers = db.query_to_dataframe("""
-    SELECT DISTINCT
-        n.name, n.display_name, n.role_in_ferroptosis, e.layer,
-        CASE WHEN n.source_db LIKE '%KEGG%' THEN 1 ELSE 0 END as is_kegg_core
-    FROM disease_edge de
-    JOIN disease d ON de.disease_id = d.id
-    JOIN edge e ON de.edge_id = e.id
-    JOIN node n ON n.name IN (e.interactor_a_node_name, e.interactor_b_node_name)
-    WHERE d.disease_id = 'ICD-11: 2A00'
-    AND n.type = 'protein'
-""")
+kegg_core = set(db.query_to_dataframe("""
+    SELECT n.name FROM node_source ns
+    JOIN node n ON n.id = ns.node_id
+    WHERE ns.source_db = 'KEGG'
+""").name)
+gbm_protein_layers = gbm_nodes[gbm_nodes.type == 'protein'].assign(
+    layer=lambda df: df.layers.str.split('|'),
+    is_kegg_core=lambda df: df.name.isin(kegg_core).astype(int),
+).explode('layer')[['name', 'display_name', 'role_in_ferroptosis', 'layer', 'is_kegg_core']]
 
 # 4. Compound -> direct target (within GBM subnetwork)
-gbm_compound_targets = db.query_to_dataframe("""
-    SELECT DISTINCT
-        n1.display_name as compound,
-        n2.display_name as direct_target,
-        n2.name as target_uniprot,
-        n2.role_in_ferroptosis as target_role,
-        e.interaction_types as compound_effect,
-        e.layer
-    FROM disease_edge de
-    JOIN disease d ON de.disease_id = d.id
-    JOIN edge e ON de.edge_id = e.id
-    JOIN node n1 ON e.interactor_a_node_name = n1.name
-    JOIN node n2 ON e.interactor_b_node_name = n2.name
-    WHERE d.disease_id = 'ICD-11: 2A00'
-    AND n1.type = 'small_molecule'
-""")
+compound_edges = gbm_subnetwork_edges[gbm_subnetwork_edges.source_type == 'small_molecule']
+gbm_compound_targets = pd.DataFrame({
+    'compound': compound_edges.source_display,
+    'direct_target': compound_edges.target_display,
+    'target_uniprot': compound_edges.target,
+    'target_role': compound_edges.target_role,
+    'compound_effect': compound_edges.interaction_types,
+    'compound_is_direct': compound_edges.is_direct,
+    'layer': compound_edges.layer,
+}).drop_duplicates()
 
 # 5. Downstream of compound targets
 target_uniprots = gbm_compound_targets.target_uniprot.unique().tolist()
 if target_uniprots:
-    placeholders = ','.join([f"'{uid}'" for uid in target_uniprots])
-    downstream = db.query_to_dataframe(f"""
+    target_ids = db.temp_ids(target_uniprots, 'target_ids')
+    downstream = db.query_to_dataframe("""
         SELECT DISTINCT
             n_src.display_name as source_protein,
             n_dst.display_name as downstream_target,
             n_dst.type as downstream_type,
             n_dst.role_in_ferroptosis as downstream_role,
             e.interaction_types,
+            EXISTS (SELECT 1 FROM edge_attribute ea WHERE ea.edge_id = e.id AND ea.key = 'is_direct' AND ea.value = 'true') as is_direct,
             e.layer
         FROM edge e
         JOIN node n_src ON e.interactor_a_node_name = n_src.name
         JOIN node n_dst ON e.interactor_b_node_name = n_dst.name
-        WHERE e.interactor_a_node_name IN ({placeholders})
+        WHERE e.interactor_a_node_name IN target_ids
     """)
 
 print(f"GBM edges: {len(gbm_edges)}")
@@ -174,44 +142,46 @@ lipid_perox_ids = ['O60488', 'P16050', 'Q6P1A2', 'Q15366']
 gpx4_branch_ids = ['P36969', 'Q9UPY5']
 all_ids = lipid_perox_ids + gpx4_branch_ids
 
-all_placeholders = ','.join([f"'{uid}'" for uid in all_ids])
-branch_proteins = db.query_to_dataframe(f"""
+branch_ids = db.temp_ids(all_ids, 'branch_ids')
+branch_proteins = db.query_to_dataframe("""
     SELECT name, display_name, type, role_in_ferroptosis, source_db
     FROM node
-    WHERE name IN ({all_placeholders})
+    WHERE name IN branch_ids
 """)
 print(branch_proteins)
 
-lipid_placeholders = ','.join([f"'{uid}'" for uid in lipid_perox_ids])
-gpx4_placeholders = ','.join([f"'{uid}'" for uid in gpx4_branch_ids])
+lipid_ids = db.temp_ids(lipid_perox_ids, 'lipid_ids')
+gpx4_ids = db.temp_ids(gpx4_branch_ids, 'gpx4_ids')
 
 gbm_compound_names = gbm_compound_targets.compound.unique().tolist()
-compound_name_placeholders = ','.join([f"'{c}'" for c in gbm_compound_names])
+compound_names = db.temp_ids(gbm_compound_names, 'compound_names')
 
-direct_to_lipid = db.query_to_dataframe(f"""
+direct_to_lipid = db.query_to_dataframe("""
     SELECT DISTINCT
         n1.display_name as compound,
         n2.display_name as target,
         e.interaction_types,
+        EXISTS (SELECT 1 FROM edge_attribute ea WHERE ea.edge_id = e.id AND ea.key = 'is_direct' AND ea.value = 'true') as is_direct,
         e.layer
     FROM edge e
     JOIN node n1 ON e.interactor_a_node_name = n1.name
     JOIN node n2 ON e.interactor_b_node_name = n2.name
-    WHERE n1.display_name IN ({compound_name_placeholders})
-    AND e.interactor_b_node_name IN ({lipid_placeholders})
+    WHERE n1.display_name IN compound_names
+    AND e.interactor_b_node_name IN lipid_ids
 """)
 
-direct_to_gpx4 = db.query_to_dataframe(f"""
+direct_to_gpx4 = db.query_to_dataframe("""
     SELECT DISTINCT
         n1.display_name as compound,
         n2.display_name as target,
         e.interaction_types,
+        EXISTS (SELECT 1 FROM edge_attribute ea WHERE ea.edge_id = e.id AND ea.key = 'is_direct' AND ea.value = 'true') as is_direct,
         e.layer
     FROM edge e
     JOIN node n1 ON e.interactor_a_node_name = n1.name
     JOIN node n2 ON e.interactor_b_node_name = n2.name
-    WHERE n1.display_name IN ({compound_name_placeholders})
-    AND e.interactor_b_node_name IN ({gpx4_placeholders})
+    WHERE n1.display_name IN compound_names
+    AND e.interactor_b_node_name IN gpx4_ids
 """)
 
 print(f"\n=== Direct compound -> lipid peroxidation ===")
@@ -219,7 +189,7 @@ print(direct_to_lipid)
 print(f"\n=== Direct compound -> GPX4 branch ===")
 print(direct_to_gpx4)
 
-indirect_to_lipid = db.query_to_dataframe(f"""
+indirect_to_lipid = db.query_to_dataframe("""
     SELECT DISTINCT
         n_cpd.display_name as compound,
         n_mid.display_name as intermediate,
@@ -231,11 +201,11 @@ indirect_to_lipid = db.query_to_dataframe(f"""
     JOIN node n_cpd ON e1.interactor_a_node_name = n_cpd.name
     JOIN node n_mid ON e1.interactor_b_node_name = n_mid.name
     JOIN node n_lp ON e2.interactor_b_node_name = n_lp.name
-    WHERE n_cpd.display_name IN ({compound_name_placeholders})
-    AND e2.interactor_b_node_name IN ({lipid_placeholders})
+    WHERE n_cpd.display_name IN compound_names
+    AND e2.interactor_b_node_name IN lipid_ids
 """)
 
-indirect_to_gpx4 = db.query_to_dataframe(f"""
+indirect_to_gpx4 = db.query_to_dataframe("""
     SELECT DISTINCT
         n_cpd.display_name as compound,
         n_mid.display_name as intermediate,
@@ -247,8 +217,8 @@ indirect_to_gpx4 = db.query_to_dataframe(f"""
     JOIN node n_cpd ON e1.interactor_a_node_name = n_cpd.name
     JOIN node n_mid ON e1.interactor_b_node_name = n_mid.name
     JOIN node n_gpx ON e2.interactor_b_node_name = n_gpx.name
-    WHERE n_cpd.display_name IN ({compound_name_placeholders})
-    AND e2.interactor_b_node_name IN ({gpx4_placeholders})
+    WHERE n_cpd.display_name IN compound_names
+    AND e2.interactor_b_node_name IN gpx4_ids
 """)
 
 print(f"\n=== Indirect compound -> ? -> lipid peroxidation ===")
@@ -277,12 +247,6 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 
 
-def is_direct_interaction(interaction_types):
-    if not interaction_types:
-        return False
-    return 'is_direct:true' in interaction_types
-
-
 color_map = {
     'protein': '#4C72B0',
     'small_molecule': '#DD8452',
@@ -304,7 +268,7 @@ indirect_edges_1 = []
 for _, row in gbm_edges.iterrows():
     G1.add_edge(row.source_display, row.target_display)
     edge = (row.source_display, row.target_display)
-    if is_direct_interaction(row.interaction_types):
+    if row.is_direct:
         direct_edges_1.append(edge)
     else:
         indirect_edges_1.append(edge)
@@ -342,7 +306,7 @@ for _, row in gbm_compound_targets.iterrows():
     G2.add_node(row.direct_target, type='protein')
     edge = (row.compound, row.direct_target)
     G2.add_edge(*edge)
-    if is_direct_interaction(row.compound_effect):
+    if row.compound_is_direct:
         direct_edges_2.append(edge)
     else:
         indirect_edges_2.append(edge)
@@ -352,7 +316,7 @@ for _, row in downstream_filtered.iterrows():
         G2.add_node(row.downstream_target, type=row.downstream_type or 'protein')
         edge = (row.source_protein, row.downstream_target)
         G2.add_edge(*edge)
-        if is_direct_interaction(row.interaction_types):
+        if row.is_direct:
             direct_edges_2.append(edge)
         else:
             indirect_edges_2.append(edge)
@@ -405,7 +369,7 @@ indirect_edges_3 = []
 for _, row in direct_to_lipid.iterrows():
     edge = (row.compound, row.target)
     G3.add_edge(*edge)
-    if is_direct_interaction(row.interaction_types):
+    if row.is_direct:
         direct_edges_3.append(edge)
     else:
         indirect_edges_3.append(edge)
@@ -413,7 +377,7 @@ for _, row in direct_to_lipid.iterrows():
 for _, row in direct_to_gpx4.iterrows():
     edge = (row.compound, row.target)
     G3.add_edge(*edge)
-    if is_direct_interaction(row.interaction_types):
+    if row.is_direct:
         direct_edges_3.append(edge)
     else:
         indirect_edges_3.append(edge)
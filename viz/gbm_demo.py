@@ -1,42 +1,18 @@
 import sqlite3
 import pandas as pd
 from config import OUTPUTS_DIR
+from database.network_query import NetworkQuery
 
 
 db_path = OUTPUTS_DIR / "merged_ferroptosis_w_omnipath.db"
 conn = sqlite3.connect(db_path)
-
-
-def get_neighbors(conn, node_names):
-    if not node_names:
-        return set()
-    placeholders = ','.join(['?'] * len(node_names))
-    query = f"""
-        SELECT DISTINCT
-            CASE
-                WHEN interactor_a_node_name IN ({placeholders}) THEN interactor_b_node_name
-                ELSE interactor_a_node_name
-            END as neighbor
-        FROM edge
-        WHERE interactor_a_node_name IN ({placeholders})
-           OR interactor_b_node_name IN ({placeholders})
-    """
-    names = list(node_names)
-    df = pd.read_sql_query(query, conn, params=names * 3)
-    return set(df.neighbor.tolist())
+network = NetworkQuery(conn)
 
 
 # 1. Nodes directly on glioblastoma-associated edges
-direct_query = """
-    SELECT DISTINCT n.name, n.display_name, n.type, n.source_db, e.layer
-    FROM disease_edge de
-    JOIN disease d ON de.disease_id = d.id
-    JOIN edge e ON de.edge_id = e.id
-    JOIN node n ON n.name IN (e.interactor_a_node_name, e.interactor_b_node_name)
-    WHERE d.disease_id = 'ICD-11: 2A00'
-    AND n.type = 'protein'
-"""
-direct_nodes = pd.read_sql_query(direct_query, conn)
+gbm_nodes, gbm_edges = network.disease_subnetwork('ICD-11: 2A00')
+direct_nodes = gbm_nodes[gbm_nodes.type == 'protein'].assign(layer=lambda df: df.layers.str.split('|'))
+direct_nodes = direct_nodes.explode('layer')[['name', 'display_name', 'type', 'source_db', 'layer']]
 direct_names = set(direct_nodes.name.tolist())
 print(f"=== Direct glioblastoma-associated proteins: {len(direct_names)} ===")
 print(direct_nodes.to_string(index=False))
@@ -44,19 +20,13 @@ print()
 
 
 # 2. Indirect neighbors (1 intermediary)
-hop1_neighbors = get_neighbors(conn, direct_names) - direct_names
-hop2_neighbors = get_neighbors(conn, hop1_neighbors) - direct_names - hop1_neighbors
+hops = network.k_hop(direct_names, 2)
+hop2_nodes = hops[hops.hop == 2]
 
 # filter to proteins only
-if hop2_neighbors:
-    placeholders = ','.join(['?'] * len(hop2_neighbors))
-    hop2_query = f"""
-        SELECT DISTINCT name, display_name, type, source_db
-        FROM node
-        WHERE name IN ({placeholders})
-        AND type = 'protein'
-    """
-    indirect_df = pd.read_sql_query(hop2_query, conn, params=list(hop2_neighbors))
+if not hop2_nodes.empty:
+    indirect_df = hop2_nodes.loc[hop2_nodes.type == 'protein',
+                                 ['name', 'display_name', 'type', 'source_db']].drop_duplicates()
     print(f"=== Indirect GBM neighbors (via 1 intermediary): {len(indirect_df)} ===")
     print(indirect_df.head(20).to_string(index=False))
     print()
@@ -67,15 +37,17 @@ else:
 
 # 3. Distance from core ferroptosis nodes (KEGG source)
 kegg_query = """
-    SELECT DISTINCT name FROM node
-    WHERE source_db LIKE '%KEGG%'
-    AND primary_id_type = 'uniprot_id'
+    SELECT DISTINCT n.name FROM node_source ns
+    JOIN node n ON n.id = ns.node_id
+    WHERE ns.source_db = 'KEGG'
+    AND n.primary_id_type = 'uniprot_id'
 """
 kegg_core = set(pd.read_sql_query(kegg_query, conn).name.tolist())
 print(f"=== KEGG core ferroptosis proteins: {len(kegg_core)} ===")
 
 in_core = all_gbm_candidates & kegg_core
-on_hop1 = (all_gbm_candidates - kegg_core) & get_neighbors(conn, kegg_core)
+kegg_hops = network.k_hop(kegg_core, 1)
+on_hop1 = (all_gbm_candidates - kegg_core) & set(kegg_hops.name[kegg_hops.hop == 1])
 rest = all_gbm_candidates - kegg_core - on_hop1
 
 print(f"GBM candidates IN ferroptosis core: {len(in_core)}")
@@ -91,22 +63,16 @@ print()
 
 # 4. Compounds affecting GBM candidates
 if all_gbm_candidates:
-    placeholders = ','.join(['?'] * len(all_gbm_candidates))
-    compound_query = f"""
-        SELECT DISTINCT
-            n_cpd.display_name as compound,
-            n_prot.display_name as target_protein,
-            n_prot.name as target_id,
-            e.interaction_types,
-            e.layer
-        FROM edge e
-        JOIN node n_cpd ON n_cpd.name IN (e.interactor_a_node_name, e.interactor_b_node_name)
-        JOIN node n_prot ON n_prot.name IN (e.interactor_a_node_name, e.interactor_b_node_name)
-        WHERE n_cpd.type IN ('compound', 'small_molecule')
-        AND n_prot.name IN ({placeholders})
-        AND n_cpd.name != n_prot.name
-    """
-    compounds = pd.read_sql_query(compound_query, conn, params=list(all_gbm_candidates))
+    candidate_edges = network.neighbors(all_gbm_candidates)
+    candidate_edges = candidate_edges[candidate_edges.neighbor_type.isin(['compound', 'small_molecule'])
+                                      & (candidate_edges.neighbor != candidate_edges.node)]
+    compounds = pd.DataFrame({
+        'compound': candidate_edges.neighbor_display,
+        'target_protein': candidate_edges.node_display,
+        'target_id': candidate_edges.node,
+        'interaction_types': candidate_edges.interaction_types,
+        'layer': candidate_edges.layer,
+    }).drop_duplicates()
     print(f"=== Compounds affecting GBM candidates: {len(compounds)} ===")
     print(compounds.to_string(index=False))
     print()
@@ -1,5 +1,7 @@
 from apicalls.mygene import MyGeneClient
 from database.external_db import DBconnector
+from database.network_query import NetworkQuery
+from datawrangling.graph_snapshot import load_graph
 from config import *
 import networkx as nx
 
@@ -7,8 +9,7 @@ import networkx as nx
 def get_uniprot_ids(nodes_list):
     mygene = MyGeneClient()
     uniprot_ids = []
-    for gene in nodes_list:
-        mygene_res = mygene.query_gene(gene)
+    for mygene_res in mygene.query_genes(nodes_list).values():
         uniprot_hits = mygene_res['hits'][0].get('uniprot')
         if uniprot_hits:
             swissprot = uniprot_hits.get('Swiss-Prot')
@@ -26,11 +27,11 @@ nodes_list = nodes_to_check.replace(' ', '').split(',')
 
 uniprot_ids = get_uniprot_ids(nodes_list)
 db = DBconnector(OUTPUTS_DIR / 'merged_ferroptosis_w_omnipath.db')
-placeholders = ','.join([f"'{uid}'" for uid in uniprot_ids])
-query = f"""
+query_ids = db.temp_ids(uniprot_ids, 'query_ids')
+query = """
     SELECT *
     FROM node
-    WHERE name IN ({placeholders})
+    WHERE name IN query_ids
 """
 db.query_to_dataframe(query)
 found = set(db.query_to_dataframe(query)['name'].tolist())
@@ -43,8 +44,8 @@ core_query = """
     JOIN edge e ON n.name = e.interactor_a_node_name
         OR n.name = e.interactor_b_node_name
     WHERE e.layer = '0'
-    AND n.name IN ({})
-""".format(','.join([f"'{uid}'" for uid in uniprot_ids]))
+    AND n.name IN query_ids
+"""
 db.query_to_dataframe(core_query)
 
 core_edge_query = """
@@ -55,101 +56,78 @@ core_edge_query = """
     JOIN edge e2 ON (e.interactor_a_node_name = e2.interactor_a_node_name
         OR e.interactor_b_node_name = e2.interactor_b_node_name)
     WHERE e2.layer = '0'
-    AND n.name IN ({})
+    AND n.name IN query_ids
     GROUP BY n.name
-""".format(','.join([f"'{uid}'" for uid in uniprot_ids]))
+"""
 db.query_to_dataframe(core_edge_query)
 
-disease_query = """
-    SELECT n.display_name, d.disease_name, d.disease_id, COUNT(de.id) as association_count
-    FROM node n
-    JOIN edge e ON n.name = e.interactor_a_node_name
-        OR n.name = e.interactor_b_node_name
-    JOIN disease_edge de ON e.id = de.edge_id
-    JOIN disease d ON de.disease_id = d.id
-    WHERE n.name IN ({})
-    AND d.disease_id = 'ICD-11: 2A00'
-    GROUP BY n.name, d.disease_name
-    ORDER BY association_count DESC
-""".format(','.join([f"'{uid}'" for uid in uniprot_ids]))
-db.query_to_dataframe(disease_query)
+network = NetworkQuery(OUTPUTS_DIR / 'merged_ferroptosis_w_omnipath.db')
+gbm_nodes, _ = network.disease_subnetwork('ICD-11: 2A00')
+gbm_query_nodes = gbm_nodes[gbm_nodes.name.isin(uniprot_ids)].rename(columns={'edge_count': 'association_count'})
+gbm_query_nodes[['display_name', 'disease_name', 'disease_id', 'association_count']].sort_values(
+    'association_count', ascending=False)
 
 
 gbm_proteins = ['P36969', 'Q9UPY5', 'O60488', 'P31749', 'P42345']
-placeholders = ','.join([f"'{uid}'" for uid in gbm_proteins])
+gbm_protein_ids = db.temp_ids(gbm_proteins, 'gbm_protein_ids')
 
-edge_query = f"""
+edge_query = """
     SELECT e.interactor_a_node_name, n1.display_name as source_name,
            e.interactor_b_node_name, n2.display_name as target_name,
            e.interaction_types, e.layer, e.source_db
     FROM edge e
     JOIN node n1 ON e.interactor_a_node_name = n1.name
     JOIN node n2 ON e.interactor_b_node_name = n2.name
-    WHERE e.interactor_a_node_name IN ({placeholders})
-    AND e.interactor_b_node_name IN ({placeholders})
+    WHERE e.interactor_a_node_name IN gbm_protein_ids
+    AND e.interactor_b_node_name IN gbm_protein_ids
 """
 db.query_to_dataframe(edge_query)
 
-disease_edge_query = """
-    SELECT n.display_name as node,
-           e.interactor_a_node_name, n1.display_name as source_name,
-           e.interactor_b_node_name, n2.display_name as target_name,
-           e.interaction_types, e.layer, e.source_db,
-           d.disease_name, d.disease_id
-    FROM node n
-    JOIN edge e ON n.name = e.interactor_a_node_name
-        OR n.name = e.interactor_b_node_name
-    JOIN node n1 ON e.interactor_a_node_name = n1.name
-    JOIN node n2 ON e.interactor_b_node_name = n2.name
-    JOIN disease_edge de ON e.id = de.edge_id
-    JOIN disease d ON de.disease_id = d.id
-    WHERE n.name IN ({})
-    AND d.disease_id = 'ICD-11: 2A00'
-    ORDER BY n.display_name
-""".format(','.join([f"'{uid}'" for uid in uniprot_ids]))
-db.query_to_dataframe(disease_edge_query).to_csv('uhoh.csv')
+network.disease_edges(uniprot_ids, disease_id='ICD-11: 2A00').rename(columns={
+    'node_display': 'node',
+    'source': 'interactor_a_node_name', 'source_display': 'source_name',
+    'target': 'interactor_b_node_name', 'target_display': 'target_name',
+})[['node', 'interactor_a_node_name', 'source_name', 'interactor_b_node_name', 'target_name',
+    'interaction_types', 'layer', 'source_db', 'disease_name', 'disease_id']].sort_values('node').to_csv('uhoh.csv')
 
 
-edge_query = """
-    SELECT interactor_a_node_name, interactor_b_node_name, interaction_types, layer, source_db
-    FROM edge
-"""
-edges_df = db.query_to_dataframe(edge_query)
+graph = load_graph(OUTPUTS_DIR / 'merged_ferroptosis_w_omnipath.db')
+edges_df = graph.edge_frame(['interaction_types', 'layer', 'source_db'])
 
 gpx4 = 'P36969'
 slc7a11 = 'Q9UPY5'
 
-upstream_gpx4 = db.query_to_dataframe(f"""
+upstream_gpx4 = db.query_to_dataframe("""
     SELECT n.display_name, n.type, e.interaction_types, e.source_db
     FROM edge e
     JOIN node n ON e.interactor_a_node_name = n.name
-    WHERE e.interactor_b_node_name = '{gpx4}'
+    WHERE e.interactor_b_node_name = ?
     AND n.type != 'compound'
-""")
+""", params=(gpx4,))
 
-upstream_slc7a11 = db.query_to_dataframe(f"""
+upstream_slc7a11 = db.query_to_dataframe("""
     SELECT n.display_name, n.type, e.interaction_types, e.source_db
     FROM edge e
     JOIN node n ON e.interactor_a_node_name = n.name
-    WHERE e.interactor_b_node_name = '{slc7a11}'
+    WHERE e.interactor_b_node_name = ?
     AND n.type != 'compound'
-""")
+""", params=(slc7a11,))
 
-downstream_gpx4 = db.query_to_dataframe(f"""
+downstream_gpx4 = db.query_to_dataframe("""
     SELECT n.display_name, n.type, e.interaction_types, e.source_db
     FROM edge e
     JOIN node n ON e.interactor_b_node_name = n.name
-    WHERE e.interactor_a_node_name = '{gpx4}'
+    WHERE e.interactor_a_node_name = ?
     AND n.type != 'compound'
-""")
+""", params=(gpx4,))
 
-downstream_slc7a11 = db.query_to_dataframe(f"""
+downstream_slc7a11 = db.query_to_dataframe("""
     SELECT n.display_name, n.type, e.interaction_types, e.source_db
     FROM edge e
     JOIN node n ON e.interactor_b_node_name = n.name
-    WHERE e.interactor_a_node_name = '{slc7a11}'
+    WHERE e.interactor_a_node_name = ?
     AND n.type != 'compound'
-""")
+""", params=(slc7a11,))
 
 print(f"Upstream GPX4: {len(upstream_gpx4)}")
 print(f"Upstream SLC7A11: {len(upstream_slc7a11)}")
@@ -173,16 +151,16 @@ paper_proteins = {'AKT', 'MTOR', 'CDKN2A', 'ACSL4', 'SREBF1', 'EIF4EBP1'}
 print("Paper proteins in upstream GPX4:", paper_proteins & upstream_gpx4_names)
 print("Paper proteins in upstream SLC7A11:", paper_proteins & upstream_slc7a11_names)
 
-shared_regulators = db.query_to_dataframe(f"""
+shared_regulators = db.query_to_dataframe("""
     SELECT DISTINCT n.display_name, n.type, n.role_in_ferroptosis,
            e1.interaction_types as effect_on_gpx4,
            e2.interaction_types as effect_on_slc7a11
     FROM node n
     JOIN edge e1 ON n.name = e1.interactor_a_node_name
-        AND e1.interactor_b_node_name = '{gpx4}'
+        AND e1.interactor_b_node_name = ?
     JOIN edge e2 ON n.name = e2.interactor_a_node_name
-        AND e2.interactor_b_node_name = '{slc7a11}'
+        AND e2.interactor_b_node_name = ?
     WHERE n.type != 'compound'
-""")
+""", params=(gpx4, slc7a11))
 
 shared_regulators.to_csv('uhoh.csv')